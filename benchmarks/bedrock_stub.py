@@ -0,0 +1,241 @@
+"""
+Local stand-ins for the AWS clients used by the labelisation lambdas, so that
+the pipeline can be benchmarked without calling AWS.
+
+`RecordingBedrockClient` wraps a real bedrock-runtime client and saves its tool
+use responses to a JSON lines file; `StubBedrockClient` replays them (or
+default answers) with a configurable latency distribution and error rate.
+"""
+import io
+import copy
+import json
+import time
+import random
+import hashlib
+import threading
+from itertools import cycle
+
+from botocore.exceptions import ClientError
+
+from common import load_module
+
+prompt_builder = load_module("prompt_builder", "lambda/Mistral/prompt_builder.py")
+
+# Tool inputs answered by default, by tool name
+DEFAULT_TOOL_INPUTS = {
+    "sentiment_checker": {
+        "overall_sentiment": "NEUTRAL",
+        "confident_score": 0.9,
+        "factuel_checker": True,
+        "theme": "reseau",
+    },
+    "json_format": {
+        "date": "2024-01-02",
+        "media": "La Voix du Nord",
+        "title": "Suite à une panne, 179 foyers privés de courant",
+        "location": "Nord",
+    },
+}
+DEFAULT_TOOL_INPUTS["article_labeler"] = DEFAULT_TOOL_INPUTS["json_format"] | DEFAULT_TOOL_INPUTS["sentiment_checker"]
+
+
+def count_input_tokens(messages: list) -> int:
+    """Estimates the input tokens of a converse request, documents included."""
+    tokens = 0
+    for message in messages:
+        for block in message["content"]:
+            if "text" in block:
+                tokens += prompt_builder.estimate_tokens(block["text"])
+            elif "document" in block:
+                tokens += prompt_builder.estimate_tokens(block["document"]["source"]["bytes"])
+    return tokens
+
+
+def request_key(messages: list) -> str:
+    """Identifies a converse request by its text blocks and document contents."""
+    parts = []
+    for message in messages:
+        for block in message["content"]:
+            if "text" in block:
+                parts.append(block["text"])
+            elif "document" in block:
+                parts.append(hashlib.sha1(block["document"]["source"]["bytes"]).hexdigest())
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def parse_latency(spec, rng: random.Random):
+    """
+    Returns a function sampling a latency in milliseconds from a spec:
+        "200" or 200: fixed;  "normal:800,200";  "lognormal:800,0.5" (median, sigma);
+        "uniform:500,1500".
+    """
+    if isinstance(spec, (int, float)):
+        return lambda: float(spec)
+    name, _, params = str(spec).partition(":")
+    if not params:
+        return lambda: float(name)
+    a, b = (float(value) for value in params.split(","))
+    if name == "normal":
+        return lambda: max(rng.gauss(a, b), 0.0)
+    if name == "lognormal":
+        return lambda: rng.lognormvariate(0.0, b) * a
+    if name == "uniform":
+        return lambda: rng.uniform(a, b)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class RecordingBedrockClient:
+    """Forwards `converse` to a real client and appends each response to a file."""
+
+    def __init__(self, client, path: str):
+        self.client = client
+        self.path = path
+        self.lock = threading.Lock()
+
+    def converse(self, **kwargs):
+        response = self.client.converse(**kwargs)
+        record = {
+            "tool": kwargs["toolConfig"]["tools"][0]["toolSpec"]["name"],
+            "key": request_key(kwargs["messages"]),
+            "response": {name: response[name] for name in ("output", "stopReason", "usage", "metrics") if name in response},
+        }
+        with self.lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        return response
+
+
+class StubBedrockClient:
+    """
+    Answers `converse` with a tool use, with the same response shape as
+    bedrock-runtime (output, usage and metrics).
+
+    Recorded responses are replayed for the same request, or in turn for the
+    same tool when the request was not recorded; default tool inputs are used
+    otherwise. A share `error_rate` of the calls raises a ThrottlingException.
+    """
+
+    def __init__(self, tool_inputs: dict = None, latency_ms=0.0, recordings: str = None, error_rate: float = 0.0, seed: int = 0):
+        self.tool_inputs = tool_inputs or DEFAULT_TOOL_INPUTS
+        self.rng = random.Random(seed)
+        self.sample_latency = parse_latency(latency_ms, self.rng)
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.calls = []
+        self.errors = 0
+        self.waited_seconds = 0.0
+        self.recorded, self.recorded_by_tool = {}, {}
+        if recordings:
+            self.load_recordings(recordings)
+
+    def load_recordings(self, path: str) -> None:
+        by_tool = {}
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                record = json.loads(line)
+                self.recorded[record["key"]] = record["response"]
+                by_tool.setdefault(record["tool"], []).append(record["response"])
+        self.recorded_by_tool = {tool: cycle(responses) for tool, responses in by_tool.items()}
+
+    def converse(self, modelId, messages, inferenceConfig=None, toolConfig=None, **kwargs):
+        tool_name = toolConfig["tools"][0]["toolSpec"]["name"]
+        with self.lock:
+            latency = self.sample_latency()
+            failed = self.rng.random() < self.error_rate
+            recorded = self.recorded.get(request_key(messages))
+            if recorded is None and tool_name in self.recorded_by_tool:
+                recorded = next(self.recorded_by_tool[tool_name])
+            self.waited_seconds += latency / 1000
+        time.sleep(latency / 1000)
+
+        if failed:
+            with self.lock:
+                self.errors += 1
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded (stub)"}, "ResponseMetadata": {"RetryAttempts": 0}},
+                "Converse",
+            )
+
+        if recorded is not None:
+            response = copy.deepcopy(recorded)
+        else:
+            tool_input = copy.deepcopy(self.tool_inputs[tool_name])
+            usage = {
+                "inputTokens": count_input_tokens(messages),
+                "outputTokens": prompt_builder.estimate_tokens(json.dumps(tool_input)),
+            }
+            usage["totalTokens"] = usage["inputTokens"] + usage["outputTokens"]
+            response = {
+                "output": {
+                    "message": {
+                        "role": "assistant",
+                        "content": [{"toolUse": {"toolUseId": "stub", "name": tool_name, "input": tool_input}}],
+                    }
+                },
+                "stopReason": "tool_use",
+                "usage": usage,
+            }
+        response["metrics"] = {"latencyMs": int(latency)}
+        response["ResponseMetadata"] = {"RetryAttempts": 0}
+
+        with self.lock:
+            self.calls.append({"modelId": modelId, "tool": tool_name, "usage": response["usage"], "latencyMs": latency})
+        return response
+
+
+def text_to_pdf(text: str, line_width: int = 90, lines_per_page: int = 50) -> bytes:
+    """
+    A minimal PDF of the text (Helvetica, one page per `lines_per_page` wrapped lines),
+    so that the articles served to PDFLabelisation are documents Bedrock accepts.
+    """
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        words, line = paragraph.split(), ""
+        for word in words:
+            if line and len(line) + 1 + len(word) > line_width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+    pages = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)] or [[""]]
+
+    def escape(line):
+        encoded = line.encode("cp1252", errors="replace")
+        return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and its content stream per page
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % i for i in page_ids) + b"] /Count %d >>" % len(pages),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for page_id, page in zip(page_ids, pages):
+        stream = b"BT /F1 10 Tf 14 TL 50 800 Td " + b" ".join(b"(" + escape(line) + b") '" for line in page) + b" ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (page_id + 1)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+class StubS3Client:
+    """Serves every key from an in-memory dict, or the same bytes for any key."""
+
+    def __init__(self, objects: dict = None, default: bytes = b""):
+        self.objects = objects or {}
+        self.default = default
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects.get(Key, self.default)), "Metadata": {}}
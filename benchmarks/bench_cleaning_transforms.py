@@ -0,0 +1,176 @@
+"""
+Benchmarks the media and theme transforms and the value normalization of
+utils/cleaning_dataset.py on synthetic datasets, against the former row-wise
+implementations kept below, and checks that both produce the same values:
+
+    python benchmarks/bench_cleaning_transforms.py --rows 10000 100000 1000000
+"""
+import re
+import argparse
+
+import numpy as np
+import pandas as pd
+import unidecode
+
+from common import load_module, print_table, timed
+
+cleaning = load_module("cleaning_dataset", "utils/cleaning_dataset.py")
+
+MEDIAS = list(cleaning.media_mapping)
+THEMES = ["Réseau", "Client", "Linky", "Aléas climatiques", "RSE", "Mobilité électrique", "Marque employeur"]
+TERRITOIRES = ["Nord", "nord ", "Pas-de-Calais", "pas de calais ", "Nord pas-de-calais", "hauts-de-france"]
+RESPONSES = ["Factuel", "Factuel négatif ", "Positif", "Négatif", "Factuel positif", "Positif nuancé", "Négatif nuancé"]
+
+# ----------------- Former row-wise implementations -----------------
+
+
+def rowwise_split_value_by_delimiters(value, delimiters):
+    if isinstance(value, str):
+        pattern = "|".join(map(re.escape, delimiters))
+        if re.search(pattern, value):
+            return re.split(pattern, value)
+    return [value]
+
+
+def rowwise_split_series_by_delimiters(series, delimiters):
+    return series.apply(lambda x: rowwise_split_value_by_delimiters(x, delimiters))
+
+
+def rowwise_transform_media(df, delimiters=["/", " et ", "+"]):
+    df["media"] = rowwise_split_series_by_delimiters(df["media"], delimiters)
+    df["media"] = df.apply(lambda row: row["media"][: row["nb_articles"]], axis=1)
+    df["nb_articles"] = df["nb_articles"] // df["media"].apply(len)
+    df = df.explode("media", ignore_index=True)
+    df["media"] = df["media"].apply(cleaning.normalize).map(cleaning.media_mapping)
+    return df
+
+
+def rowwise_transform_theme(df, delimiters=["/"]):
+    df["theme"] = df["theme"].str.replace(r"\s+", "_", regex=True)
+    df["theme"] = rowwise_split_series_by_delimiters(df["theme"], delimiters)
+    df["theme"] = df.apply(
+        lambda row: (
+            cleaning.restructure_theme_list(row["theme"], row.nb_articles)
+            if isinstance(row["theme"], list)
+            else row["theme"]
+        ),
+        axis=1,
+    )
+    df["nb_articles"] = df["nb_articles"] // df["theme"].apply(len)
+    df = df.explode("theme", ignore_index=True)
+    return df
+
+
+def rowwise_preprocess(df):
+    df["Qualité du retour"] = df["Qualité du retour"].apply(lambda x: unidecode.unidecode(x.lower()))
+    df["Qualité du retour"] = df["Qualité du retour"].str.strip()
+    df["sentiment"] = df["Qualité du retour"].apply(
+        lambda x: ("positif" if "positif" in x else ("negatif" if "negatif" in x else "neutre"))
+    )
+    df["factuel"] = df["Qualité du retour"].apply(lambda x: True if "factuel" in x else False)
+    df["theme"] = df["theme"].apply(lambda x: unidecode.unidecode(str(x).lower().strip()))
+    for old, new in THEME_REPLACEMENTS.items():
+        df["theme"] = df["theme"].str.replace(old, new, regex=False)
+    df["territoire"] = df["territoire"].str.lower().apply(lambda x: cleaning.clean_using_dict(x, TERRITOIRE_REPLACEMENTS))
+    return df
+
+
+def vectorised_preprocess(df):
+    df = cleaning.sanitize_and_label_responses(df)
+    return cleaning.preprocess_df(df)
+
+
+# Replacement dicts of preprocess_theme_column and preprocess_territoire_column
+THEME_REPLACEMENTS = {
+    "clients": "client",
+    "cleints": "client",
+    "partenariats industriels / academiques": "partenariats industriels/academiques",
+    "rh - partenariat - rse": "rh/partenariat/rse",
+    "aleas climatique": "aleas climatiques",
+    "aleas climatiquess": "aleas climatiques",
+    "marque employeur / rh": "marque employeur/rh",
+}
+TERRITOIRE_REPLACEMENTS = {
+    "nord pas-de-calais": "Hauts-de-France",
+    "nord pas-de-calais ": "Hauts-de-France",
+    "nord pas de calais": "Hauts-de-France",
+    "nord pas de calais ": "Hauts-de-France",
+    "nord-pas de calais": "Hauts-de-France",
+    "nord-pas-de-calais": "Hauts-de-France",
+    "nord": "Nord",
+    "nord ": "Nord",
+    "nord  ": "Nord",
+    "Nord ": "Nord",
+    "Nord  ": "Nord",
+    "nord - pas-de-calais": "Hauts-de-France",
+    "Nord - pas de calais": "Hauts-de-France",
+    "Nord pas-de-calais": "Hauts-de-France",
+    "Nord pas-de-calais ": "Hauts-de-France",
+    " pas-de-calais": "Pas-de-Calais",
+    "Pas-de-Calais": "Pas-de-Calais",
+    "Pas-de-Calais ": "Pas-de-Calais",
+    "pas-de-calais": "Pas-de-Calais",
+    "pas-de-calais ": "Pas-de-Calais",
+    "pas de calais": "Pas-de-Calais",
+    "pas de calais ": "Pas-de-Calais",
+    "hauts-de-france": "Hauts-de-France",
+    "hauts-de-france ": "Hauts-de-France",
+}
+
+# ----------------- Synthetic data -----------------
+
+
+def synthetic_dataset(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Rows with 1 to 3 medias and themes, and as many or fewer articles."""
+    rng = np.random.default_rng(seed)
+    separators = ["/", " et ", "+"]
+
+    def joined(values, counts, seps):
+        return [
+            sep.join(rng.choice(values, size=count, replace=False))
+            for count, sep in zip(counts, seps)
+        ]
+
+    media_counts = rng.choice([1, 2, 3], size=rows, p=[0.8, 0.15, 0.05])
+    theme_counts = rng.choice([1, 2, 3], size=rows, p=[0.85, 0.1, 0.05])
+    df = pd.DataFrame({
+        "date": "01/01/2024",
+        "media": joined(MEDIAS, media_counts, rng.choice(separators, size=rows)),
+        "theme": joined(THEMES, theme_counts, ["/"] * rows),
+        "nb_articles": rng.choice([1, 2, 3, 4], size=rows, p=[0.75, 0.15, 0.07, 0.03]),
+        "sujet": [f"Sujet {i}" for i in range(rows)],
+        "territoire": rng.choice(TERRITOIRES, size=rows),
+        "Qualité du retour": rng.choice(RESPONSES, size=rows),
+    })
+    # A few missing themes, on rows counting several articles as in the source file
+    missing = rng.random(rows) < 0.01
+    df.loc[missing, "theme"] = np.nan
+    df.loc[missing, "nb_articles"] = 2
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    table = []
+    for rows in args.rows:
+        df = synthetic_dataset(rows)
+        for name, rowwise, vectorised in [
+            ("media", rowwise_transform_media, cleaning.transform_media),
+            ("theme", rowwise_transform_theme, cleaning.transform_theme),
+            ("normalization", rowwise_preprocess, vectorised_preprocess),
+        ]:
+            rowwise_time, expected = timed(lambda: rowwise(df.copy()), repeat=args.repeat)
+            vectorised_time, result = timed(lambda: vectorised(df.copy()), repeat=args.repeat)
+            # The normalized columns are categorical, compare their values
+            pd.testing.assert_frame_equal(result.astype(object), expected.astype(object))
+            table.append([
+                rows, name, len(result), f"{rowwise_time:.3f}", f"{vectorised_time:.3f}",
+                f"{rowwise_time / vectorised_time:.1f}x",
+            ])
+
+    print_table(["rows", "transform", "output rows", "row-wise (s)", "vectorised (s)", "speedup"], table)
+    print("Outputs are identical.")
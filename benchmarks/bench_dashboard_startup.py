@@ -0,0 +1,93 @@
+"""
+Benchmarks the startup of the dashboard data with and without the local
+snapshot, on the light columns of data/Data_cleaned.csv repeated `--copies`
+times:
+
+    python benchmarks/bench_dashboard_startup.py --copies 1 100
+
+The database fetch itself is not measured: the "full reload" path is the
+cleaning of rows already in memory, so its real cost is higher by the network
+transfer of the whole table, while the delta path only transfers new rows.
+"""
+import sys
+import zlib
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from common import ROOT_PATH, print_table, timed
+
+sys.path.insert(0, str(ROOT_PATH / "front"))
+from utils.load_and_clean_df import clean_data  # noqa: E402
+from utils.snapshot import load_with_snapshot, save_snapshot  # noqa: E402
+
+LIGHT_COLUMNS = ['id', 'date', 'territoire', 'sujet', 'theme', 'nb_articles', 'media', 'nuance', 'sentiment', 'factuel']
+
+
+def raw_table(copies: int) -> pd.DataFrame:
+    """Rows as streamed from the database: dates as DD/MM/YYYY strings, integer flags."""
+    df = pd.read_csv(ROOT_PATH / "data/Data_cleaned.csv")
+    df = pd.concat([df] * copies, ignore_index=True)
+    df.insert(0, "id", np.arange(1, len(df) + 1))
+    df["date"] = pd.to_datetime(df["date"]).dt.strftime("%d/%m/%Y")
+    for column in ["territoire", "theme", "media", "sujet"]:
+        df[column] = df[column].fillna("")
+    return df[LIGHT_COLUMNS]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 100])
+    parser.add_argument("--delta", type=float, default=0.01, help="Share of rows added since the snapshot.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    table = []
+    with tempfile.TemporaryDirectory() as folder:
+        for copies in args.copies:
+            raw = raw_table(copies)
+            old_rows = raw.iloc[: int(len(raw) * (1 - args.delta))]
+            path = f"{folder}/dashboard_{copies}.parquet"
+
+            # The row CRC32 of fetch_table_state, computed once: the database query is not measured
+            checksums = np.array([zlib.crc32("|".join(map(str, row)).encode()) for row in raw.itertuples(index=False)])
+
+            def table_state(last_id=None, rows=raw):
+                ids = raw["id"].to_numpy()
+                return (
+                    len(rows), int(rows["id"].max()),
+                    int(np.bitwise_xor.reduce(checksums[: len(rows)])),
+                    int(np.bitwise_xor.reduce(checksums[: len(rows)][ids[: len(rows)] > (last_id or 0)])),
+                )
+
+            def old_checksum():
+                return table_state(rows=old_rows)[2]
+
+            def load(rows=raw):
+                return clean_data(rows.copy())
+
+            def load_since(last_id, current_df, rows=raw):
+                return clean_data(rows[rows["id"] > last_id].copy(), reference=current_df)
+
+            def startup_with_delta():
+                save_snapshot(clean_data(old_rows.copy()), path, old_checksum())
+                start = time.perf_counter()
+                df = load_with_snapshot(path, table_state, load, load_since)
+                return time.perf_counter() - start, df
+
+            full_time, full_df = timed(load, repeat=args.repeat)
+            save_snapshot(full_df, path, table_state()[2])
+            snapshot_time, snapshot_df = timed(load_with_snapshot, path, table_state, load, load_since, repeat=args.repeat)
+            delta_time, delta_df = min((startup_with_delta() for _ in range(args.repeat)), key=lambda result: result[0])
+
+            pd.testing.assert_frame_equal(snapshot_df, full_df)
+            pd.testing.assert_frame_equal(delta_df, full_df)
+            table.append([
+                len(raw), f"{full_time * 1000:.0f}", f"{snapshot_time * 1000:.0f}",
+                f"{delta_time * 1000:.0f}", f"{full_time / snapshot_time:.1f}x",
+            ])
+
+    print_table(["rows", "full reload (ms)", "current snapshot (ms)", f"snapshot + {args.delta:.0%} delta (ms)", "speedup"], table)
@@ -0,0 +1,214 @@
+"""
+Measures the JSON payload of the grid items of the dashboard sent at each filter
+change: the full figures built by the former implementation kept below, against
+the Dash patches of front/utils/dash_figures.py, whose static structure (traces,
+styling, geometry) is sent once with the layout. The map uses the GeoJSON of
+front/assets/geojson, as loaded and as simplified at startup:
+
+    python benchmarks/bench_figure_payload.py --geojson front/assets/geojson/france-departements.geojson
+"""
+import sys
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+from plotly.subplots import make_subplots
+from nltk.corpus import stopwords
+from wordcloud import WordCloud
+
+from common import ROOT_PATH, print_table
+
+sys.path.insert(0, str(ROOT_PATH / "front"))
+import assets.css.styles as myCSS  # noqa: E402
+from utils.dash_figures import (  # noqa: E402
+    figure_patch,
+    create_combined_pie_bar_chart,
+    combined_pie_bar_chart_updates,
+    create_geographic_distribution_map,
+    geographic_distribution_map_updates,
+    create_sentiment_trend_area,
+    sentiment_trend_area_updates,
+    create_wordcloud,
+    wordcloud_updates,
+)
+from utils.load_and_clean_df import clean_data  # noqa: E402
+from utils.map_geometry import simplify_geojson  # noqa: E402
+
+LIGHT_COLUMNS = ['id', 'date', 'territoire', 'sujet', 'theme', 'nb_articles', 'media', 'nuance', 'sentiment', 'factuel']
+FRENCH_STOP_WORDS = set(stopwords.words('french'))
+
+# ----------------- Former implementation -----------------
+
+
+def former_combined_pie_bar_chart(filtered_df: pd.DataFrame, style: dict) -> go.Figure:
+    threshold = 0.02
+    media_counts = filtered_df['Média'].value_counts(normalize=True)
+    filtered_df = filtered_df.assign(**{'Média': filtered_df['Média'].apply(
+        lambda x: x if media_counts[x] > threshold else 'Autres'
+    )})
+    fig = make_subplots(
+        rows=1, cols=2,
+        specs=[[{'type': 'pie'}, {'type': 'bar'}]],
+        subplot_titles=["📊 Répartition des médias", "📊 Répartition des tonalités"]
+    )
+    media_pie = px.pie(filtered_df, names='Média', color='Média', color_discrete_sequence=px.colors.qualitative.Plotly)
+    fig.add_trace(media_pie.data[0], row=1, col=1)
+    fig.update_traces(
+        textposition='inside', textinfo='percent+label',
+        hovertemplate="<b>%{label}</b><br>Percentage: %{percent:.1%}<br>Count: %{value}",
+        hole=0.4, marker=dict(line=dict(color='#FFFFFF', width=2)), selector=0
+    )
+    fig.update_traces(showlegend=False, selector=0)
+    for category in ['Factuel', 'Sentiment', 'Nuancé']:
+        for label, value in filtered_df[category].value_counts(normalize=True).items():
+            fig.add_trace(go.Bar(
+                x=[category], y=[value], name="", text=[f"{value:.1%}"], textposition="inside",
+                hovertemplate=f"<b>{category}: {label}</b><br>Ratio: %{{y:.1%}}<br>",
+                marker=dict(color=style['bar_colors'][category].get(label, '#000000')),
+            ), row=1, col=2)
+    fig.update_layout(
+        title_font=style['title_font'], showlegend=False, margin=dict(t=50, b=10, l=5, r=20), barmode="stack",
+        xaxis_title="Category", yaxis_title="Ratio Distribution", yaxis=dict(showgrid=True), bargap=0.3
+    )
+    return fig
+
+
+def former_geographic_distribution_map(filtered_df: pd.DataFrame, style: dict, geojson: dict) -> go.Figure:
+    aggregated_df = filtered_df.groupby('Territoire')['Sentiment'].agg(
+        lambda x: x.mode()[0] if not x.mode().empty else 'Inconnu'
+    ).reset_index()
+    all_territoires = pd.DataFrame({'Territoire': [feature['properties']['nom'] for feature in geojson['features']]})
+    merged_df = all_territoires.merge(aggregated_df, on='Territoire', how='left')
+    merged_df['Sentiment'] = merged_df['Sentiment'].fillna('Inconnu')
+    geo_fig = px.choropleth(
+        merged_df, geojson=geojson, locations='Territoire', featureidkey="properties.nom", color='Sentiment',
+        color_discrete_map=style['color_mapping'], title=style['title'], hover_data=['Territoire', 'Sentiment'],
+    )
+    geo_fig.update_layout(title_font=style['title_font'], margin={"r": 0, "t": 50, "l": 0, "b": 0})
+    geo_fig.update_geos(fitbounds="locations", visible=False)
+    return geo_fig
+
+
+def former_sentiment_trend_area(filtered_df: pd.DataFrame, style: dict) -> go.Figure:
+    sentiment_trend = filtered_df.groupby(['Date', 'Sentiment']).size().reset_index(name='Count')
+    factuel_trend = (
+        filtered_df[filtered_df['Factuel'] == 'Oui'].groupby(['Date', 'Factuel']).size().reset_index(name='Count')
+    )
+    factuel_trend = factuel_trend.rename(columns={'Factuel': 'Sentiment'})
+    factuel_trend['Sentiment'] = 'Factuel'
+    combined_trend = pd.concat([sentiment_trend, factuel_trend], axis=0)
+    fig = px.area(
+        combined_trend, x='Date', y='Count', color='Sentiment', color_discrete_map=style['color_mapping'],
+        title="📈 Tendance des tonalités et des articles factuels au fil du temps"
+    )
+    fig.update_layout(
+        title_font=dict(size=20), xaxis_title="Date", yaxis_title="Nombre d'articles", legend_title="Légende",
+        template="plotly_white",
+    )
+    return fig
+
+
+def former_wordcloud(frequencies: dict, style: dict) -> go.Figure:
+    wordcloud = WordCloud(
+        width=style['width'], height=style['height'], background_color=style['backgroundColor'],
+        max_words=100, prefer_horizontal=0.9,
+    ).generate_from_frequencies(frequencies)
+    fig = go.Figure()
+    fig.add_trace(go.Image(z=wordcloud.to_array(), hoverinfo='skip'))
+    fig.update_layout(
+        title=style['title'], xaxis=dict(visible=False, scaleanchor='y'), yaxis=dict(visible=False, scaleanchor='x'),
+        margin=dict(l=0, r=0, t=40, b=0), paper_bgcolor='white', plot_bgcolor='rgba(0,0,0,0)',
+    )
+    return fig
+
+# ----------------- Data -----------------
+
+
+def dashboard_frame() -> pd.DataFrame:
+    """The cleaned dashboard data, with the subjects and bodies of the word cloud."""
+    source = pd.read_csv(ROOT_PATH / "data/Data_cleaned.csv")
+    source.insert(0, "id", np.arange(1, len(source) + 1))
+    source["date"] = pd.to_datetime(source["date"]).dt.strftime("%d/%m/%Y")
+    for column in ["territoire", "theme", "media", "sujet"]:
+        source[column] = source[column].fillna("")
+    df = clean_data(source[LIGHT_COLUMNS])
+    df['Article'] = source.set_index('id')['article']
+    return df
+
+
+def word_frequencies(filtered_df: pd.DataFrame) -> dict:
+    text = ' '.join(filtered_df['Sujet'].dropna().tolist() + filtered_df['Article'].dropna().tolist())
+    return WordCloud(stopwords=FRENCH_STOP_WORDS, collocations=False).process_text(text)
+
+
+def payload_size(value) -> int:
+    """Size in bytes of the JSON sent to the browser."""
+    if hasattr(value, 'to_plotly_json'):
+        value = value.to_plotly_json()
+    return len(to_json_plotly(value).encode('utf-8'))
+
+
+def kilobytes(size: int) -> str:
+    return f"{size / 1024:.1f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--geojson", default=str(ROOT_PATH / "front/assets/geojson/france-departements.geojson"))
+    args = parser.parse_args()
+
+    with open(args.geojson, 'r') as geojson_file:
+        geojson = json.load(geojson_file)
+    simplified = simplify_geojson(geojson)
+
+    df = dashboard_frame().sort_values(by='Date')
+    middle = df['Date'].min() + (df['Date'].max() - df['Date'].min()) / 2
+    scenarios = [
+        ("all rows", df),
+        ("1 theme", df[df['Thème'] == df['Thème'].value_counts().index[0]]),
+        ("1 territory", df[df['Territoire'] == df['Territoire'].value_counts().index[0]]),
+        ("90 days", df[(df['Date'] >= middle) & (df['Date'] <= middle + pd.Timedelta(days=90))]),
+    ]
+
+    items = {
+        'combined-pie-chart': (
+            lambda rows: former_combined_pie_bar_chart(rows, myCSS.pie_bar_chart),
+            lambda: create_combined_pie_bar_chart(myCSS.pie_bar_chart),
+            lambda rows: combined_pie_bar_chart_updates(rows, myCSS.pie_bar_chart),
+        ),
+        'geographic-distribution': (
+            lambda rows: former_geographic_distribution_map(rows, myCSS.geographic_distribution, geojson),
+            lambda: create_geographic_distribution_map(myCSS.geographic_distribution, simplified),
+            lambda rows: geographic_distribution_map_updates(rows, myCSS.geographic_distribution, simplified),
+        ),
+        'sentiment-trend-area': (
+            lambda rows: former_sentiment_trend_area(rows, myCSS.sentiment_trend),
+            lambda: create_sentiment_trend_area(myCSS.sentiment_trend),
+            lambda rows: sentiment_trend_area_updates(rows, myCSS.sentiment_trend),
+        ),
+        'word-cloud': (
+            lambda rows: former_wordcloud(word_frequencies(rows), myCSS.wordcloud),
+            lambda: create_wordcloud(myCSS.wordcloud),
+            lambda rows: wordcloud_updates(word_frequencies(rows), myCSS.wordcloud),
+        ),
+    }
+
+    table = [["geojson", "as loaded / simplified", "", kilobytes(payload_size(geojson)), kilobytes(payload_size(simplified)), ""]]
+    totals = [0, 0]
+    for item, (former, structure, updates) in items.items():
+        structure_size = payload_size(structure())
+        table.append([item, "structure, once", "", "", kilobytes(structure_size), ""])
+        totals[1] += structure_size
+        for name, rows in scenarios:
+            former_size = payload_size(former(rows))
+            patch_size = payload_size(figure_patch(updates(rows)))
+            totals[0] += former_size
+            totals[1] += patch_size
+            table.append([item, name, len(rows), kilobytes(former_size), kilobytes(patch_size), f"{former_size / patch_size:.0f}x"])
+
+    table.append(["total", f"{len(scenarios)} filter changes", "", kilobytes(totals[0]), kilobytes(totals[1]), f"{totals[0] / totals[1]:.1f}x"])
+    print_table(["item", "filters", "rows", "full figure (KB)", "patch (KB)", "reduction"], table)
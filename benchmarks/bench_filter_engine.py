@@ -0,0 +1,74 @@
+"""
+Benchmarks the dropdown and date filters of the dashboard (front/utils/dash_filtering.py)
+with chained masks and with the filter engine of front/utils/filter_engine.py, and
+checks that both return the same rows. The cleaned dashboard data of
+data/Data_cleaned.csv is repeated up to `--rows` rows, with dates spread over years:
+
+    python benchmarks/bench_filter_engine.py --rows 100000 1000000
+"""
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import ROOT_PATH, print_table, timed
+
+sys.path.insert(0, str(ROOT_PATH / "front"))
+from utils.dash_filtering import filter_df  # noqa: E402
+from utils.filter_engine import FilterEngine  # noqa: E402
+from utils.load_and_clean_df import clean_data  # noqa: E402
+
+LIGHT_COLUMNS = ['id', 'date', 'territoire', 'sujet', 'theme', 'nb_articles', 'media', 'nuance', 'sentiment', 'factuel']
+
+
+def dashboard_frame(rows: int) -> pd.DataFrame:
+    """The cleaned dashboard data, each copy of the source shifted by one week."""
+    source = pd.read_csv(ROOT_PATH / "data/Data_cleaned.csv")
+    copies = -(-rows // len(source))
+    df = pd.concat([source] * copies, ignore_index=True).iloc[:rows]
+    shift = pd.to_timedelta(np.arange(len(df)) // len(source) * 7, unit="D")
+    df["date"] = (pd.to_datetime(df["date"]) + shift).dt.strftime("%d/%m/%Y")
+    df.insert(0, "id", np.arange(1, len(df) + 1))
+    for column in ["territoire", "theme", "media", "sujet"]:
+        df[column] = df[column].fillna("")
+    return clean_data(df[LIGHT_COLUMNS])
+
+
+def scenarios(df: pd.DataFrame) -> list:
+    themes = df['Thème'].value_counts().index
+    medias = df['Média'].value_counts().index
+    middle = df['Date'].min() + (df['Date'].max() - df['Date'].min()) / 2
+    start, end = str(middle.date()), str((middle + pd.Timedelta(days=90)).date())
+    return [
+        ("no filter", (None, None, None, None, None, None, None)),
+        ("1 theme", ([themes[0]], None, None, None, None, None, None)),
+        ("3 medias, 1 territory", (None, None, ['Nord'], list(medias[:3]), None, None, None)),
+        ("date range", (None, None, None, None, start, end, None)),
+        ("2 themes, 1 sentiment, dates", (list(themes[:2]), ['Négatif'], None, None, start, end, None)),
+        ("all facets, dates", ([themes[1]], ['Positif', 'Neutre'], ['Pas-de-Calais'], list(medias[:5]), start, end, None)),
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    table = []
+    for rows in args.rows:
+        df = dashboard_frame(rows)
+        build_time, engine = timed(FilterEngine, df)
+        table.append([len(df), "engine build", "", "", f"{build_time * 1000:.1f}", ""])
+        for name, filters in scenarios(df):
+            masks_time, expected = timed(filter_df, df, filters, repeat=args.repeat)
+            engine_time, result = timed(filter_df, df, filters, filter_engine=engine, repeat=args.repeat)
+            pd.testing.assert_frame_equal(result, expected)
+            table.append([
+                len(df), name, len(result), f"{masks_time * 1000:.1f}", f"{engine_time * 1000:.1f}",
+                f"{masks_time / engine_time:.1f}x",
+            ])
+
+    print_table(["rows", "filters", "matches", "chained masks (ms)", "filter engine (ms)", "speedup"], table)
+    print("Results are identical.")
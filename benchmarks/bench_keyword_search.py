@@ -0,0 +1,79 @@
+"""
+Benchmarks the keyword search of the dashboard (front/utils/dash_filtering.py)
+with and without the search index, on data/Data_cleaned.csv repeated `--copies`
+times, and checks that both return the same rows:
+
+    python benchmarks/bench_keyword_search.py --copies 1 10
+"""
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import ROOT_PATH, print_table, timed
+
+sys.path.insert(0, str(ROOT_PATH / "front"))
+from utils.dash_filtering import filter_df  # noqa: E402
+from utils.search_index import SearchIndex  # noqa: E402
+
+QUERIES = [
+    "incendie",
+    "Enedis coupure",
+    "électricité, réseau",
+    "linky compteur",
+    "ele",
+    "pas-de-calais",
+    "l'électricité",
+    "zzzz",
+]
+
+
+def dashboard_frame(copies: int) -> pd.DataFrame:
+    """The dashboard data with the article bodies, indexed by id."""
+    df = pd.read_csv(ROOT_PATH / "data/Data_cleaned.csv")
+    df = pd.concat([df] * copies, ignore_index=True)
+    df.index = pd.RangeIndex(1, len(df) + 1, name="id")
+    return df.rename(columns={"sujet": "Sujet", "article": "Article"})[["Sujet", "Article"]]
+
+
+def table_chunks(df: pd.DataFrame, chunk_size: int = 5000):
+    """Chunks as streamed from the table by stream_table_chunks."""
+    rows = df.reset_index().rename(columns={"Sujet": "sujet", "Article": "article"})
+    for start in range(0, len(rows), chunk_size):
+        yield rows.iloc[start:start + chunk_size]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    table = []
+    for copies in args.copies:
+        df = dashboard_frame(copies)
+        index = SearchIndex()
+        build_time, _ = timed(lambda: (index.reset(), index.add_chunks(table_chunks(df))), repeat=1)
+        table.append([len(df), "index build", "", f"{build_time * 1000:.0f}", "", ""])
+
+        for query in QUERIES:
+            filters = (None, None, None, None, None, None, query)
+            scan_time, expected = timed(filter_df, df, filters, repeat=args.repeat)
+            # The first search of a keyword looks it up in the vocabulary, the next ones hit the cache
+            index.cache.clear()
+            first_time, result = timed(filter_df, df, filters, search_index=index)
+            indexed_time, result = timed(filter_df, df, filters, search_index=index, repeat=args.repeat)
+            assert np.array_equal(result.index, expected.index), query
+            table.append([
+                len(df), query, len(result), f"{scan_time * 1000:.1f}", f"{first_time * 1000:.2f}",
+                f"{indexed_time * 1000:.2f}",
+            ])
+
+        # Rows added after the index was built are searched in their text
+        extended = pd.concat([df, dashboard_frame(1).set_axis(pd.RangeIndex(len(df) + 1, len(df) + 1 + len(dashboard_frame(1)), name="id"))])
+        filters = (None, None, None, None, None, None, "incendie")
+        assert np.array_equal(filter_df(extended, filters, search_index=index).index, filter_df(extended, filters).index)
+
+    print_table(["rows", "keywords", "matches", "scan (ms)", "index, first (ms)", "index, cached (ms)"], table)
+    print("Results are identical.")
@@ -0,0 +1,165 @@
+"""
+Offline labelisation benchmark: drives TextLabelisation and PDFLabelisation over
+the articles of front/data/reportings-*.csv against the local Bedrock stub.
+
+    python benchmarks/bench_labeling.py --latency lognormal:800,0.4 --error-rate 0.01 \
+        --concurrency 1 4 16
+
+Reports the throughput for each concurrency level and the per-article overhead
+spent outside the model call (prompt build, __parse_response__, JSON handling).
+Record real responses once with `--record responses.jsonl` (calls AWS, and stops
+at the first failed call), then replay them with `--replay responses.jsonl`.
+The PDFs read by PDFLabelisation are generated from the article texts.
+"""
+import io
+import os
+import json
+import time
+import argparse
+from glob import glob
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pandas as pd
+from botocore.exceptions import ClientError
+
+from common import ROOT_PATH, load_module, load_nova_module, print_table, timed
+from bedrock_stub import RecordingBedrockClient, StubBedrockClient, StubS3Client, text_to_pdf
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+mistral = load_module("mistral_lambda", "lambda/Mistral/lambda-function.py")
+nova = load_nova_module()
+
+MISTRAL_MODEL = "mistral.mistral-large-2402-v1:0"
+NOVA_MODEL = "us.amazon.nova-lite-v1:0"
+
+
+def load_articles(pattern: str) -> list:
+    """Articles of the reportings, shaped as the messages sent by the Nova lambda."""
+    frames = [pd.read_csv(path, sep=';') for path in sorted(glob(str(ROOT_PATH / pattern)))]
+    df = pd.concat(frames, ignore_index=True).fillna('')
+    return [
+        {
+            "date": row["Date"],
+            "territoire": row["Territoire"],
+            "sujet": row["Sujet"],
+            "nb_articles": 1,
+            "media": row["Média"],
+            "article": row["Articles"],
+        }
+        for _, row in df.iterrows()
+    ]
+
+
+def run(forward, inputs: list, concurrency: int, strict: bool = False) -> tuple:
+    """
+    Runs `forward` over the inputs and returns (wall seconds, failed calls).
+    With `strict`, a failed call raises instead of being counted.
+    """
+    def safe_forward(value):
+        try:
+            forward(value)
+            return 0
+        except ClientError:
+            if strict:
+                raise
+            return 1
+
+    start = time.perf_counter()
+    # The lambdas print their records: keep them out of the report
+    with redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            failures = sum(executor.map(safe_forward, inputs))
+    return time.perf_counter() - start, failures
+
+
+def make_text_labelisation(client):
+    labelisation = mistral.TextLabelisation(None, None, MISTRAL_MODEL)
+    labelisation.bedrock = client
+    return labelisation
+
+
+def make_pdf_labelisation(client, articles):
+    labelisation = nova.PDFLabelisation(None, None, NOVA_MODEL, articles[0]["article"])
+    labelisation.bedrock = client
+    # Each article is served as a PDF, as the Nova lambda reads them from S3
+    labelisation.s3_client = StubS3Client({f"input/article{i}.pdf": text_to_pdf(article["article"]) for i, article in enumerate(articles)})
+    return labelisation
+
+
+def overhead_breakdown(articles: list, repeat: int = 20) -> list:
+    """Cost of each step outside the model call, in microseconds per article."""
+    labelisation = make_text_labelisation(StubBedrockClient())
+    response = labelisation.bedrock.converse(
+        modelId=MISTRAL_MODEL,
+        messages=[{"role": "user", "content": [{"text": ""}]}],
+        toolConfig={"tools": labelisation.__getTool__()},
+    )
+    bodies = [json.dumps(article) for article in articles]
+
+    def build_prompts():
+        for article in articles:
+            labelisation.__create_content__(article)
+
+    def parse_responses():
+        for _ in articles:
+            labelisation.__factuel_treshold__(labelisation.__parse_response__(json.loads(json.dumps(response))))
+
+    def json_handling():
+        for body in bodies:
+            json.dumps(json.loads(body) | {"sentiment": "NEUTRAL", "factuel": True, "theme": "reseau", "nuance": False})
+
+    steps = [("prompt build", build_prompts), ("__parse_response__", parse_responses), ("SQS/SQL JSON handling", json_handling)]
+    return [[name, f"{timed(step, repeat=repeat)[0] / len(articles) * 1e6:.1f}"] for name, step in steps]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reportings", default="front/data/reportings-*.csv")
+    parser.add_argument("--latency", default="lognormal:800,0.4", help="stub latency distribution, in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--replay", help="JSON lines file of recorded responses")
+    parser.add_argument("--record", help="calls Bedrock and records its responses to this file")
+    args = parser.parse_args()
+
+    articles = load_articles(args.reportings)
+    paths = [f"input/article{i}.pdf" for i in range(len(articles))]
+    print(f"{len(articles)} articles")
+
+    if args.record:
+        client = RecordingBedrockClient(boto3.client("bedrock-runtime"), args.record)
+        # A failed call would leave a hole in the recordings: stop on it
+        run(make_text_labelisation(client).forward, articles, 1, strict=True)
+        run(make_pdf_labelisation(client, articles).forward, paths, 1, strict=True)
+        print(f"Responses recorded to {args.record}")
+        return
+
+    rows = []
+    for stage, make, inputs in [
+        ("TextLabelisation", make_text_labelisation, articles),
+        ("PDFLabelisation", lambda client: make_pdf_labelisation(client, articles), paths),
+    ]:
+        for concurrency in args.concurrency:
+            client = StubBedrockClient(latency_ms=args.latency, recordings=args.replay, error_rate=args.error_rate)
+            labelisation = make(client)
+            elapsed, failures = run(labelisation.forward, inputs, concurrency)
+            # Time of the workers outside the stubbed model call
+            overhead = (elapsed * min(concurrency, len(inputs)) - client.waited_seconds) / len(inputs)
+            rows.append([
+                stage,
+                concurrency,
+                f"{len(inputs) / elapsed:.1f}",
+                f"{client.waited_seconds / len(inputs) * 1000:.0f}",
+                f"{max(overhead, 0) * 1000:.2f}",
+                failures,
+            ])
+
+    print_table(["stage", "concurrency", "articles/s", "model ms/article", "overhead ms/article", "failures"], rows)
+    print()
+    print_table(["step (zero-latency stub)", "µs/article"], overhead_breakdown(articles))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compares the cleaned CSV with the partitioned Parquet dataset written by
+utils/cleaning_dataset.py: size on disk and read time of the whole dataset, of a
+few columns and of a date range. The repository's data/Data_cleaned.csv is
+repeated `--copies` times to get a larger dataset:
+
+    python benchmarks/bench_parquet.py --copies 1 100
+"""
+import os
+import argparse
+import tempfile
+
+import pandas as pd
+
+from common import ROOT_PATH, load_module, print_table, timed
+
+cleaning = load_module("cleaning_dataset", "utils/cleaning_dataset.py")
+
+COLUMNS = ["date", "theme", "sentiment"]
+
+
+def disk_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def read_csv_range(path: str, start_date: str, end_date: str) -> pd.DataFrame:
+    df = pd.read_csv(path, parse_dates=["date"])
+    return df[(df["date"] >= start_date) & (df["date"] <= end_date)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 100])
+    parser.add_argument("--start-date", default="2024-01-01")
+    parser.add_argument("--end-date", default="2024-03-31")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cleaned = pd.read_csv(ROOT_PATH / "data/Data_cleaned.csv")
+    table = []
+    with tempfile.TemporaryDirectory() as folder:
+        for copies in args.copies:
+            df = pd.concat([cleaned] * copies, ignore_index=True)
+            csv_path = os.path.join(folder, f"cleaned_{copies}.csv")
+            parquet_path = os.path.join(folder, f"cleaned_{copies}.parquet")
+            df.to_csv(csv_path, index=False)
+            cleaning.write_cleaned_parquet(df, parquet_path)
+
+            reads = [
+                (
+                    "all columns",
+                    lambda: pd.read_csv(csv_path, parse_dates=["date"]),
+                    lambda: cleaning.read_cleaned_parquet(parquet_path),
+                ),
+                (
+                    f"{len(COLUMNS)} columns",
+                    lambda: pd.read_csv(csv_path, usecols=COLUMNS, parse_dates=["date"]),
+                    lambda: cleaning.read_cleaned_parquet(parquet_path, columns=COLUMNS),
+                ),
+                (
+                    "date range",
+                    lambda: read_csv_range(csv_path, args.start_date, args.end_date),
+                    lambda: cleaning.read_cleaned_parquet(
+                        parquet_path, start_date=args.start_date, end_date=args.end_date
+                    ),
+                ),
+            ]
+            for name, read_csv, read_parquet in reads:
+                csv_time, csv_df = timed(read_csv, repeat=args.repeat)
+                parquet_time, parquet_df = timed(read_parquet, repeat=args.repeat)
+                assert len(csv_df) == len(parquet_df)
+                table.append([
+                    len(df), name, len(csv_df), f"{csv_time * 1000:.1f}", f"{parquet_time * 1000:.1f}",
+                    f"{csv_time / parquet_time:.1f}x",
+                ])
+            table.append([
+                len(df), "size (MB)", "", f"{disk_size(csv_path) / 1e6:.2f}", f"{disk_size(parquet_path) / 1e6:.2f}",
+                f"{disk_size(csv_path) / disk_size(parquet_path):.1f}x",
+            ])
+
+    print_table(["rows", "read", "rows read", "CSV (ms)", "Parquet (ms)", "ratio"], table)
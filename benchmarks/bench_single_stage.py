@@ -0,0 +1,109 @@
+"""
+Compares the latency and the cost of the two-stage labelisation (Nova metadata,
+SQS hop, Mistral sentiment) with the single-stage mode, using stubbed model
+responses:
+
+    python benchmarks/bench_single_stage.py --articles 50 --nova-latency 1500 \
+        --mistral-latency 4000 --single-latency 4500 --queue-latency 300
+"""
+import os
+import json
+import time
+import argparse
+
+from common import load_module, load_nova_module, print_table
+from bedrock_stub import StubBedrockClient, StubS3Client
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+mistral = load_module("mistral_lambda", "lambda/Mistral/lambda-function.py")
+
+nova = load_nova_module()
+
+ARTICLE_TEXT = (
+    "Suite à une panne, 179 foyers privés de courant. Dimanche soir, une avarie sur un câble "
+    "souterrain a privé d'électricité plusieurs rues de Lille. Les équipes d'Enedis sont "
+    "intervenues dans la nuit et le courant a été rétabli au petit matin. "
+) * 20
+
+# Price in dollars per 1000 input and output tokens
+PRICES = {
+    "us.amazon.nova-lite-v1:0": (0.00006, 0.00024),
+    "mistral.mistral-large-2402-v1:0": (0.004, 0.012),
+}
+
+
+def cost(calls):
+    return sum(
+        call["usage"]["inputTokens"] / 1000 * PRICES[call["modelId"]][0]
+        + call["usage"]["outputTokens"] / 1000 * PRICES[call["modelId"]][1]
+        for call in calls
+    )
+
+
+def two_stage(n_articles, nova_latency, mistral_latency, queue_latency):
+    pdf_labelisation = nova.PDFLabelisation(None, None, "us.amazon.nova-lite-v1:0", ARTICLE_TEXT)
+    pdf_labelisation.s3_client = StubS3Client(default=ARTICLE_TEXT.encode())
+    pdf_labelisation.bedrock = StubBedrockClient(latency_ms=nova_latency)
+    text_labelisation = mistral.TextLabelisation(None, None, "mistral.mistral-large-2402-v1:0")
+    text_labelisation.bedrock = StubBedrockClient(latency_ms=mistral_latency)
+    helper = mistral.Helper(rds=None)
+
+    rows = []
+    for i in range(n_articles):
+        article = json.loads(pdf_labelisation.forward(f"input/article{i}.pdf"))["body"]
+        time.sleep(queue_latency / 1000)  # NOVA2Mistral queue hop
+        rows.append(helper.merge_dict(article, text_labelisation.forward(article)))
+    return rows, pdf_labelisation.bedrock.calls + text_labelisation.bedrock.calls
+
+
+def single_stage(n_articles, single_latency):
+    labelisation = mistral.SingleStageLabelisation(None, None, "mistral.mistral-large-2402-v1:0")
+    labelisation.bedrock = StubBedrockClient(latency_ms=single_latency)
+
+    rows = [
+        labelisation.forward({"path": f"input/article{i}.pdf", "text": ARTICLE_TEXT})
+        for i in range(n_articles)
+    ]
+    return rows, labelisation.bedrock.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20)
+    parser.add_argument("--nova-latency", type=float, default=1500, help="ms per Nova call")
+    parser.add_argument("--mistral-latency", type=float, default=4000, help="ms per Mistral call")
+    parser.add_argument("--single-latency", type=float, default=4500, help="ms per single-stage call")
+    parser.add_argument("--queue-latency", type=float, default=300, help="ms per SQS hop")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    two_stage_rows, two_stage_calls = two_stage(args.articles, args.nova_latency, args.mistral_latency, args.queue_latency)
+    two_stage_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single_stage_rows, single_stage_calls = single_stage(args.articles, args.single_latency)
+    single_stage_time = time.perf_counter() - start
+
+    # With the same stubbed answers, both modes must write the same row
+    assert single_stage_rows[0] == two_stage_rows[0], (single_stage_rows[0], two_stage_rows[0])
+
+    print_table(
+        ["mode", "calls", "s/article", "tokens/article", "$/1000 articles"],
+        [
+            [
+                name,
+                len(calls),
+                f"{elapsed / args.articles:.2f}",
+                sum(call["usage"]["totalTokens"] for call in calls) // args.articles,
+                f"{cost(calls) / args.articles * 1000:.2f}",
+            ]
+            for name, elapsed, calls in [
+                ("two-stage", two_stage_time, two_stage_calls),
+                ("single-stage", single_stage_time, single_stage_calls),
+            ]
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmarks the SQL writes of the Mistral lambda against a local MySQL-compatible
+server, for instance:
+
+    docker run -d -p 3306:3306 -e MARIADB_ROOT_PASSWORD=root -e MARIADB_DATABASE=bench mariadb
+    RDS_ENDPOINT=127.0.0.1 RDS_PORT=3306 RDS_USER=root RDS_PASSWORD=root RDS_DBNAME=bench \
+        python benchmarks/bench_sql_insert.py --rows 2000 --batch-size 10
+
+Compares the former one-connection-per-row insert with the pooled connection and
+the batched upsert of `Helper`.
+"""
+import os
+import argparse
+import time
+
+import pymysql
+
+from common import load_module, print_table
+
+os.environ.setdefault("RDS_TABLE_NAME", "bench_reportings")
+mistral = load_module("mistral_lambda", "lambda/Mistral/lambda-function.py")
+
+
+def create_table(helper):
+    table_name = os.environ["RDS_TABLE_NAME"]
+    db = helper.__connection__()
+    with db.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+        cursor.execute(
+            f"""
+            CREATE TABLE {table_name} (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                date VARCHAR(10), territoire VARCHAR(255), sujet VARCHAR(255),
+                theme VARCHAR(255), nb_articles INT, media VARCHAR(255), article TEXT,
+                nuance BOOLEAN, sentiment VARCHAR(10), factuel BOOLEAN,
+                UNIQUE KEY natural_key (date, media, sujet)
+            )
+            """
+        )
+    db.commit()
+
+
+def make_rows(n, offset=0):
+    return [
+        {
+            "date": "2024-01-01",
+            "territoire": "nord",
+            "sujet": f"Article {offset + i}",
+            "nb_articles": 1,
+            "media": "La Voix du Nord",
+            "article": "Une coupure d'électricité a touché le quartier. " * 40,
+            "sentiment": "NEUTRAL",
+            "factuel": True,
+            "theme": "reseau",
+            "nuance": False,
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_insert(helper, rows):
+    """The former send_to_SQL: connect, insert one row, commit and close."""
+    database = helper.__database_information__()
+    table_name = os.environ["RDS_TABLE_NAME"]
+    for row in rows:
+        db = pymysql.connect(
+            host=database["ENDPOINT"],
+            user=database["USER"],
+            password=database["PASSWORD"],
+            port=database["PORT"],
+            database=database["DBNAME"],
+        )
+        columns = ", ".join(row.keys())
+        placeholders = ", ".join(["%s"] * len(row))
+        cursor = db.cursor()
+        cursor.execute(f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})", tuple(row.values()))
+        db.commit()
+        cursor.close()
+        db.close()
+
+
+def pooled_insert(helper, rows):
+    for row in rows:
+        helper.send_to_SQL(row)
+
+
+def batched_insert(helper, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        helper.send_batch_to_SQL(rows[start:start + batch_size])
+
+
+def count_rows(helper):
+    db = helper.__connection__()
+    with db.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {os.environ['RDS_TABLE_NAME']}")
+        return cursor.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=10, help="SQS batch size")
+    args = parser.parse_args()
+
+    helper = mistral.Helper(rds=None)
+    modes = [
+        ("connection per row", lambda rows: legacy_insert(helper, rows)),
+        ("pooled connection", lambda rows: pooled_insert(helper, rows)),
+        (f"pooled + batch of {args.batch_size}", lambda rows: batched_insert(helper, rows, args.batch_size)),
+    ]
+
+    results = []
+    for offset, (name, insert) in enumerate(modes):
+        create_table(helper)
+        rows = make_rows(args.rows, offset * args.rows)
+        start = time.perf_counter()
+        insert(rows)
+        elapsed = time.perf_counter() - start
+        results.append([name, f"{elapsed:.2f}", f"{args.rows / elapsed:.0f}"])
+
+    # Redelivering the same batch must not duplicate rows
+    batched_insert(helper, rows, args.batch_size)
+    duplicates = count_rows(helper) - args.rows
+
+    print_table(["mode", "seconds", "rows/s"], results)
+    print(f"Duplicated rows after redelivery: {duplicates}")
+
+
+if __name__ == "__main__":
+    main()
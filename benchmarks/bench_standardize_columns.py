@@ -0,0 +1,97 @@
+"""
+Benchmarks the value standardization of the dashboard (front/utils/load_and_clean_df.py)
+against the former cell by cell implementation kept below, and checks that both
+produce the same values. The columns of data/Data_cleaned.csv are repeated
+`--copies` times, with case, accent and punctuation variants of their values:
+
+    python benchmarks/bench_standardize_columns.py --copies 1 10 100
+"""
+import re
+import sys
+import argparse
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from common import ROOT_PATH, print_table, timed
+
+sys.path.insert(0, str(ROOT_PATH / "front"))
+from utils.load_and_clean_df import standardize_columns  # noqa: E402
+from utils.shared_utils import normalize_text  # noqa: E402
+
+COLUMNS = {"territoire": "Territoire", "theme": "Thème", "media": "Média"}
+
+# ----------------- Former implementation -----------------
+
+
+def former_normalize_text(text, keep_alphanum=False):
+    if pd.notna(text):
+        text = str(text).lower().strip()
+        normalized_text = ''.join(
+            c for c in unicodedata.normalize('NFD', text)
+            if unicodedata.category(c) != 'Mn'
+        )
+        if keep_alphanum:
+            normalized_text = re.sub(r'[^a-zA-Z0-9]', '', normalized_text)
+        return normalized_text
+    return text
+
+
+def former_standardize_columns(df: pd.DataFrame, columns_to_fix: list) -> pd.DataFrame:
+    for col in columns_to_fix:
+        df[f"{col}_normalized"] = df[col].apply(lambda x: former_normalize_text(x, keep_alphanum=True))
+        most_frequent_mapping = (
+            df.groupby(f"{col}_normalized")[col]
+            .agg(lambda x: x.mode()[0])
+            .to_dict()
+        )
+        df[col] = df[f"{col}_normalized"].map(most_frequent_mapping)
+        df = df.drop(columns=[f"{col}_normalized"])
+    return df
+
+# ----------------- Data -----------------
+
+
+def variant(value, rng):
+    """A spelling of the value that normalizes to the same text."""
+    if not isinstance(value, str):
+        return value
+    return rng.choice([value, value.upper(), f" {value.lower()} ", value.replace(" ", "-"), value + "."])
+
+
+def dashboard_columns(copies: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.read_csv(ROOT_PATH / "data/Data_cleaned.csv", usecols=list(COLUMNS)).rename(columns=COLUMNS)
+    df = pd.concat([df] * copies, ignore_index=True)
+    # One row in twenty gets another spelling
+    for column in COLUMNS.values():
+        noisy = rng.random(len(df)) < 0.05
+        df.loc[noisy, column] = [variant(value, rng) for value in df.loc[noisy, column]]
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Accents of the whole Latin-1 and Latin Extended-A ranges, one character at a time
+    characters = [chr(code) for code in range(0x20, 0x250)]
+    assert [normalize_text(c) for c in characters] == [former_normalize_text(c) for c in characters]
+
+    table = []
+    columns = list(COLUMNS.values())
+    for copies in args.copies:
+        df = dashboard_columns(copies)
+        former_time, expected = timed(lambda: former_standardize_columns(df.copy(), columns), repeat=args.repeat)
+        vectorised_time, result = timed(lambda: standardize_columns(df.copy(), columns), repeat=args.repeat)
+        pd.testing.assert_frame_equal(result, expected)
+        table.append([
+            len(df), sum(df[column].nunique() for column in columns), f"{former_time * 1000:.0f}",
+            f"{vectorised_time * 1000:.1f}", f"{former_time / vectorised_time:.0f}x",
+        ])
+
+    print_table(["rows", "distinct values", "cell by cell (ms)", "distinct values only (ms)", "speedup"], table)
+    print("Outputs are identical.")
@@ -0,0 +1,86 @@
+"""
+Benchmarks the word cloud of the dashboard: counting the words of the joined text
+of the filtered rows at each filter change, as WordCloud.generate does, against
+summing the rows of the document-term matrix of front/utils/term_counts.py. The
+word frequencies of both are checked to be identical (without collocations). The
+data of data/Data_cleaned.csv is repeated `--copies` times:
+
+    python benchmarks/bench_wordcloud.py --copies 1 10
+"""
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+from nltk.corpus import stopwords
+from wordcloud import WordCloud
+
+from common import ROOT_PATH, print_table, timed
+
+sys.path.insert(0, str(ROOT_PATH / "front"))
+from utils.term_counts import TermCounts  # noqa: E402
+
+FRENCH_STOP_WORDS = set(stopwords.words('french'))
+
+
+def dashboard_frame(copies: int) -> pd.DataFrame:
+    """The dashboard data with the article bodies, indexed by id."""
+    df = pd.read_csv(ROOT_PATH / "data/Data_cleaned.csv")
+    df = pd.concat([df] * copies, ignore_index=True)
+    df.index = pd.RangeIndex(1, len(df) + 1, name="id")
+    return df.rename(columns={"sujet": "Sujet", "article": "Article", "theme": "Thème"})[["Sujet", "Article", "Thème"]]
+
+
+def table_chunks(df: pd.DataFrame, chunk_size: int = 5000):
+    """Chunks as streamed from the table by stream_table_chunks."""
+    rows = df.reset_index().rename(columns={"Sujet": "sujet", "Article": "article"})
+    for start in range(0, len(rows), chunk_size):
+        yield rows.iloc[start:start + chunk_size]
+
+
+def text_frequencies(filtered_df: pd.DataFrame) -> dict:
+    """Word frequencies of the joined text of the rows, as counted by WordCloud.generate."""
+    text = ' '.join(filtered_df['Sujet'].dropna().tolist() + filtered_df['Article'].dropna().tolist())
+    return WordCloud(stopwords=FRENCH_STOP_WORDS, collocations=False).process_text(text)
+
+
+def lowercase(frequencies: dict) -> dict:
+    # Ties between the cases of a word depend on the order of the words
+    return {word.lower(): count for word, count in frequencies.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    table = []
+    for copies in args.copies:
+        df = dashboard_frame(copies)
+        term_counts = TermCounts(FRENCH_STOP_WORDS)
+        build_time, _ = timed(lambda: (term_counts.reset(), term_counts.add_chunks(table_chunks(df))), repeat=1)
+        table.append([len(df), "matrix build", "", f"{build_time * 1000:.0f}", ""])
+
+        themes = df['Thème'].value_counts().index
+        scenarios = [
+            ("all rows", df),
+            ("1 theme", df[df['Thème'] == themes[0]]),
+            ("1 rare theme", df[df['Thème'] == themes[-1]]),
+            ("random 10%", df.sample(frac=0.1, random_state=0)),
+        ]
+        for name, filtered_df in scenarios:
+            text_time, expected = timed(text_frequencies, filtered_df, repeat=args.repeat)
+            matrix_time, result = timed(term_counts.frequencies, filtered_df.index, repeat=args.repeat)
+            assert lowercase(result) == lowercase(expected), name
+            table.append([
+                len(df), name, len(filtered_df), f"{text_time * 1000:.1f}", f"{matrix_time * 1000:.1f}",
+            ])
+
+        # Rows not counted yet are counted from their text
+        extended = pd.concat([df, dashboard_frame(1).set_axis(pd.RangeIndex(len(df) + 1, len(df) + 1 + len(dashboard_frame(1)), name="id"))])
+        fetch_texts = lambda ids: (extended['Sujet'].loc[ids].fillna('') + ' ' + extended['Article'].loc[ids].fillna('')).tolist()
+        assert lowercase(term_counts.frequencies(extended.index, fetch_texts)) == lowercase(text_frequencies(extended))
+
+    print_table(["rows", "filtered rows", "matches", "joined text (ms)", "term counts (ms)"], table)
+    print("Frequencies are identical.")
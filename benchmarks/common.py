@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import importlib.util
+from pathlib import Path
+from contextlib import contextmanager
+
+ROOT_PATH = Path(__file__).parent.parent.absolute()
+
+
+def load_module(name: str, relative_path: str):
+    """
+    Loads a module from its path in the repository. Lambda folders are deployed
+    standalone, so their folder is added to the path for their sibling imports.
+    """
+    path = ROOT_PATH / relative_path
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def load_nova_module():
+    """Loads nova_llm.py, whose location lookup reads its city file from the lambda folder."""
+    with working_directory(ROOT_PATH / "lambda/Nova"):
+        return load_module("nova_llm", "lambda/Nova/nova_llm.py")
+
+
+def timed(function, *args, repeat: int = 1, **kwargs) -> tuple:
+    """Runs a function `repeat` times and returns (best time in seconds, last result)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def print_table(headers: list, rows: list) -> None:
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    print('  '.join(str(header).ljust(width) for header, width in zip(headers, widths)))
+    for row in rows:
+        print('  '.join(str(value).ljust(width) for value, width in zip(row, widths)))
@@ -2,6 +2,7 @@ import os
 import sys
 import json
 import dash
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from flask import Flask, request, jsonify
@@ -9,6 +10,7 @@ from threading import Lock
 
 from dash import Dash, dcc, html, dash_table
 from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 
 import nltk
@@ -19,14 +21,27 @@ PROJECT_PATH = Path(__file__).parent.absolute()
 sys.path.append(str(PROJECT_PATH))
 
 # Import your project utilities and assets
-from utils.load_and_clean_df import clean_data, fetch_table_as_df
+from utils.load_and_clean_df import clean_data, fetch_articles, fetch_table_state, stream_table_as_df, stream_table_chunks
+from utils.data_store import ArticleStore, DataStore
+from utils.snapshot import SnapshotRefresh, load_with_snapshot
+from utils.search_index import SearchIndex, sync_search_index
+from utils.term_counts import TermCounts, frequency_fingerprint, sync_term_counts
 from utils.import_export import import_uploaded_pdf_to_s3, export_table_to_excel
-from utils.dash_filtering import create_accordion_item, filter_df, summary_filter
+from utils.dash_filtering import create_accordion_item, dropdown_options, filter_df, summary_filter
+from utils.filter_engine import filter_engine_for
+from utils.result_cache import LRUResultBackend, data_version, result_cache_from_env, result_key
+from utils.map_geometry import simplify_geojson
 from utils.dash_figures import (
+    WORDCLOUD_MAX_WORDS,
+    figure_patch,
     create_combined_pie_bar_chart,
+    combined_pie_bar_chart_updates,
     create_sentiment_trend_area,
+    sentiment_trend_area_updates,
     create_geographic_distribution_map,
-    create_wordcloud
+    geographic_distribution_map_updates,
+    create_wordcloud,
+    wordcloud_updates
 )
 import assets.css.styles as myCSS
 
@@ -43,15 +58,32 @@ DATA_GRID = [
 
 DEBUG_MODE = True
 
+# Columns held in memory, the article bodies are fetched on demand
+LIGHT_COLUMNS = ['id', 'date', 'territoire', 'sujet', 'theme', 'nb_articles', 'media', 'nuance', 'sentiment', 'factuel']
+SEARCHABLE_COLUMNS = ['id', 'sujet', 'article']
+ARTICLE_CACHE_SIZE = 2000
+
+# Local copy of the cleaned data, reused at startup while the table is unchanged
+SNAPSHOT_PATH = os.getenv("DASHBOARD_SNAPSHOT_PATH", os.path.join(PROJECT_PATH, 'data/snapshot/dashboard.parquet'))
+SEARCH_INDEX_PATH = os.getenv("DASHBOARD_SEARCH_INDEX_PATH", os.path.join(PROJECT_PATH, 'data/snapshot/search_index.pkl'))
+TERM_COUNTS_PATH = os.getenv("DASHBOARD_TERM_COUNTS_PATH", os.path.join(PROJECT_PATH, 'data/snapshot/term_counts.pkl'))
+RESULT_CACHE_PATH = os.getenv("DASHBOARD_CACHE_PATH", os.path.join(PROJECT_PATH, 'data/snapshot/dashboard_cache.sqlite'))
+
+# Word cloud images kept per word frequencies
+WORDCLOUD_CACHE_SIZE = 32
+
+# Filter states whose rows are kept for the grid item callbacks
+FILTERED_ROWS_CACHE_SIZE = 8
+
 ##################################################################
 
 # Load data and define parameters regarding the given grid
 grid_items = [item for sublist in DATA_GRID for item in sublist]
 
-# GeoJSON for geographic distribution if needed
+# GeoJSON for geographic distribution if needed, simplified once as it is sent to every browser
 if 'geographic-distribution' in grid_items:
     with open(os.path.join(PROJECT_PATH, 'assets/geojson/france-departements.geojson'), 'r') as geojson_file:
-        FRANCE_GEOJSON = json.load(geojson_file)
+        FRANCE_GEOJSON = simplify_geojson(json.load(geojson_file))
 else:
     FRANCE_GEOJSON = None
 
@@ -62,21 +94,164 @@ if 'word-cloud' in grid_items:
 else:
     FRENCH_STOP_WORDS = None
 
+# Static structure of each grid item, sent once with the layout, the callbacks then patch its data
+FIGURE_STRUCTURES = {
+    'combined-pie-chart': lambda: create_combined_pie_bar_chart(myCSS.pie_bar_chart),
+    'geographic-distribution': lambda: create_geographic_distribution_map(style=myCSS.geographic_distribution, geojson=FRANCE_GEOJSON),
+    'sentiment-trend-area': lambda: create_sentiment_trend_area(style=myCSS.sentiment_trend),
+    'word-cloud': lambda: create_wordcloud(style=myCSS.wordcloud),
+}
+
 ######################
 ## I- LOAD CSV DATA ##
 ######################
 
-# Fetch data from the database
-df = fetch_table_as_df(
-    host=os.getenv("RDS_HOST_READ"),
-    user=os.getenv("RDS_USER"),
-    password=os.getenv("RDS_PASSWORD"),
-    db_name=os.getenv("RDS_DB"),
-    table_name=os.getenv("RDS_TABLE")
+def load_dashboard_data() -> pd.DataFrame:
+    # Stream data from the database
+    df = stream_table_as_df(
+        host=os.getenv("RDS_HOST_READ"),
+        user=os.getenv("RDS_USER"),
+        password=os.getenv("RDS_PASSWORD"),
+        db_name=os.getenv("RDS_DB"),
+        table_name=os.getenv("RDS_TABLE"),
+        columns=LIGHT_COLUMNS
+    )
+
+    # Clean the data (e.g., standardize column names, modify values)
+    return clean_data(df)
+
+def load_new_dashboard_data(last_id: int, current_df: pd.DataFrame) -> pd.DataFrame:
+    # Stream the rows added since the last load only
+    df = stream_table_as_df(
+        host=os.getenv("RDS_HOST_READ"),
+        user=os.getenv("RDS_USER"),
+        password=os.getenv("RDS_PASSWORD"),
+        db_name=os.getenv("RDS_DB"),
+        table_name=os.getenv("RDS_TABLE"),
+        columns=LIGHT_COLUMNS,
+        min_id=last_id
+    )
+    if df.empty:
+        return None
+
+    # Clean them with the standardized values already displayed
+    return clean_data(df, reference=current_df)
+
+def fetch_dashboard_table_state(last_id: int = None) -> tuple:
+    # Row count, max id and checksums of the displayed columns
+    return fetch_table_state(
+        host=os.getenv("RDS_HOST_READ"),
+        user=os.getenv("RDS_USER"),
+        password=os.getenv("RDS_PASSWORD"),
+        db_name=os.getenv("RDS_DB"),
+        table_name=os.getenv("RDS_TABLE"),
+        columns=LIGHT_COLUMNS,
+        last_id=last_id
+    )
+
+def load_dashboard_data_with_snapshot() -> pd.DataFrame:
+    return load_with_snapshot(
+        SNAPSHOT_PATH,
+        table_state=fetch_dashboard_table_state,
+        load=load_dashboard_data,
+        load_since=load_new_dashboard_data
+    )
+
+# Saves the refreshed data to the snapshot
+snapshot_refresh = SnapshotRefresh(SNAPSHOT_PATH, fetch_dashboard_table_state, load_new_dashboard_data)
+
+def stream_searchable_rows(min_id: int = None):
+    # Stream the subjects and bodies to index, chunk by chunk
+    return stream_table_chunks(
+        host=os.getenv("RDS_HOST_READ"),
+        user=os.getenv("RDS_USER"),
+        password=os.getenv("RDS_PASSWORD"),
+        db_name=os.getenv("RDS_DB"),
+        table_name=os.getenv("RDS_TABLE"),
+        columns=SEARCHABLE_COLUMNS,
+        min_id=min_id
+    )
+
+def fetch_searchable_table_state(last_id: int = None) -> tuple:
+    # Checksums of the subjects and bodies, they change when an article is re-labelled in place
+    return fetch_table_state(
+        host=os.getenv("RDS_HOST_READ"),
+        user=os.getenv("RDS_USER"),
+        password=os.getenv("RDS_PASSWORD"),
+        db_name=os.getenv("RDS_DB"),
+        table_name=os.getenv("RDS_TABLE"),
+        columns=SEARCHABLE_COLUMNS,
+        last_id=last_id
+    )
+
+# Keyword search index, the rows it does not cover yet are searched in their text
+search_index = SearchIndex()
+
+def prepare_search_index(df: pd.DataFrame) -> None:
+    # Start from the saved index, then index the rows added since
+    search_index.restore(SEARCH_INDEX_PATH)
+    update_search_index(df)
+
+def update_search_index(df: pd.DataFrame) -> None:
+    if sync_search_index(search_index, df, stream_searchable_rows, fetch_searchable_table_state):
+        search_index.save(SEARCH_INDEX_PATH)
+
+# Word counts of each article for the word cloud, the rows not counted yet are counted from their text
+term_counts = TermCounts(FRENCH_STOP_WORDS) if 'word-cloud' in grid_items else None
+
+def prepare_term_counts(df: pd.DataFrame) -> None:
+    if term_counts is not None:
+        term_counts.restore(TERM_COUNTS_PATH)
+        update_term_counts(df)
+
+def update_term_counts(df: pd.DataFrame) -> None:
+    if term_counts is not None and sync_term_counts(term_counts, df, stream_searchable_rows):
+        term_counts.save(TERM_COUNTS_PATH)
+
+# Grid items cached per filters and data version (see DASHBOARD_CACHE_* variables)
+result_cache = result_cache_from_env(RESULT_CACHE_PATH)
+
+def warm_default_view(df: pd.DataFrame) -> None:
+    if result_cache is not None:
+        result_cache.invalidate(df)
+        filters = default_filters(df)
+        key = result_key(data_version(df), filters)
+        # Built in the loading thread, before the first users open the default view. One after
+        # the other: the word cloud takes most of the time and holds the GIL, a thread pool does not help
+        for item in grid_items:
+            cached_item(item, df, filters, key)
+
+def prepare_dashboard_data(df: pd.DataFrame) -> None:
+    warm_default_view(df)
+    prepare_search_index(df)
+    prepare_term_counts(df)
+
+def update_local_copies(df: pd.DataFrame) -> None:
+    snapshot_refresh.save(df)
+    update_search_index(df)
+    update_term_counts(df)
+    warm_default_view(df)
+
+# Data loaded in a background thread, the layout is served meanwhile
+data_store = DataStore(
+    load_dashboard_data_with_snapshot,
+    snapshot_refresh.load_since,
+    on_update=update_local_copies,
+    on_load=prepare_dashboard_data
 )
 
-# Clean the data (e.g., standardize column names, modify values)
-df = clean_data(df)
+# Article bodies, fetched for the visible table page, the keyword search and the exports
+article_store = ArticleStore(
+    lambda ids: fetch_articles(
+        host=os.getenv("RDS_HOST_READ"),
+        user=os.getenv("RDS_USER"),
+        password=os.getenv("RDS_PASSWORD"),
+        db_name=os.getenv("RDS_DB"),
+        table_name=os.getenv("RDS_TABLE"),
+        ids=ids
+    ),
+    max_size=ARTICLE_CACHE_SIZE
+)
 
 ##########################
 ## II- DASH APPLICATION ##
@@ -97,11 +272,12 @@ dash_app._favicon = "img/enedis-favicon.ico"
 pdf_import_status = {"imported": 0}  # 0: Default, 1: Importing, 2: Import Done
 pdf_import_lock = Lock()
 
-# Route to update PDF import status
+# Route to update PDF import status, the new labelled articles are loaded in the background
 @server.route('/update-pdf-status', methods=['POST'])
 def update_pdf_status():
     with pdf_import_lock:
         pdf_import_status["imported"] = 2
+    data_store.refresh_async()
     return jsonify({"status": "success"})
 
 ##############################
@@ -119,7 +295,7 @@ def generate_grid_layout(grid):
     for row in grid:
         cols = []
         for graph_id in row:
-            cols.append(dbc.Col(dcc.Graph(id=graph_id, style=myCSS.container), width=6))
+            cols.append(dbc.Col(dcc.Graph(id=graph_id, figure=FIGURE_STRUCTURES[graph_id](), style=myCSS.container), width=6))
         grid_layout.append(dbc.Row(cols, className='mb-4'))
     return grid_layout
 
@@ -151,6 +327,18 @@ dash_app.layout = dbc.Container([
     dcc.Store(id='pdf-import-store', data={'imported': 0}),
     dcc.Interval(id='poll-interval', interval=1000, n_intervals=0),
 
+    # Filters and key of the displayed rows, shared by the grid item callbacks
+    dcc.Store(id='filter-state'),
+
+    # Data loading state, polled until the background loader is done
+    dcc.Interval(id='data-load-interval', interval=500, n_intervals=0),
+    # Generation of the displayed data, the first load being generation 1
+    dcc.Store(id='data-generation', data=1),
+    html.Div(
+        dbc.Alert([dbc.Spinner(size='sm', spinner_class_name='me-2'), "Chargement des données..."], color='info'),
+        id='data-load-status'
+    ),
+
     # Search Bar for keywords
     dbc.Row([
         dbc.Col(dcc.Input(
@@ -165,16 +353,14 @@ dash_app.layout = dbc.Container([
 
     # Filters Section with various filtering options (Theme, Sentiment, Territory, etc.)
     dbc.Accordion([
-        create_accordion_item(df, title='Thème', id='theme'),
-        create_accordion_item(df, title='Sentiment', id='tonalite', ordered_values=myCSS.pie_bar_chart_colors_keys),
-        create_accordion_item(df, title='Territoire', id='territory'),
-        create_accordion_item(df, title='Média', id='media'),
+        create_accordion_item(None, title='Thème', id='theme'),
+        create_accordion_item(None, title='Sentiment', id='tonalite', ordered_values=myCSS.pie_bar_chart_colors_keys),
+        create_accordion_item(None, title='Territoire', id='territory'),
+        create_accordion_item(None, title='Média', id='media'),
         dbc.AccordionItem([
             html.Label("🕒 Sélectionner une période de temps", className='fw-bold text-secondary'),
             dcc.DatePickerRange(
                 id='date-picker',
-                start_date=df['Date'].min(),
-                end_date=df['Date'].max(),
                 display_format='DD/MM/YYYY',
                 className='form-control',
                 style=myCSS.date_picker_range
@@ -191,10 +377,16 @@ dash_app.layout = dbc.Container([
             html.Button('Exporter Excel', id='export-button', n_clicks=0, className='btn btn-primary')
         ], style={'padding': '10px'}),
         dcc.Download(id="download-dataframe-xlsx"),
+        # Pages and sorting are served by the backend, the browser only receives the displayed page
         dash_table.DataTable(
             id='data-table',
-            columns=[{"name": col, "id": col} for col in df.columns],
+            columns=[],
+            page_current=0,
             page_size=myCSS.data_table['page_size'],
+            page_action='custom',
+            sort_action='custom',
+            sort_mode='single',
+            sort_by=[],
             style_table=myCSS.data_table['style_table'],
             style_header=myCSS.data_table['style_header'],
             style_cell=myCSS.data_table['style_cell'],
@@ -212,33 +404,165 @@ print(pdf_import_status["imported"])
 ## II.b) Callback to Update Visualization ##
 ############################################
 
-# Dynamically generate callback outputs for visualizations
-callback_outputs = []
-for row in DATA_GRID:
-    for graph_id in row:
-        callback_outputs.append(Output(graph_id, 'figure'))
-callback_outputs.extend([
-    Output('data-table', 'data'),
-    Output('theme-title', 'title'),
-    Output('tonalite-title', 'title'),
-    Output('territory-title', 'title'),
-    Output('media-title', 'title'),
-    Output('date-title', 'title')
-])
-callback_inputs = [
-    Input('theme-dropdown', 'value'),
-    Input('tonalite-dropdown', 'value'),
-    Input('territory-dropdown', 'value'),
-    Input('media-dropdown', 'value'),
-    Input('date-picker', 'start_date'),
-    Input('date-picker', 'end_date'),
-    Input('keywords-search', 'value')
-]
+# Callback filling the filters and the table columns once the data is loaded
+@dash_app.callback(
+    [Output('theme-dropdown', 'options'),
+     Output('tonalite-dropdown', 'options'),
+     Output('territory-dropdown', 'options'),
+     Output('media-dropdown', 'options'),
+     Output('date-picker', 'min_date_allowed'),
+     Output('date-picker', 'max_date_allowed'),
+     Output('date-picker', 'start_date'),
+     Output('date-picker', 'end_date'),
+     Output('data-table', 'columns'),
+     Output('data-load-status', 'children'),
+     Output('data-load-interval', 'disabled')],
+    Input('data-load-interval', 'n_intervals'),
+    Input('data-generation', 'data'),
+    State('date-picker', 'end_date'),
+    State('date-picker', 'max_date_allowed')
+)
+def populate_filters(n_intervals, generation, end_date, previous_max_date):
+    df = data_store.get()
+    if df is None:
+        if data_store.error is not None:
+            error = dbc.Alert(f"Erreur lors du chargement des données : {data_store.error}", color='danger')
+            return [dash.no_update] * 9 + [error, True]
+        raise PreventUpdate
+
+    options = [
+        dropdown_options(df, 'Thème'),
+        dropdown_options(df, 'Sentiment', ordered_values=myCSS.pie_bar_chart_colors_keys),
+        dropdown_options(df, 'Territoire'),
+        dropdown_options(df, 'Média'),
+    ]
+    min_date, max_date = df['Date'].min(), df['Date'].max()
+
+    # After a refresh, the selected dates are kept, except an end date at the former
+    # last date, which follows the new articles (usually the most recent ones)
+    if dash.callback_context.triggered_id == 'data-generation':
+        follows_max_date = not end_date or (
+            previous_max_date and pd.Timestamp(end_date).normalize() >= pd.Timestamp(previous_max_date).normalize()
+        )
+        return options + [
+            min_date,
+            max_date,
+            dash.no_update,
+            max_date if follows_max_date else dash.no_update,
+        ] + [dash.no_update] * 3
+
+    return options + [
+        min_date,
+        max_date,
+        min_date,
+        max_date,
+        [{"name": col, "id": col} for col in [*df.columns, 'Article']],
+        None,
+        True,
+    ]
+
+# Filtered rows of the last filter states, shared by the callbacks of the grid items
+filtered_rows_cache = LRUResultBackend(max_size=FILTERED_ROWS_CACHE_SIZE)
+
+def filtered_rows(df: pd.DataFrame, filters: tuple, key: str) -> pd.DataFrame:
+    filtered_df = filtered_rows_cache.get(key)
+    if filtered_df is None:
+        filtered_df = filter_df(df, filters, article_store=article_store, search_index=search_index, filter_engine=filter_engine_for(df)).sort_values(by='Date')
+        filtered_rows_cache.set(key, filtered_df)
+    return filtered_df
+
+# Order of the filtered rows in the table, by date descending unless a column is sorted
+table_order_cache = LRUResultBackend(max_size=FILTERED_ROWS_CACHE_SIZE)
+
+def table_order(filtered_df: pd.DataFrame, sort_by: list, key: str) -> np.ndarray:
+    order_key = f"{key}:{json.dumps(sort_by or [], sort_keys=True)}"
+    order = table_order_cache.get(order_key)
+    if order is None:
+        rows = filtered_df.reset_index()
+        # The article bodies are loaded page by page and cannot be sorted
+        if sort_by and sort_by[0]['column_id'] in rows.columns:
+            rows = rows.sort_values(by=sort_by[0]['column_id'], ascending=sort_by[0]['direction'] == 'asc', kind='stable')
+        else:
+            rows = rows.sort_values(by='Date', ascending=False)
+        order = rows.index.to_numpy()
+        table_order_cache.set(order_key, order)
+    return order
+
+# Table rows with their article bodies
+def table_records(rows_df: pd.DataFrame) -> list:
+    formated_date_df = rows_df.reset_index()
+    formated_date_df['Date'] = formated_date_df['Date'].dt.strftime('%d/%m/%Y')
+    if 'Article' not in formated_date_df.columns:
+        bodies = article_store.get_many(formated_date_df['id'])
+        formated_date_df['Article'] = [bodies.get(int(article_id), '') for article_id in formated_date_df['id']]
+    return formated_date_df.to_dict('records')
+
+# Word cloud images per fingerprint of their word frequencies, shared by the filters giving the same words
+wordcloud_cache = LRUResultBackend(max_size=WORDCLOUD_CACHE_SIZE)
+
+def uncounted_texts(filtered_df: pd.DataFrame, ids: np.ndarray) -> list:
+    articles = article_store.get_series(ids)
+    return [' '.join(text for text in texts if isinstance(text, str)) for texts in zip(filtered_df.loc[ids, 'Sujet'], articles)]
+
+def build_wordcloud(filtered_df: pd.DataFrame):
+    frequencies = term_counts.frequencies(filtered_df.index, lambda ids: uncounted_texts(filtered_df, ids))
+    fingerprint = frequency_fingerprint(frequencies, WORDCLOUD_MAX_WORDS)
+    updates = wordcloud_cache.get(fingerprint)
+    if updates is None:
+        updates = wordcloud_updates(frequencies, style=myCSS.wordcloud)
+        wordcloud_cache.set(fingerprint, updates)
+    return updates
+
+# Data of each grid item, as updates of the traces of its structure, from the filtered rows
+ITEM_BUILDERS = {
+    'combined-pie-chart': lambda filtered_df: combined_pie_bar_chart_updates(filtered_df, myCSS.pie_bar_chart),
+    'geographic-distribution': lambda filtered_df: geographic_distribution_map_updates(filtered_df, style=myCSS.geographic_distribution, geojson=FRANCE_GEOJSON),
+    'sentiment-trend-area': lambda filtered_df: sentiment_trend_area_updates(filtered_df, style=myCSS.sentiment_trend),
+    'word-cloud': build_wordcloud,
+}
+
+# The same filters give the same item until the data is refreshed
+def cached_item(item: str, df: pd.DataFrame, filters: tuple, key: str):
+    if result_cache is None:
+        return ITEM_BUILDERS[item](filtered_rows(df, filters, key))
+
+    # The items are cached as the updates of their traces, not as the figures cached before
+    item_key = f"{key}:{item}:updates"
+    value = result_cache.get(item_key)
+    if value is None:
+        value = ITEM_BUILDERS[item](filtered_rows(df, filters, key))
+        result_cache.set(item_key, value)
+    return value
+
+# Filters of the view every user loads first: no selection and the whole date range
+def default_filters(df: pd.DataFrame) -> tuple:
+    return (None, None, None, None, df['Date'].min(), df['Date'].max(), None)
+
+# Callback resolving the filter state once, each item is then rendered by its own callback
+@dash_app.callback(
+    [Output('filter-state', 'data'),
+     Output('theme-title', 'title'),
+     Output('tonalite-title', 'title'),
+     Output('territory-title', 'title'),
+     Output('media-title', 'title'),
+     Output('date-title', 'title')],
+    [Input('theme-dropdown', 'value'),
+     Input('tonalite-dropdown', 'value'),
+     Input('territory-dropdown', 'value'),
+     Input('media-dropdown', 'value'),
+     Input('date-picker', 'start_date'),
+     Input('date-picker', 'end_date'),
+     Input('keywords-search', 'value'),
+     Input('data-generation', 'data')]
+)
+def update_filter_state(selected_themes, selected_tonalites, selected_territories, selected_medias, start_date, end_date, keywords, generation):
+    df = data_store.get()
+    if df is None:
+        raise PreventUpdate
 
-# Callback function to update the visualizations based on filter inputs
-@dash_app.callback(callback_outputs, callback_inputs)
-def update_visualizations(selected_themes, selected_tonalites, selected_territories, selected_medias, start_date, end_date, keywords):
-    filtered_df = filter_df(df, (selected_themes, selected_tonalites, selected_territories, selected_medias, start_date, end_date, keywords)).sort_values(by='Date')
+    filters = (selected_themes, selected_tonalites, selected_territories, selected_medias, start_date, end_date, keywords)
+    key = result_key(data_version(df), filters)
+    filtered_rows(df, filters, key)
 
     # Filters summary
     theme_summary = summary_filter('Thème', selected_themes)
@@ -250,50 +574,78 @@ def update_visualizations(selected_themes, selected_tonalites, selected_territor
     end_date_str = pd.to_datetime(end_date).strftime('%d/%m/%Y')
     date_summary = f"📅 Filtrer par Date: {start_date_str} - {end_date_str}" if start_date and end_date else "📅 Filtrer par Date"
 
-    # Table data
-    formated_date_df = filtered_df.reset_index().sort_values(by='Date', ascending=False)
-    formated_date_df['Date'] = formated_date_df['Date'].dt.strftime('%d/%m/%Y')
-    table_data = formated_date_df.to_dict('records')
-
-    # Generate figures for the grid items 
-    figures = {}
+    return [{'key': key, 'filters': filters}, theme_summary, tonalite_summary, territory_summary, media_summary, date_summary]
 
-    if 'combined-pie-chart' in grid_items:
-        combined_pie_chart = create_combined_pie_bar_chart(filtered_df, myCSS.pie_bar_chart)
-        figures['combined-pie-chart'] = combined_pie_chart
+# Callbacks patching the data of each grid item, concurrently and as soon as they are ready
+def register_item_callback(item: str, output: Output):
+    @dash_app.callback(output, Input('filter-state', 'data'), prevent_initial_call=True)
+    def update_item(filter_state):
+        df = data_store.get()
+        if df is None or not filter_state:
+            raise PreventUpdate
+        return figure_patch(cached_item(item, df, tuple(filter_state['filters']), filter_state['key']))
 
-    if 'geographic-distribution' in [item for sublist in DATA_GRID for item in sublist]:
-        geographic_distribution = create_geographic_distribution_map(filtered_df, style=myCSS.geographic_distribution, geojson=FRANCE_GEOJSON)
-        figures['geographic-distribution'] = geographic_distribution
+for graph_id in grid_items:
+    register_item_callback(graph_id, Output(graph_id, 'figure'))
 
-    if 'sentiment-trend-area' in grid_items:
-        sentiment_trend_area = create_sentiment_trend_area(filtered_df, style=myCSS.sentiment_trend)
-        figures['sentiment-trend-area'] = sentiment_trend_area
+# Callback serving the displayed page of the table, back to the first page when the rows or their order change
+@dash_app.callback(
+    [Output('data-table', 'data'),
+     Output('data-table', 'page_count'),
+     Output('data-table', 'page_current')],
+    [Input('filter-state', 'data'),
+     Input('data-table', 'page_current'),
+     Input('data-table', 'page_size'),
+     Input('data-table', 'sort_by')],
+    prevent_initial_call=True
+)
+def update_table_page(filter_state, page_current, page_size, sort_by):
+    df = data_store.get()
+    if df is None or not filter_state:
+        raise PreventUpdate
 
-    if 'word-cloud' in grid_items:
-        text = ' '.join(filtered_df['Sujet'].dropna().tolist() + filtered_df['Article'].dropna().tolist())
-        wordcloud = create_wordcloud(text, style=myCSS.wordcloud, stopwords=FRENCH_STOP_WORDS)
-        figures['word-cloud'] = wordcloud
+    filtered_df = filtered_rows(df, tuple(filter_state['filters']), filter_state['key'])
+    order = table_order(filtered_df, sort_by, filter_state['key'])
+    page_count = max(1, -(-len(order) // page_size))
+    if 'data-table.page_current' not in dash.callback_context.triggered_prop_ids or page_current is None:
+        page_current = 0
+    page_current = min(page_current, page_count - 1)
 
-    # Prepare return values in the correct order
-    values_to_return = [figures.get(graph_id, {}) for graph_id in [item for sublist in DATA_GRID for item in sublist]]
-    values_to_return.extend([table_data, theme_summary, tonalite_summary, territory_summary, media_summary, date_summary])
-    return values_to_return
+    start = page_current * page_size
+    return table_records(filtered_df.iloc[order[start:start + page_size]]), page_count, page_current
 
 ########################################################
 ## II.c) Callbacks for Imports (PDF) / Export (Excel) ##
 ########################################################
 
-# Callback for Excel export
+# Callback for Excel export of every filtered row, in the order of the table
 @dash_app.callback(
     Output("download-dataframe-xlsx", "data"),
     Input("export-button", "n_clicks"),
-    Input('data-table', 'data'),
+    State('filter-state', 'data'),
+    State('data-table', 'sort_by'),
     prevent_initial_call=True
 )
-def handle_xlsx_export(n_clicks, table_data):
+def handle_xlsx_export(n_clicks, filter_state, sort_by):
+    df = data_store.get()
+    table_data = None
+    if df is not None and filter_state:
+        filtered_df = filtered_rows(df, tuple(filter_state['filters']), filter_state['key'])
+        table_data = table_records(filtered_df.iloc[table_order(filtered_df, sort_by, filter_state['key'])])
     return export_table_to_excel(n_clicks, table_data)
 
+# Callback propagating the refreshes of the data to the filters and visualizations
+@dash_app.callback(
+    Output('data-generation', 'data'),
+    Input('poll-interval', 'n_intervals'),
+    State('data-generation', 'data'),
+    prevent_initial_call=True
+)
+def poll_data_generation(n_intervals, generation):
+    if data_store.generation <= generation:
+        raise PreventUpdate
+    return data_store.generation
+
 # Callback to handle PDF import status
 @dash_app.callback(
     Output('pdf-import-store', 'data'),
@@ -345,6 +697,9 @@ def update_upload_button_style_and_text(store_data):
 ## II.e) Run dash app ##
 ########################
 
+# Start loading the data once the callbacks it warms up are defined
+data_store.start()
+
 # Start the Dash app
 if __name__ == '__main__':
     dash_app.run(debug=DEBUG_MODE, host=DASH_APP_URL, port=DASH_APP_PORT)
@@ -1,27 +1,58 @@
+import io
+import base64
+
 import pandas as pd
 import plotly.express as px
+from dash import Patch
 from wordcloud import WordCloud
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
-def create_combined_pie_bar_chart(filtered_df: pd.DataFrame, style: dict) -> go.Figure:
+# Words drawn in the word cloud
+WORDCLOUD_MAX_WORDS = 100
+
+# Each figure is sent once with its static structure (traces, styling, geometry),
+# filter changes then only send the arrays of its traces, as a list of
+# (trace index, {property: value}) updates applied by `figure_patch`.
+
+
+def figure_patch(updates: list) -> Patch:
     """
-    Creates a combined pie chart and bar chart to visualize the distribution of media and sentiment.
+    Builds the partial update of a figure from trace updates.
+
+    Args:
+        updates (list): (trace index, {property: value}) pairs, nested properties being dotted (e.g. 'marker.colors').
+
+    Returns:
+        Patch: The Dash partial property update of the figure.
+    """
+    patch = Patch()
+    for trace_index, properties in updates:
+        for name, value in properties.items():
+            location = patch['data'][trace_index]
+            *parents, leaf = name.split('.')
+            for parent in parents:
+                location = location[parent]
+            location[leaf] = value
+    return patch
+
+
+def pie_bar_chart_bars(style: dict) -> list:
+    """The (category, label) of each stacked bar, in trace order after the pie chart."""
+    return [(category, label) for category in ['Factuel', 'Sentiment', 'Nuancé'] for label in style['bar_colors'][category]]
+
+
+def create_combined_pie_bar_chart(style: dict) -> go.Figure:
+    """
+    Creates a combined pie chart and bar chart to visualize the distribution of media and sentiment,
+    filled by the updates of `combined_pie_bar_chart_updates`.
 
     Args:
-        filtered_df (pd.DataFrame): The filtered data containing media and sentiment information.
         style (dict): A dictionary containing styling information for the charts, including color schemes and font settings.
 
     Returns:
         go.Figure: A Plotly figure containing a pie chart and a stacked bar chart in a subplot.
     """
-    # Group non-pertinent medias based on a threshold ratio
-    threshold = 0.02  # Define threshold for media distribution
-    media_counts = filtered_df['Média'].value_counts(normalize=True)
-    filtered_df['Média'] = filtered_df['Média'].apply(
-        lambda x: x if media_counts[x] > threshold else 'Autres'
-    )
-
     # Create a subplot for multiple charts
     fig = make_subplots(
         rows=1, cols=2,
@@ -30,16 +61,9 @@ def create_combined_pie_bar_chart(filtered_df: pd.DataFrame, style: dict) -> go.
     )
 
     # 1. Répartition des Médias (Pie Chart)
-    media_pie = px.pie(
-        filtered_df,
-        names='Média',
-        color='Média',
-        color_discrete_sequence=px.colors.qualitative.Plotly,
-    )
-    fig.add_trace(media_pie.data[0], row=1, col=1)
-
-    # Apply the same pie chart styling as before
-    fig.update_traces(
+    fig.add_trace(go.Pie(
+        labels=[],
+        values=[],
         textposition='inside',
         textinfo='percent+label',
         hovertemplate=(
@@ -48,51 +72,24 @@ def create_combined_pie_bar_chart(filtered_df: pd.DataFrame, style: dict) -> go.
             "Count: %{value}"
         ),
         hole=0.4,
-        marker=dict(line=dict(color='#FFFFFF', width=2)),
-        selector=0
-    )
-    fig.update_traces(showlegend=False, selector=0)
-
-    # 2. Répartition des ratios (Bar Chart)
-    factuel_ratio = filtered_df['Factuel'].value_counts(normalize=True).to_dict()
-    sentiment_ratio = filtered_df['Sentiment'].value_counts(normalize=True).to_dict()
-    nuance_ratio = filtered_df['Nuancé'].value_counts(normalize=True).to_dict()
-
-    # Structure ratio data
-    ratio_data = {
-        'Factuel': factuel_ratio,
-        'Sentiment': sentiment_ratio,
-        'Nuancé': nuance_ratio
-    }
-
-    # Bar chart with stacked bars for each category
-    categories = ['Factuel', 'Sentiment', 'Nuancé']
-    bars = []
-
-    for category in categories:
-        labels = list(ratio_data[category].keys())
-        values = list(ratio_data[category].values())
-        
-        # Create a stacked bar trace for each label
-        for i, label in enumerate(labels):
-            color = style['bar_colors'][category].get(label, '#000000')  # Default to black
-            
-            bars.append(go.Bar(
-                x=[category],
-                y=[values[i]],
-                name="",
-                text=[f"{values[i]:.1%}"],
-                textposition="inside",
-                hovertemplate=(
-                    f"<b>{category}: {label}</b><br>"
-                    "Ratio: %{y:.1%}<br>"
-                ),
-                marker=dict(color=color),
-            ))
-
-    # Add bars to the plot
-    for bar in bars:
-        fig.add_trace(bar, row=1, col=2)
+        marker=dict(colors=[], line=dict(color='#FFFFFF', width=2)),
+        showlegend=False,
+    ), row=1, col=1)
+
+    # 2. Répartition des ratios (Bar Chart), one stacked bar for each label of each category
+    for category, label in pie_bar_chart_bars(style):
+        fig.add_trace(go.Bar(
+            x=[category],
+            y=[0],
+            name="",
+            text=[""],
+            textposition="inside",
+            hovertemplate=(
+                f"<b>{category}: {label}</b><br>"
+                "Ratio: %{y:.1%}<br>"
+            ),
+            marker=dict(color=style['bar_colors'][category][label]),
+        ), row=1, col=2)
 
     # 3. Update layout
     fig.update_layout(
@@ -109,101 +106,143 @@ def create_combined_pie_bar_chart(filtered_df: pd.DataFrame, style: dict) -> go.
     return fig
 
 
-
-def create_geographic_distribution_map(filtered_df: pd.DataFrame, style: dict, geojson: dict) -> go.Figure:
+def combined_pie_bar_chart_updates(filtered_df: pd.DataFrame, style: dict) -> list:
     """
-    Creates a geographic distribution map visualizing the sentiment for each territory.
+    Computes the media distribution and sentiment ratios of the combined pie and bar chart.
 
     Args:
-        filtered_df (pd.DataFrame): The filtered data containing sentiment and territorial information.
-        style (dict): A dictionary containing styling settings, including color mapping and title.
-        geojson (dict): A GeoJSON object containing the geographical boundaries of the territories.
+        filtered_df (pd.DataFrame): The filtered data containing media and sentiment information.
+        style (dict): The styling of `create_combined_pie_bar_chart`.
 
     Returns:
-        go.Figure: A Plotly choropleth map displaying the sentiment for each territory.
+        list: The trace updates of the figure.
     """
-    # Get most frequent Tonalité for each Territoire
-    aggregated_df = filtered_df.groupby('Territoire')['Sentiment'].agg(
-        lambda x: x.mode()[0] if not x.mode().empty else 'Inconnu'
-    ).reset_index()
+    # Group non-pertinent medias based on a threshold ratio
+    threshold = 0.02  # Define threshold for media distribution
+    media_counts = filtered_df['Média'].value_counts(normalize=True)
+    medias = filtered_df['Média'].map(lambda x: x if media_counts[x] > threshold else 'Autres')
 
-    # Get Territoires from the GeoJSON file
-    all_territoires = pd.DataFrame({
-        'Territoire': [feature['properties']['nom'] for feature in geojson['features']]
-    })
+    # Colors are given to the medias in their order of appearance
+    counts = medias.value_counts(sort=False)
+    labels = pd.unique(medias).tolist()
+    palette = px.colors.qualitative.Plotly
+    updates = [(0, {
+        'labels': labels,
+        'values': counts[labels].tolist(),
+        'marker.colors': [palette[i % len(palette)] for i in range(len(labels))],
+    })]
 
-    # Merge with aggregated_df
-    merged_df = all_territoires.merge(aggregated_df, on='Territoire', how='left')
+    ratios = {category: filtered_df[category].value_counts(normalize=True) for category in ['Factuel', 'Sentiment', 'Nuancé']}
+    for trace_index, (category, label) in enumerate(pie_bar_chart_bars(style), start=1):
+        ratio = float(ratios[category].get(label, 0.0))
+        updates.append((trace_index, {'y': [ratio], 'text': [f"{ratio:.1%}" if ratio else ""]}))
 
-    # Set default grey color to Territoires with no data
-    merged_df['Sentiment'] = merged_df['Sentiment'].fillna('Inconnu')
+    return updates
+
+
+def create_geographic_distribution_map(style: dict, geojson: dict) -> go.Figure:
+    """
+    Creates a geographic distribution map visualizing the sentiment for each territory, with
+    one choropleth trace holding the geometry, colored by the updates of
+    `geographic_distribution_map_updates`.
 
-    # Create choropleth map
-    geo_fig = px.choropleth(
-        merged_df, 
-        geojson=geojson, 
-        locations='Territoire', 
+    Args:
+        style (dict): A dictionary containing styling settings, including color mapping and title.
+        geojson (dict): A GeoJSON object containing the geographical boundaries of the territories.
+
+    Returns:
+        go.Figure: A Plotly choropleth map displaying the sentiment for each territory.
+    """
+    # Sentiments are drawn as the steps of a discrete color scale
+    sentiments = list(style['color_mapping'])
+    colorscale = []
+    for i, sentiment in enumerate(sentiments):
+        colorscale += [[i / len(sentiments), style['color_mapping'][sentiment]], [(i + 1) / len(sentiments), style['color_mapping'][sentiment]]]
+
+    geo_fig = go.Figure(go.Choropleth(
+        geojson=geojson,
         featureidkey="properties.nom",
-        color='Sentiment',
-        color_discrete_map=style['color_mapping'],
-        title=style['title'],
-        hover_data=['Territoire', 'Sentiment'],
-    )
+        locations=[feature['properties']['nom'] for feature in geojson['features']],
+        z=[],
+        zmin=-0.5,
+        zmax=len(sentiments) - 0.5,
+        colorscale=colorscale,
+        colorbar=dict(title="Sentiment", tickvals=list(range(len(sentiments))), ticktext=sentiments),
+        customdata=[],
+        hovertemplate="Territoire=%{location}<br>Sentiment=%{customdata}<extra></extra>",
+        marker_line_color='white',
+    ))
     geo_fig.update_layout(
+        title=style['title'],
         title_font=style['title_font'],
         margin={"r": 0, "t": 50, "l": 0, "b": 0},
-    )    
+    )
     geo_fig.update_geos(fitbounds="locations", visible=False)
-    
-    return geo_fig
 
+    return geo_fig
 
 
-def create_sentiment_trend_area(filtered_df: pd.DataFrame, style: dict) -> go.Figure:
+def geographic_distribution_map_updates(filtered_df: pd.DataFrame, style: dict, geojson: dict) -> list:
     """
-    Creates an area chart showing the sentiment trend over time.
+    Computes the most frequent sentiment of each territory of the geographic distribution map.
 
     Args:
-        filtered_df (pd.DataFrame): The filtered data containing sentiment and date information.
-        style (dict): A dictionary containing styling settings, including color mapping and title.
+        filtered_df (pd.DataFrame): The filtered data containing sentiment and territorial information.
+        style (dict): The styling of `create_geographic_distribution_map`.
+        geojson (dict): The GeoJSON of `create_geographic_distribution_map`.
 
     Returns:
-        go.Figure: A Plotly area chart showing the sentiment trend over time.
+        list: The trace updates of the figure.
     """
-    # Aggregate data by grouped sentiment and date
-    sentiment_trend = (
-        filtered_df.groupby(['Date', 'Sentiment'])
-        .size()
-        .reset_index(name='Count')
+    # Get most frequent Tonalité for each Territoire
+    aggregated = filtered_df.groupby('Territoire')['Sentiment'].agg(
+        lambda x: x.mode()[0] if not x.mode().empty else 'Inconnu'
     )
 
-    # Filter data for 'Factuel' where the value is 'Oui'
-    factuel_trend = (
-        filtered_df[filtered_df['Factuel'] == 'Oui'] 
-        .groupby(['Date', 'Factuel'])
-        .size()
-        .reset_index(name='Count')
-    )
+    # Set default grey color to Territoires with no data
+    territories = [feature['properties']['nom'] for feature in geojson['features']]
+    sentiments = aggregated.reindex(territories).fillna('Inconnu')
+    sentiment_codes = {sentiment: i for i, sentiment in enumerate(style['color_mapping'])}
 
-    # Rename 'Factuel' column to 'Sentiment' and replace 'Oui' with 'Factuel'
-    factuel_trend = factuel_trend.rename(columns={'Factuel': 'Sentiment'})
-    factuel_trend['Sentiment'] = 'Factuel'
-
-    # Combine sentiment and factuel data into a single DataFrame
-    combined_trend = pd.concat([sentiment_trend, factuel_trend], axis=0)
-
-    # Create a single figure
-    fig = px.area(
-        combined_trend, 
-        x='Date', 
-        y='Count', 
-        color='Sentiment',
-        color_discrete_map=style['color_mapping'],
-        title="📈 Tendance des tonalités et des articles factuels au fil du temps"
-    )
+    return [(0, {
+        'z': [sentiment_codes.get(sentiment, sentiment_codes.get('Inconnu')) for sentiment in sentiments],
+        'customdata': sentiments.tolist(),
+    })]
+
+
+def sentiment_trend_series(style: dict) -> list:
+    """The series of the sentiment trend, in trace order: each sentiment, then the factual articles."""
+    return [*style['color_mapping'], 'Factuel']
+
+
+def create_sentiment_trend_area(style: dict) -> go.Figure:
+    """
+    Creates an area chart showing the sentiment trend over time, filled by the updates of
+    `sentiment_trend_area_updates`.
+
+    Args:
+        style (dict): A dictionary containing styling settings, including color mapping and title.
+
+    Returns:
+        go.Figure: A Plotly area chart showing the sentiment trend over time.
+    """
+    fig = go.Figure()
+    for series in sentiment_trend_series(style):
+        color = style['color_mapping'].get(series, px.colors.qualitative.Plotly[0])
+        fig.add_trace(go.Scatter(
+            x=[],
+            y=[],
+            name=series,
+            legendgroup=series,
+            mode='lines',
+            stackgroup='1',
+            line=dict(color=color),
+            hovertemplate=f"Sentiment={series}<br>Date=%{{x}}<br>Count=%{{y}}<extra></extra>",
+        ))
 
     # Update layout
     fig.update_layout(
+        title="📈 Tendance des tonalités et des articles factuels au fil du temps",
         title_font=dict(size=20),
         xaxis_title="Date",
         yaxis_title="Nombre d'articles",
@@ -214,42 +253,82 @@ def create_sentiment_trend_area(filtered_df: pd.DataFrame, style: dict) -> go.Fi
     return fig
 
 
-def create_wordcloud(text: str, style: dict, stopwords: set) -> go.Figure:
+def sentiment_trend_area_updates(filtered_df: pd.DataFrame, style: dict) -> list:
     """
-    Creates a word cloud from the provided text.
+    Counts the articles of each sentiment, and the factual ones, per date.
 
     Args:
-        text (str): The text from which the word cloud will be generated.
-        style (dict): A dictionary containing styling settings for the word cloud, such as dimensions and background color.
-        stopwords (set): A set of words to exclude from the word cloud.
+        filtered_df (pd.DataFrame): The filtered data containing sentiment and date information.
+        style (dict): The styling of `create_sentiment_trend_area`.
 
     Returns:
-        go.Figure: A Plotly figure containing the word cloud as an image.
+        list: The trace updates of the figure.
     """
-    # Create word cloud
-    wordcloud = WordCloud(
-        width=style['width'], 
-        height=style['height'], 
-        background_color=style['backgroundColor'],
-        stopwords=stopwords,
-        max_words=100,
-        prefer_horizontal=0.9,
-    ).generate(text)
+    # Aggregate data by sentiment and date, the factual articles being a series of their own
+    trends = {
+        sentiment: counts.droplevel('Sentiment')
+        for sentiment, counts in filtered_df.groupby(['Sentiment', 'Date']).size().groupby(level='Sentiment')
+    }
+    trends['Factuel'] = filtered_df[filtered_df['Factuel'] == 'Oui'].groupby('Date').size()
+
+    updates = []
+    for trace_index, series in enumerate(sentiment_trend_series(style)):
+        counts = trends.get(series, pd.Series(dtype=int))
+        updates.append((trace_index, {
+            'x': pd.DatetimeIndex(counts.index).strftime('%Y-%m-%d').tolist(),
+            'y': counts.tolist(),
+        }))
+    return updates
+
+
+def create_wordcloud(style: dict) -> go.Figure:
+    """
+    Creates the frame of the word cloud, its image being set by the updates of `wordcloud_updates`.
 
-    # Convert word cloud to np.array (to get a better quality than a static png)
-    wordcloud_array = wordcloud.to_array()
+    Args:
+        style (dict): A dictionary containing styling settings for the word cloud, such as dimensions and background color.
 
-    # Transform it into a Plotly figure
+    Returns:
+        go.Figure: A Plotly figure containing the word cloud as an image.
+    """
     fig = go.Figure()
-    fig.add_trace(go.Image(z=wordcloud_array, hoverinfo='skip'))
+    fig.add_trace(go.Image(source=None, hoverinfo='skip'))
 
     fig.update_layout(
         title=style['title'],
         xaxis=dict(visible=False, scaleanchor='y'),
         yaxis=dict(visible=False, scaleanchor='x'),
-        margin=dict(l=0, r=0, t=40, b=0), 
+        margin=dict(l=0, r=0, t=40, b=0),
         paper_bgcolor='white',
         plot_bgcolor='rgba(0,0,0,0)',
     )
 
     return fig
+
+
+def wordcloud_updates(frequencies: dict, style: dict) -> list:
+    """
+    Draws the word cloud of the provided word frequencies.
+
+    Args:
+        frequencies (dict): The frequency of each word, stop words already removed (see utils.term_counts).
+        style (dict): A dictionary containing styling settings for the word cloud, such as dimensions and background color.
+
+    Returns:
+        list: The trace updates of the figure.
+    """
+    # Create word cloud
+    wordcloud = WordCloud(
+        width=style['width'],
+        height=style['height'],
+        background_color=style['backgroundColor'],
+        max_words=WORDCLOUD_MAX_WORDS,
+        prefer_horizontal=0.9,
+    ).generate_from_frequencies(frequencies)
+
+    # Send the image as a PNG, lossless and far lighter than its pixel array
+    buffer = io.BytesIO()
+    wordcloud.to_image().save(buffer, format='PNG', optimize=True)
+    source = f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}"
+
+    return [(0, {'source': source})]
@@ -1,23 +1,21 @@
 import re
+import numpy as np
 import pandas as pd
 from dash import dcc
 import dash_bootstrap_components as dbc
 from utils.shared_utils import normalize_text
 
-def create_accordion_item(df: pd.DataFrame, title: str, id: str, multi: bool = True, style: dict = None, ordered_values: list = None) -> dbc.AccordionItem:
+def dropdown_options(df: pd.DataFrame, title: str, ordered_values: list = None) -> list:
     """
-    Creates an accordion item with a dropdown filter for a specific column in a DataFrame.
+    Builds the dropdown options of a column of a DataFrame.
 
     Args:
         df (pd.DataFrame): The DataFrame containing the data to filter.
         title (str): The name of the column to filter by.
-        id (str): The unique identifier for the accordion item.
-        multi (bool, optional): Whether the dropdown allows multiple selections. Defaults to True.
-        style (dict, optional): Custom CSS styles to apply to the dropdown. Defaults to None.
         ordered_values (list, optional): A list of ordered values to sort the dropdown options. Defaults to None.
 
     Returns:
-        dbc.AccordionItem: A Dash accordion item containing the dropdown filter.
+        list: The options of the dropdown, as label/value dictionaries.
     """
     # Get unique options from the DataFrame column
     options = df[title].unique()
@@ -28,11 +26,28 @@ def create_accordion_item(df: pd.DataFrame, title: str, id: str, multi: bool = T
     else:
         sorted_options = sorted(options)
 
+    return [{'label': option, 'value': option} for option in sorted_options]
+
+def create_accordion_item(df: pd.DataFrame, title: str, id: str, multi: bool = True, style: dict = None, ordered_values: list = None) -> dbc.AccordionItem:
+    """
+    Creates an accordion item with a dropdown filter for a specific column in a DataFrame.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the data to filter, or None to fill the options later.
+        title (str): The name of the column to filter by.
+        id (str): The unique identifier for the accordion item.
+        multi (bool, optional): Whether the dropdown allows multiple selections. Defaults to True.
+        style (dict, optional): Custom CSS styles to apply to the dropdown. Defaults to None.
+        ordered_values (list, optional): A list of ordered values to sort the dropdown options. Defaults to None.
+
+    Returns:
+        dbc.AccordionItem: A Dash accordion item containing the dropdown filter.
+    """
     # Create the accordion item with the dropdown
     accordion_item = dbc.AccordionItem([
         dcc.Dropdown(
             id=f"{id}-dropdown",
-            options=[{'label': option, 'value': option} for option in sorted_options],
+            options=dropdown_options(df, title, ordered_values) if df is not None else [],
             placeholder=f"Sélectionnez un ou plusieurs {title.lower()}s" if id != 'tonalite' else "Sélectionnez une ou plusieurs qualités du retour",
             multi=multi,
             style=style or {'margin-bottom': '10px'}
@@ -41,7 +56,7 @@ def create_accordion_item(df: pd.DataFrame, title: str, id: str, multi: bool = T
     
     return accordion_item
 
-def filter_df(df: pd.DataFrame, filters: list) -> pd.DataFrame:
+def filter_df(df: pd.DataFrame, filters: list, article_store=None, search_index=None, filter_engine=None) -> pd.DataFrame:
     """
     Filters the DataFrame based on the provided filter criteria.
 
@@ -49,35 +64,71 @@ def filter_df(df: pd.DataFrame, filters: list) -> pd.DataFrame:
         df (pd.DataFrame): The DataFrame to filter.
         filters (list): A list containing the filter criteria in the following order:
                         [theme, tonalite, territory, media, start_date, end_date, keywords].
+        article_store (ArticleStore, optional): Source of the article bodies when the
+                        DataFrame has no 'Article' column. Defaults to None.
+        search_index (SearchIndex, optional): Index of the keyword search, the rows it does
+                        not cover yet are searched in their text. Defaults to None.
+        filter_engine (FilterEngine, optional): Precomputed indexes of the DataFrame resolving
+                        the dropdown and date filters at once. Defaults to None.
 
     Returns:
         pd.DataFrame: A filtered DataFrame based on the provided filters.
     """
     theme, tonalite, territory, media, start_date, end_date, keywords = filters
 
-    # Apply filters to the DataFrame
-    if theme:
-        df = df[df['Thème'].isin(theme)]
-    if tonalite:
-        df = df[df['Sentiment'].isin(tonalite)]
-    if territory:
-        df = df[df['Territoire'].isin(territory)]
-    if media:
-        df = df[df['Média'].isin(media)]
-    if start_date and end_date:
-        df = df[(df['Date'] >= start_date) & (df['Date'] <= end_date)]
+    # Apply filters to the DataFrame, with a single selection of the matching rows when they are indexed
+    if filter_engine is not None:
+        selections = {'Thème': theme, 'Sentiment': tonalite, 'Territoire': territory, 'Média': media}
+        positions = filter_engine.select(selections, start_date, end_date)
+        if len(positions) < len(df):
+            df = df.iloc[positions]
+    else:
+        if theme:
+            df = df[df['Thème'].isin(theme)]
+        if tonalite:
+            df = df[df['Sentiment'].isin(tonalite)]
+        if territory:
+            df = df[df['Territoire'].isin(territory)]
+        if media:
+            df = df[df['Média'].isin(media)]
+        if start_date and end_date:
+            df = df[(df['Date'] >= start_date) & (df['Date'] <= end_date)]
 
     # If keywords are provided, filter based on matching keywords in 'Sujet' or 'Article'
     if keywords and keywords.strip():
         # Split keywords by comma, space, or semicolon and normalize the text
         keywords_list = [normalize_text(kw) for kw in re.split(r'[,\s;]+', keywords.strip()) if kw.strip()]
-        
-        # Filter rows where all keywords are present in either 'Sujet' or 'Article'
-        def contains_all_keywords(row):
-            combined_text = normalize_text(f"{row['Sujet']} {row['Article']}")
-            return all(kw in combined_text for kw in keywords_list)
 
-        df = df[df.apply(contains_all_keywords, axis=1)]
+        # Keep the candidates of the search index among the rows it covers
+        covered = np.zeros(len(df), dtype=bool)
+        unresolved = keywords_list
+        if search_index is not None:
+            candidates, unresolved, max_id = search_index.search(keywords_list)
+            if max_id is not None:
+                covered = df.index.to_numpy() <= max_id
+                if candidates is not None:
+                    keep = ~covered | df.index.isin(candidates)
+                    df, covered = df[keep], covered[keep]
+
+        # The rows not covered by the index, or all of them for the keywords it cannot resolve, are checked in the text
+        to_check = np.ones(len(df), dtype=bool) if unresolved else ~covered
+        if to_check.any():
+            checked_df = df[to_check]
+
+            # Bodies of the remaining candidates only, when they are loaded lazily
+            articles = checked_df['Article'] if 'Article' in df.columns else article_store.get_series(checked_df.index)
+
+            # Filter rows where all keywords are present in either 'Sujet' or 'Article'
+            def contains_all_keywords(subject, article, keywords_to_check):
+                combined_text = normalize_text(f"{subject} {article}")
+                return all(kw in combined_text for kw in keywords_to_check)
+
+            matches = np.ones(len(df), dtype=bool)
+            matches[to_check] = [
+                contains_all_keywords(subject, article, unresolved if is_covered else keywords_list)
+                for subject, article, is_covered in zip(checked_df['Sujet'], articles, covered[to_check])
+            ]
+            df = df[matches]
 
     return df
 
@@ -0,0 +1,150 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+
+
+class DataStore:
+    """
+    Holds the dashboard DataFrame shared by the callbacks.
+
+    The data is loaded by a background thread started at import, so that the
+    Dash app serves its layout (with a loading state) while the table is fetched.
+
+    `refresh` appends the rows added since the last load. The DataFrame is never
+    modified in place: a new one is swapped in, so callbacks keep working on the
+    snapshot they started with. `generation` is incremented on every swap, and
+    `on_update` is called with the new DataFrame after a refresh.
+
+    `on_load` is called with the loaded DataFrame once it is served, for the
+    slower preparations (e.g. the search index); refreshes wait for it.
+    """
+
+    def __init__(self, load: Callable[[], pd.DataFrame], load_since: Callable[[int, pd.DataFrame], pd.DataFrame] = None, on_update: Callable[[pd.DataFrame], None] = None, on_load: Callable[[pd.DataFrame], None] = None):
+        self.load = load
+        self.load_since = load_since
+        self.on_update = on_update
+        self.on_load = on_load
+        self.df = None
+        self.generation = 0
+        self.error = None
+        self.loaded = threading.Event()
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.thread = None
+
+    def start(self) -> "DataStore":
+        """Starts loading the data in a daemon thread."""
+        self.thread = threading.Thread(target=self._run, name="dashboard-data-loader", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            df = self.load()
+        except Exception as e:
+            print(f"Error loading the dashboard data: {e}")
+            self.error = e
+            return
+        else:
+            self.swap(df)
+            print(f"Dashboard data loaded: {len(df)} rows in {time.perf_counter() - start:.1f}s")
+        finally:
+            self.loaded.set()
+
+        if self.on_load is not None:
+            with self.refresh_lock:
+                try:
+                    self.on_load(df)
+                except Exception as e:
+                    print(f"Error preparing the dashboard data: {e}")
+
+    def get(self) -> Optional[pd.DataFrame]:
+        """The loaded DataFrame, or None while it is loading."""
+        with self.lock:
+            return self.df
+
+    def swap(self, df: pd.DataFrame) -> None:
+        with self.lock:
+            self.df = df
+            self.generation += 1
+
+    def refresh(self) -> int:
+        """
+        Appends the rows whose id is greater than the last loaded one.
+
+        Returns:
+            int: The number of new rows.
+        """
+        # Concurrent refreshes would append the same rows twice
+        with self.refresh_lock:
+            current = self.get()
+            if current is None or self.load_since is None:
+                return 0
+            last_id = int(current.index.max()) if len(current) else 0
+            new_rows = self.load_since(last_id, current)
+            if new_rows is None or new_rows.empty:
+                return 0
+            df = pd.concat([current, new_rows])
+            self.swap(df)
+            print(f"Dashboard data refreshed: {len(new_rows)} new rows")
+            if self.on_update is not None:
+                self.on_update(df)
+            return len(new_rows)
+
+    def refresh_async(self) -> None:
+        """Refreshes the data in a background thread."""
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing the dashboard data: {e}")
+
+        threading.Thread(target=run, name="dashboard-data-refresh", daemon=True).start()
+
+
+class ArticleStore:
+    """
+    Article bodies fetched from the database on demand, with an LRU cache of the
+    most recently used ones. The dashboard frame only holds the light columns.
+    """
+
+    def __init__(self, fetch: Callable[[list], dict], max_size: int = 2000):
+        self.fetch = fetch
+        self.max_size = max_size
+        self.bodies = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, ids: Iterable) -> dict:
+        """The body of each id, fetching the ones that are not cached."""
+        ids = list(dict.fromkeys(int(article_id) for article_id in ids))
+        found = {}
+        with self.lock:
+            for article_id in ids:
+                if article_id in self.bodies:
+                    self.bodies.move_to_end(article_id)
+                    found[article_id] = self.bodies[article_id]
+
+        missing = [article_id for article_id in ids if article_id not in found]
+        if missing:
+            fetched = self.fetch(missing)
+            found.update(fetched)
+            with self.lock:
+                # Only the last bodies would survive the eviction anyway
+                for article_id in missing[-self.max_size:]:
+                    if article_id in fetched:
+                        self.bodies[article_id] = fetched[article_id]
+                        self.bodies.move_to_end(article_id)
+                while len(self.bodies) > self.max_size:
+                    self.bodies.popitem(last=False)
+        return found
+
+    def get_series(self, ids: Iterable) -> pd.Series:
+        """The bodies of the ids as a Series indexed by id, None when not found."""
+        ids = list(ids)
+        bodies = self.get_many(ids)
+        return pd.Series([bodies.get(int(article_id)) for article_id in ids], index=ids, dtype=object)
@@ -0,0 +1,92 @@
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Columns filtered by the dropdowns of the dashboard
+FACET_COLUMNS = ['Thème', 'Sentiment', 'Territoire', 'Média']
+
+
+class FilterEngine:
+    """
+    Precomputed indexes answering the dropdown and date filters of the dashboard
+    with one array of row positions, without copying the DataFrame at each step.
+
+    Each facet column is held as categorical codes (0 for missing values), so a
+    selection is a boolean lookup table over the codes: OR within a facet, AND
+    across facets. The rows are also sorted by date once, so a date range is a
+    `searchsorted` slice of that order instead of a comparison of every row.
+    """
+
+    def __init__(self, df: pd.DataFrame, facet_columns: list = FACET_COLUMNS, date_column: str = 'Date'):
+        self.size = len(df)
+        self.codes, self.categories = {}, {}
+        for column in facet_columns:
+            codes, uniques = pd.factorize(df[column])
+            # Shift the codes so that missing values (-1) get the first slot of the lookup tables
+            self.codes[column] = (codes + 1).astype(np.int32)
+            self.categories[column] = pd.Index(uniques)
+
+        dates = df[date_column].to_numpy(dtype='datetime64[ns]')
+        # Stable sort, the missing dates are sorted last and left out of the searched dates
+        self.date_order = np.argsort(dates, kind='stable')
+        self.sorted_dates = dates[self.date_order][:np.count_nonzero(~np.isnat(dates))]
+
+    def lookup_table(self, column: str, values: list) -> np.ndarray:
+        """Whether each code of a facet column is selected, as Series.isin(values)."""
+        categories = self.categories[column]
+        table = np.zeros(len(categories) + 1, dtype=bool)
+        table[1:] = categories.isin(values)
+        table[0] = any(pd.isna(value) for value in values)
+        return table
+
+    def date_positions(self, start_date, end_date) -> np.ndarray:
+        """Positions of the rows whose date is within the bounds (included), in date order."""
+        start = np.datetime64(pd.Timestamp(start_date), 'ns')
+        end = np.datetime64(pd.Timestamp(end_date), 'ns')
+        low = np.searchsorted(self.sorted_dates, start, side='left')
+        high = np.searchsorted(self.sorted_dates, end, side='right')
+        return self.date_order[low:max(low, high)]
+
+    def select(self, selections: Dict[str, Optional[list]], start_date=None, end_date=None) -> np.ndarray:
+        """
+        Resolves the filters of the dashboard.
+
+        Args:
+            selections (dict): The selected values of each facet column, None or empty for no filter.
+            start_date (optional): Start of the date range, applied with `end_date`. Defaults to None.
+            end_date (optional): End of the date range (included). Defaults to None.
+
+        Returns:
+            np.ndarray: The sorted positions of the matching rows.
+        """
+        positions = self.date_positions(start_date, end_date) if start_date and end_date else None
+
+        mask = None
+        for column, values in selections.items():
+            if not values:
+                continue
+            codes = self.codes[column] if positions is None else self.codes[column][positions]
+            selected = self.lookup_table(column, values)[codes]
+            mask = selected if mask is None else mask & selected
+
+        if positions is None:
+            return np.arange(self.size) if mask is None else np.flatnonzero(mask)
+        return np.sort(positions if mask is None else positions[mask])
+
+
+# Engine of the last DataFrame filtered, rebuilt when the data is swapped
+_engine_lock = threading.Lock()
+_engine = (None, None)
+
+
+def filter_engine_for(df: pd.DataFrame) -> FilterEngine:
+    """The filter engine of a DataFrame, built on its first use."""
+    global _engine
+    with _engine_lock:
+        indexed_df, engine = _engine
+        if indexed_df is not df:
+            engine = FilterEngine(df)
+            _engine = (df, engine)
+        return engine
@@ -1,6 +1,14 @@
+from typing import Iterator
+
+import numpy as np
 import pymysql
+import pymysql.cursors
+from pymysql.constants import FIELD_TYPE
 import pandas as pd
-from utils.shared_utils import normalize_text
+from utils.shared_utils import normalize_values
+
+# MySQL types streamed into int64 arrays when the column is NOT NULL
+INTEGER_FIELD_TYPES = {FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.INT24, FIELD_TYPE.LONG, FIELD_TYPE.LONGLONG}
 
 def fetch_table_as_df(host: str, user: str, password: str, db_name: str, table_name: str) -> pd.DataFrame:
     """
@@ -49,7 +57,193 @@ def fetch_table_as_df(host: str, user: str, password: str, db_name: str, table_n
         conn.close()
 
 
-def standardize_columns(df: pd.DataFrame, columns_to_fix: list) -> pd.DataFrame:
+def stream_table_as_df(host: str, user: str, password: str, db_name: str, table_name: str, chunk_size: int = 5000, columns: list = None, min_id: int = None) -> pd.DataFrame:
+    """
+    Streams a MySQL table into a pandas DataFrame with a server-side cursor.
+
+    Rows are fetched by chunks of `chunk_size` and written straight into one
+    preallocated array per column (int64 for NOT NULL integer columns, object
+    otherwise), so the whole result set is never held as a list of tuples.
+
+    Args:
+        host (str): The host address of the MySQL server.
+        user (str): The username to authenticate with the MySQL server.
+        password (str): The password to authenticate with the MySQL server.
+        db_name (str): The name of the database to connect to.
+        table_name (str): The name of the table to fetch data from.
+        chunk_size (int, optional): Number of rows fetched at once. Defaults to 5000.
+        columns (list, optional): The columns to fetch. Defaults to all columns.
+        min_id (int, optional): Only fetch the rows with a greater id. Defaults to None.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the table data.
+
+    Raises:
+        pymysql.MySQLError: If an error occurs while interacting with the MySQL database.
+    """
+    conn = pymysql.connect(
+        host=host,
+        user=user,
+        password=password,
+        database=db_name,
+        connect_timeout=10,
+        cursorclass=pymysql.cursors.SSCursor
+    )
+    try:
+        # Size the arrays from the row count, they grow if rows are added meanwhile.
+        # The count is read with a buffered cursor: an unbuffered one would have to be drained.
+        condition, params = (" WHERE id > %s", (int(min_id),)) if min_id is not None else ("", None)
+        with conn.cursor(pymysql.cursors.Cursor) as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name}{condition};", params)
+            (expected_rows,) = cursor.fetchone()
+
+        with conn.cursor() as cursor:
+            selected_columns = ", ".join(columns) if columns else "*"
+            cursor.execute(f"SELECT {selected_columns} FROM {table_name}{condition};", params)
+            arrays = [
+                np.empty(expected_rows, dtype=np.int64 if type_code in INTEGER_FIELD_TYPES and not null_ok else object)
+                for _, type_code, _, _, _, _, null_ok in cursor.description
+            ]
+
+            row_count = 0
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                end = row_count + len(rows)
+                if end > len(arrays[0]):
+                    arrays = [np.concatenate([array, np.empty(max(end, 2 * len(array)) - len(array), dtype=array.dtype)]) for array in arrays]
+                for array, values in zip(arrays, zip(*rows)):
+                    array[row_count:end] = values
+                row_count = end
+
+        names = [description[0] for description in cursor.description]
+        return pd.DataFrame({name: array[:row_count] for name, array in zip(names, arrays)}, copy=False)
+
+    finally:
+        conn.close()
+
+
+def stream_table_chunks(host: str, user: str, password: str, db_name: str, table_name: str, columns: list, chunk_size: int = 5000, min_id: int = None) -> Iterator[pd.DataFrame]:
+    """
+    Streams a MySQL table by chunks with a server-side cursor, for the data that is
+    processed once and not kept in memory (e.g. the article bodies to index).
+
+    Args:
+        host (str): The host address of the MySQL server.
+        user (str): The username to authenticate with the MySQL server.
+        password (str): The password to authenticate with the MySQL server.
+        db_name (str): The name of the database to connect to.
+        table_name (str): The name of the table to fetch data from.
+        columns (list): The columns to fetch.
+        chunk_size (int, optional): Number of rows per chunk. Defaults to 5000.
+        min_id (int, optional): Only fetch the rows with a greater id. Defaults to None.
+
+    Yields:
+        pd.DataFrame: The rows of each chunk.
+    """
+    conn = pymysql.connect(
+        host=host,
+        user=user,
+        password=password,
+        database=db_name,
+        connect_timeout=10,
+        cursorclass=pymysql.cursors.SSCursor
+    )
+    try:
+        with conn.cursor() as cursor:
+            condition, params = (" WHERE id > %s", (int(min_id),)) if min_id is not None else ("", None)
+            cursor.execute(f"SELECT {', '.join(columns)} FROM {table_name}{condition};", params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield pd.DataFrame(rows, columns=columns)
+
+    finally:
+        conn.close()
+
+
+def fetch_table_state(host: str, user: str, password: str, db_name: str, table_name: str, columns: list, last_id: int = None) -> tuple:
+    """
+    Fetches the row count, the max id and the checksums of a table, to check whether a local copy is current.
+
+    A row checksum is the CRC32 of its `columns`, the table checksum is their XOR:
+    rows upserted in place change it, as well as added or removed ones. It reads
+    the columns of every row, but only sends one row back.
+
+    Args:
+        host (str): The host address of the MySQL server.
+        user (str): The username to authenticate with the MySQL server.
+        password (str): The password to authenticate with the MySQL server.
+        db_name (str): The name of the database to connect to.
+        table_name (str): The name of the table.
+        columns (list): The columns of the checksum, id included so that identical rows do not cancel out.
+        last_id (int, optional): The last id of the local copy. Defaults to None.
+
+    Returns:
+        tuple: The row count, the max id (None for an empty table), the checksum of
+        the table and the checksum of its rows with a greater id than `last_id`.
+    """
+    conn = pymysql.connect(
+        host=host,
+        user=user,
+        password=password,
+        database=db_name,
+        connect_timeout=10
+    )
+    try:
+        row_checksum = f"CRC32(CONCAT_WS('|', {', '.join(columns)}))"
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*), MAX(id), BIT_XOR({row_checksum}), BIT_XOR(IF(id > %s, {row_checksum}, 0)) FROM {table_name};",
+                (int(last_id) if last_id is not None else 0,)
+            )
+            count, max_id, checksum, new_checksum = cursor.fetchone()
+        return int(count), int(max_id) if max_id is not None else None, int(checksum), int(new_checksum)
+
+    finally:
+        conn.close()
+
+
+def fetch_articles(host: str, user: str, password: str, db_name: str, table_name: str, ids: list, batch_size: int = 1000) -> dict:
+    """
+    Fetches the article bodies of the given row ids.
+
+    Args:
+        host (str): The host address of the MySQL server.
+        user (str): The username to authenticate with the MySQL server.
+        password (str): The password to authenticate with the MySQL server.
+        db_name (str): The name of the database to connect to.
+        table_name (str): The name of the table to fetch data from.
+        ids (list): The ids of the rows.
+        batch_size (int, optional): Number of ids per query. Defaults to 1000.
+
+    Returns:
+        dict: The article body of each id found.
+    """
+    articles = {}
+    conn = pymysql.connect(
+        host=host,
+        user=user,
+        password=password,
+        database=db_name,
+        connect_timeout=10
+    )
+    try:
+        with conn.cursor() as cursor:
+            for start in range(0, len(ids), batch_size):
+                batch = list(ids[start:start + batch_size])
+                placeholders = ", ".join(["%s"] * len(batch))
+                cursor.execute(f"SELECT id, article FROM {table_name} WHERE id IN ({placeholders});", batch)
+                articles.update(cursor.fetchall())
+        return articles
+
+    finally:
+        conn.close()
+
+
+def standardize_columns(df: pd.DataFrame, columns_to_fix: list, reference: pd.DataFrame = None) -> pd.DataFrame:
     """
     Standardizes the values in the specified columns by normalizing the text and 
     replacing values with the most frequent occurrence for each normalized value.
@@ -57,41 +251,56 @@ def standardize_columns(df: pd.DataFrame, columns_to_fix: list) -> pd.DataFrame:
     Args:
         df (pd.DataFrame): The DataFrame to process.
         columns_to_fix (list): A list of column names to standardize.
+        reference (pd.DataFrame, optional): Already standardized data whose values are kept
+                                            for the normalized values it contains. Defaults to None.
 
     Returns:
         pd.DataFrame: A DataFrame with standardized values in the specified columns.
     """
     for col in columns_to_fix:
-        # Normalize the values into a temporary column
-        df[f"{col}_normalized"] = df[col].apply(lambda x: normalize_text(x, keep_alphanum=True))
-        
-        # Get the most frequent value for each normalized occurrence
+        # Count each distinct spelling and normalize it once
+        counts = df[col].value_counts(sort=False)
+        spellings = pd.DataFrame({
+            'value': counts.index,
+            'count': counts.to_numpy(),
+            'normalized': normalize_values(counts.index.to_series(), keep_alphanum=True).to_numpy(),
+        })
+
+        # Get the most frequent value for each normalized occurrence, the smallest one on ties as Series.mode
         most_frequent_mapping = (
-            df.groupby(f"{col}_normalized")[col]
-            .agg(lambda x: x.mode()[0])  # Get the most frequent value
+            spellings.sort_values(['normalized', 'count', 'value'], ascending=[True, False, True])
+            .drop_duplicates('normalized')
+            .set_index('normalized')['value']
             .to_dict()
         )
 
-        # Replace values in the original column by the most frequent one from the normalized column
-        df[col] = df[f"{col}_normalized"].map(most_frequent_mapping)
+        # Keep the spelling already used by the reference data for known values
+        if reference is not None:
+            known_values = pd.Series(reference[col].dropna().unique(), dtype=object)
+            most_frequent_mapping.update(zip(normalize_values(known_values, keep_alphanum=True), known_values))
 
-        # Drop the temporary normalized column
-        df = df.drop(columns=[f"{col}_normalized"])
+        # Replace each distinct value by the most frequent one of its normalized value
+        replacements = dict(zip(spellings['value'], spellings['normalized'].map(most_frequent_mapping)))
+        codes, uniques = pd.factorize(df[col])
+        standardized = pd.Index([replacements[value] for value in uniques], dtype=object)
+        df[col] = pd.Series(standardized.take(codes, allow_fill=True, fill_value=None), index=df.index, dtype=object).where(codes >= 0)
     return df
 
-def clean_data(df: pd.DataFrame) -> pd.DataFrame:
+def clean_data(df: pd.DataFrame, reference: pd.DataFrame = None) -> pd.DataFrame:
     """
     Cleans and processes the DataFrame by renaming columns, replacing specific values,
     and performing data normalization and transformation.
 
     Args:
         df (pd.DataFrame): The DataFrame to clean and process.
+        reference (pd.DataFrame, optional): Already cleaned data, whose standardized values
+                                            are reused for new rows. Defaults to None.
 
     Returns:
         pd.DataFrame: A cleaned and transformed DataFrame.
     """
-    # Drop unnecessary columns
-    df = df.drop(['id', 'nb_articles'], axis=1)
+    # Drop unnecessary columns and index the rows by their id
+    df = df.drop(['nb_articles'], axis=1).set_index('id')
 
     # Replace values in the "factuel" and "nuance" columns with 'Oui' and 'Non'
     df["factuel"] = df["factuel"].replace({0: 'Non', 1: 'Oui'})
@@ -119,14 +328,15 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     }
     df = df.rename(columns=rename_dict)
 
-    # Move the 'Article' column to the end
-    df["Article"] = df.pop("Article") 
+    # Move the 'Article' column to the end, when the bodies are not loaded lazily
+    if "Article" in df.columns:
+        df["Article"] = df.pop("Article") 
 
     # Convert the "Date" column to datetime format
     df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y')
     
     # Standardize values in the specified columns
     columns_to_fix = ['Territoire', 'Thème', 'Média']
-    df = standardize_columns(df, columns_to_fix)
+    df = standardize_columns(df, columns_to_fix, reference=reference)
 
     return df
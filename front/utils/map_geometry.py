@@ -0,0 +1,92 @@
+import numpy as np
+
+# Simplification tolerance and kept decimals of the coordinates, in degrees (0.001° is about 100 m)
+SIMPLIFY_TOLERANCE = 0.005
+COORDINATE_DECIMALS = 3
+
+
+def simplify_line(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Douglas-Peucker simplification: keeps the points farther than `tolerance`
+    from the segment joining the points kept around them.
+
+    Args:
+        points (np.ndarray): The (n, 2) coordinates of the line, or of a closed ring.
+        tolerance (float): The largest distance of a removed point to the simplified line.
+
+    Returns:
+        np.ndarray: The kept points, the first and last ones included.
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(*segment)
+        if length:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        else:
+            # Closed ring: distance to its first point
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            middle = start + 1 + farthest
+            keep[middle] = True
+            stack.extend([(start, middle), (middle, end)])
+    return points[keep]
+
+
+def simplify_ring(ring: list, tolerance: float, decimals: int):
+    """A simplified and rounded ring, or None when it collapses below a triangle."""
+    points = np.round(simplify_line(np.asarray(ring, dtype=float), tolerance), decimals)
+    # Rounding can make consecutive points identical
+    points = points[np.r_[True, np.any(np.diff(points, axis=0) != 0, axis=1)]]
+    if len(points) < 4:
+        return None
+    return points.tolist()
+
+
+def simplify_polygon(polygon: list, tolerance: float, decimals: int):
+    """A simplified polygon (exterior ring then holes), None when its exterior ring collapses."""
+    rings = [simplify_ring(ring, tolerance, decimals) for ring in polygon]
+    if rings[0] is None:
+        return None
+    return [ring for ring in rings if ring is not None]
+
+
+def simplify_geojson(geojson: dict, tolerance: float = SIMPLIFY_TOLERANCE, decimals: int = COORDINATE_DECIMALS,
+                     properties: list = ['nom']) -> dict:
+    """
+    Simplifies and quantizes the polygons of a GeoJSON feature collection, so that
+    the map sent to the browsers is lighter. The polygons that collapse are dropped,
+    unless they are all the polygons of a feature, which are then only rounded.
+
+    Args:
+        geojson (dict): A GeoJSON FeatureCollection of Polygon and MultiPolygon features.
+        tolerance (float, optional): Douglas-Peucker tolerance, in degrees. Defaults to SIMPLIFY_TOLERANCE.
+        decimals (int, optional): Decimals kept in the coordinates. Defaults to COORDINATE_DECIMALS.
+        properties (list, optional): Feature properties kept. Defaults to ['nom'], the key of the map locations.
+
+    Returns:
+        dict: The simplified FeatureCollection.
+    """
+    features = []
+    for feature in geojson['features']:
+        geometry = feature['geometry']
+        polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+
+        simplified = [polygon for polygon in (simplify_polygon(p, tolerance, decimals) for p in polygons) if polygon is not None]
+        if not simplified:
+            simplified = [simplify_polygon(p, 0, decimals) or p for p in polygons]
+
+        features.append({
+            'type': 'Feature',
+            'properties': {key: feature['properties'][key] for key in properties if key in feature['properties']},
+            'geometry': {'type': 'MultiPolygon', 'coordinates': simplified} if len(simplified) > 1 else
+                        {'type': 'Polygon', 'coordinates': simplified[0]},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
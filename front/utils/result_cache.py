@@ -0,0 +1,216 @@
+import os
+import re
+import json
+import stat
+import time
+import uuid
+import pickle
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils.shared_utils import normalize_text
+
+
+def canonical_filters(filters: list) -> dict:
+    """
+    Builds the canonical form of the dashboard filters: the filtered rows do not
+    depend on the order or repetition of the selected values and keywords, nor on
+    the format of the dates.
+
+    Args:
+        filters (list): [theme, tonalite, territory, media, start_date, end_date, keywords], as given to filter_df.
+
+    Returns:
+        dict: The canonical filters.
+    """
+    theme, tonalite, territory, media, start_date, end_date, keywords = filters
+    keywords_list = re.split(r'[,\s;]+', keywords.strip()) if keywords and keywords.strip() else []
+    return {
+        "selections": [sorted(set(values), key=str) if values else None for values in (theme, tonalite, territory, media)],
+        "dates": [pd.Timestamp(start_date).isoformat(), pd.Timestamp(end_date).isoformat()] if start_date and end_date else None,
+        # Every keyword must match, their order does not matter
+        "keywords": sorted({normalize_text(kw) for kw in keywords_list if kw.strip()}),
+    }
+
+
+def data_version(df: pd.DataFrame) -> str:
+    """
+    Version of the dashboard data: its row count, last id and the checksum of its
+    table rows (`df.attrs["checksum"]`, set by utils.snapshot), which changes when
+    rows are upserted in place. Data without a known checksum gets a version of its
+    own, never shared with another process.
+    """
+    checksum = df.attrs.get("checksum")
+    if checksum is None:
+        checksum = df.attrs.setdefault("version_token", uuid.uuid4().hex)
+    return f"{len(df)}-{int(df.index.max()) if len(df) else 0}-{checksum}"
+
+
+def result_key(version: str, filters: list) -> str:
+    """Cache key of the visualizations of the data of a version, filtered."""
+    payload = {"version": version, "filters": canonical_filters(filters)}
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class LRUResultBackend:
+    """In-process cache of the last computed visualizations."""
+
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def private_directory(path: str) -> None:
+    """
+    Creates the directory of the cache, readable and writable by the dashboard user
+    only. The cached values are unpickled: a directory other users can write to
+    would let them run code in the dashboard.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    status = os.stat(path)
+    if status.st_uid != os.getuid() or status.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"{path} must be owned by the dashboard user and not writable by others")
+
+
+class SQLiteResultBackend:
+    """On-disk cache, shared by the workers serving the dashboard on the same host."""
+
+    def __init__(self, path, max_size=256):
+        self.path = path
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        private_directory(os.path.dirname(os.path.abspath(path)))
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        os.chmod(path, 0o600)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS dashboard_cache ("
+            "key TEXT PRIMARY KEY, value BLOB, accessed_at REAL)"
+        )
+        self.db.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM dashboard_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE dashboard_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            return pickle.loads(row[0])
+
+    def set(self, key, value):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO dashboard_cache (key, value, accessed_at) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time()),
+            )
+            # Evict the least recently used entries above the size limit
+            self.db.execute(
+                "DELETE FROM dashboard_cache WHERE key IN ("
+                "SELECT key FROM dashboard_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+            self.db.commit()
+
+    def clear(self):
+        # The entries of other data versions are evicted as the new ones are used
+        pass
+
+
+class ResultCache:
+    """
+    Caches the visualizations of the dashboard per canonical filters and data
+    version. A cache error never breaks the dashboard: it is reported and
+    counted as a miss.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"Error reading the dashboard cache: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            print(f"Error writing the dashboard cache: {e}")
+
+    def invalidate(self, df: pd.DataFrame) -> None:
+        """Drops the entries of the previous data once a new version is served."""
+        version = data_version(df)
+        if version != self.version:
+            self.version = version
+            self.backend.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def result_cache_from_env(path: str):
+    """
+    Builds the cache configured by the environment:
+        DASHBOARD_CACHE_BACKEND: "lru", "sqlite" or "none" (default "lru")
+        DASHBOARD_CACHE_MAX_SIZE: maximum number of cached filter states
+
+    Args:
+        path (str): The SQLite file of the "sqlite" backend, in a directory private to the dashboard.
+    """
+    backend_name = os.environ.get("DASHBOARD_CACHE_BACKEND", "lru").lower()
+    max_size = os.environ.get("DASHBOARD_CACHE_MAX_SIZE")
+
+    try:
+        if backend_name == "none":
+            return None
+        if backend_name == "sqlite":
+            backend = SQLiteResultBackend(
+                path=path,
+                max_size=int(max_size or 256),
+            )
+        else:
+            backend = LRUResultBackend(max_size=int(max_size or 32))
+    except Exception as e:
+        print(f"Error initializing the dashboard cache, running without cache: {e}")
+        return None
+
+    return ResultCache(backend)
@@ -0,0 +1,313 @@
+import os
+import re
+import pickle
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.shared_utils import normalize_text
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Index dtype of the row ids, the table ids stay far below 2**32
+ROW_ID_DTYPE = np.uint32
+
+# Segments added by refreshes before they are merged into one
+MAX_SEGMENTS = 8
+
+
+class Segment(NamedTuple):
+    """Row ids of a batch of rows, grouped by token id (ids[offsets[t]:offsets[t + 1]] for token t)."""
+    offsets: np.ndarray
+    ids: np.ndarray
+
+
+def searchable_text(subject, article) -> str:
+    """The text matched by the keyword search, as in dash_filtering.filter_df."""
+    return normalize_text(f"{subject} {article}")
+
+
+def build_segment(token_ids: np.ndarray, row_ids: np.ndarray, vocabulary_size: int) -> Segment:
+    """Groups (token id, row id) pairs by token, the row ids being sorted within each token."""
+    order = np.lexsort((row_ids, token_ids))
+    counts = np.bincount(token_ids, minlength=vocabulary_size)
+    offsets = np.zeros(vocabulary_size + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return Segment(offsets, row_ids[order].astype(ROW_ID_DTYPE, copy=False))
+
+
+def merge_segments(segments: list, vocabulary_size: int) -> Segment:
+    token_ids = np.concatenate([
+        np.repeat(np.arange(len(segment.offsets) - 1), np.diff(segment.offsets)) for segment in segments
+    ])
+    row_ids = np.concatenate([segment.ids for segment in segments])
+    return build_segment(token_ids, row_ids, vocabulary_size)
+
+
+def token_starts(tokens: list, offset: int = 0) -> np.ndarray:
+    """Positions of the tokens in their line-separated concatenation."""
+    lengths = np.fromiter((len(token) + 1 for token in tokens), dtype=np.int64, count=len(tokens))
+    return offset + np.cumsum(lengths) - lengths
+
+
+class IndexState(NamedTuple):
+    """What the searches read, replaced as a whole when rows are indexed."""
+    vocabulary_text: str
+    token_starts: np.ndarray
+    segments: list
+    max_id: Optional[int]
+
+
+class SearchIndex:
+    """
+    Inverted index of the keyword search: each normalized token of the subject
+    and body of a row maps to the sorted ids of the rows containing it.
+
+    A keyword matches a row when it is a substring of its normalized text. A
+    keyword made of word characters only lies within one token, so its rows are
+    the union of the postings of the vocabulary tokens containing it, found with
+    `str.find` in the joined vocabulary. Other keywords (e.g. "pas-de-calais")
+    are narrowed by their word parts and returned to be checked in the text.
+
+    Rows are indexed once and in increasing id order: new rows go into a new
+    segment, and segments are merged when there are more than MAX_SEGMENTS.
+    Rows whose id is greater than `max_id` are not indexed yet. Searches read
+    an immutable state, swapped when rows are indexed by a single writer.
+
+    `checksum` is the one of the table rows when they were indexed (see
+    sync_search_index): rows changed in place since then are not in the index.
+    """
+
+    def __init__(self, cache_size: int = 1024):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Empties the index."""
+        self.vocabulary = {}
+        self.tokens = []
+        self.row_ids = np.zeros(0, dtype=ROW_ID_DTYPE)
+        self.checksum = None
+        self.state = IndexState("", np.zeros(0, dtype=np.int64), [], None)
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    @property
+    def max_id(self) -> Optional[int]:
+        return self.state.max_id
+
+    ## Indexing
+
+    def add(self, rows: Iterable[Tuple[int, str]]) -> int:
+        """
+        Indexes rows given as (id, normalized text), with ids greater than `max_id`.
+
+        Returns:
+            int: The number of rows indexed.
+        """
+        state = self.state
+        token_ids, row_ids, new_row_ids = array('I'), array('I'), array('I')
+        for row_id, text in rows:
+            if state.max_id is not None and row_id <= state.max_id:
+                continue
+            tokens = {self.vocabulary.setdefault(token, len(self.vocabulary)) for token in TOKEN_PATTERN.findall(text)}
+            token_ids.extend(tokens)
+            row_ids.extend([row_id] * len(tokens))
+            new_row_ids.append(row_id)
+        if not new_row_ids:
+            return 0
+
+        # The vocabulary keeps the insertion order, which is the token id order
+        new_tokens = list(islice(self.vocabulary, len(self.tokens), None))
+        self.tokens.extend(new_tokens)
+        self.row_ids = np.concatenate([self.row_ids, np.sort(np.frombuffer(new_row_ids, dtype=np.uint32)).astype(ROW_ID_DTYPE)])
+
+        segments = state.segments + [build_segment(
+            np.frombuffer(token_ids, dtype=np.uint32).astype(np.int64),
+            np.frombuffer(row_ids, dtype=np.uint32),
+            len(self.tokens),
+        )]
+        if len(segments) > MAX_SEGMENTS:
+            segments = [merge_segments(segments, len(self.tokens))]
+        self.state = IndexState(
+            state.vocabulary_text + "".join(f"{token}\n" for token in new_tokens),
+            np.concatenate([state.token_starts, token_starts(new_tokens, len(state.vocabulary_text))]),
+            segments,
+            int(self.row_ids[-1]),
+        )
+        return len(new_row_ids)
+
+    def add_chunks(self, chunks: Iterable[pd.DataFrame]) -> int:
+        """Indexes chunks of rows with 'id', 'sujet' and 'article' columns, as streamed from the table."""
+        return self.add(
+            (int(row_id), searchable_text(subject, article))
+            for chunk in chunks
+            for row_id, subject, article in zip(chunk['id'], chunk['sujet'], chunk['article'])
+        )
+
+    ## Search
+
+    def rows_containing(self, keyword: str, state: IndexState) -> np.ndarray:
+        """Sorted ids of the rows with a token containing the keyword (word characters only)."""
+        with self.lock:
+            cached = self.cache.get(keyword)
+            if cached is not None and cached[0] is state:
+                self.cache.move_to_end(keyword)
+                return cached[1]
+
+        # Tokens containing the keyword, a keyword without line break never spans two of them
+        positions = []
+        position = state.vocabulary_text.find(keyword)
+        while position != -1:
+            positions.append(position)
+            position = state.vocabulary_text.find(keyword, position + 1)
+        token_ids = np.unique(np.searchsorted(state.token_starts, positions, side='right') - 1)
+
+        postings = [
+            segment.ids[segment.offsets[token_id]:segment.offsets[token_id + 1]]
+            for segment in state.segments
+            for token_id in token_ids
+            if token_id < len(segment.offsets) - 1
+        ]
+        if not postings:
+            rows = np.zeros(0, dtype=ROW_ID_DTYPE)
+        elif len(token_ids) == 1:
+            # The segments hold increasing ids, their postings are sorted once concatenated
+            rows = np.concatenate(postings)
+        else:
+            rows = np.unique(np.concatenate(postings))
+
+        with self.lock:
+            self.cache[keyword] = (state, rows)
+            self.cache.move_to_end(keyword)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return rows
+
+    def search(self, keywords: List[str]) -> Tuple[Optional[np.ndarray], List[str], Optional[int]]:
+        """
+        Finds the indexed rows containing all the normalized keywords.
+
+        Returns:
+            tuple: The sorted ids of the candidate rows (None when no keyword narrows
+                   them), the keywords to check in the text of these candidates, and
+                   the last indexed id (None when nothing is indexed yet).
+        """
+        state = self.state
+        candidates, unresolved = [], []
+        for keyword in keywords:
+            if not keyword:
+                # Every text contains the empty string
+                continue
+            if TOKEN_PATTERN.fullmatch(keyword):
+                candidates.append(self.rows_containing(keyword, state))
+            else:
+                # Each word part is within a token, the whole keyword is checked afterwards
+                candidates.extend(self.rows_containing(part, state) for part in TOKEN_PATTERN.findall(keyword))
+                unresolved.append(keyword)
+
+        if not candidates:
+            return None, unresolved, state.max_id
+        candidates.sort(key=len)
+        rows = candidates[0]
+        for other in candidates[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows, unresolved, state.max_id
+
+    ## Persistence
+
+    def save(self, path: str) -> None:
+        """Saves the index next to the dashboard snapshot."""
+        state = {
+            "tokens": self.tokens,
+            "segments": [tuple(segment) for segment in self.state.segments],
+            "row_ids": self.row_ids,
+            "checksum": self.checksum,
+        }
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(f"{path}.tmp", "wb") as file:
+                pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            print(f"Error saving the search index: {e}")
+
+    def restore(self, path: str) -> bool:
+        """
+        Replaces the content of the index by the one saved by `save`.
+
+        Returns:
+            bool: Whether a readable index was found.
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as file:
+                saved = pickle.load(file)
+        except Exception as e:
+            print(f"Error reading the search index: {e}")
+            return False
+
+        self.tokens = saved["tokens"]
+        self.vocabulary = {token: token_id for token_id, token in enumerate(self.tokens)}
+        self.row_ids = saved["row_ids"]
+        self.checksum = saved.get("checksum")
+        self.state = IndexState(
+            "".join(f"{token}\n" for token in self.tokens),
+            token_starts(self.tokens),
+            [Segment(*segment) for segment in saved["segments"]],
+            int(self.row_ids[-1]) if len(self.row_ids) else None,
+        )
+        return True
+
+
+def sync_search_index(
+    index: SearchIndex,
+    df: pd.DataFrame,
+    stream_rows: Callable[[Optional[int]], Iterator[pd.DataFrame]],
+    table_state: Optional[Callable[[Optional[int]], Tuple[int, Optional[int], int, int]]] = None,
+) -> int:
+    """
+    Brings a search index up to date with the dashboard data.
+
+    The rows added since the index was built are streamed with `stream_rows(min_id)`
+    and indexed. The index is rebuilt from the whole table if rows of the data up
+    to the last indexed id are missing from it (the data was reloaded), or if
+    their checksum changed (rows re-labelled in place, their text may differ).
+
+    `table_state(last_id)` gives the checksums of the indexed columns as
+    utils.load_and_clean_df.fetch_table_state: the one of the table and the one
+    of the rows with a greater id than `last_id`. Without it, only the missing
+    rows are checked.
+
+    Returns:
+        int: The number of rows indexed.
+    """
+    if index.max_id is not None and not np.isin(df.index[df.index <= index.max_id], index.row_ids).all():
+        print("Search index outdated, rebuilding it.")
+        index.reset()
+
+    checksum = index.checksum
+    if table_state is not None:
+        # Read before streaming: rows changed meanwhile make the index outdated, never current
+        _, _, checksum, new_checksum = table_state(index.max_id)
+        if index.max_id is not None and index.checksum != checksum ^ new_checksum:
+            print("Search index outdated, rows were changed in place, rebuilding it.")
+            index.reset()
+
+    if not len(df) or (index.max_id is not None and df.index.max() <= index.max_id):
+        return 0
+    added = index.add_chunks(stream_rows(index.max_id))
+    index.checksum = checksum
+    print(f"Search index updated with {added} rows ({len(index)} rows indexed).")
+    return added
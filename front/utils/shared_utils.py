@@ -2,16 +2,45 @@ import re
 import unicodedata
 import pandas as pd
 
+NON_ALPHANUMERIC_PATTERN = re.compile(r'[^a-zA-Z0-9]')
+
+class AccentTranslationTable(dict):
+    """
+    str.translate table removing the accents, filled on demand with the NFD
+    decomposition of each character without its combining marks (category Mn).
+    """
+    def __missing__(self, code: int) -> str:
+        self[code] = ''.join(
+            c for c in unicodedata.normalize('NFD', chr(code))
+            if unicodedata.category(c) != 'Mn'
+        )
+        return self[code]
+
+ACCENT_TABLE = AccentTranslationTable()
+
 def normalize_text(text, keep_alphanum=False):
     if pd.notna(text):
         # convert text to lowercase and remove accents
         text = str(text).lower().strip()
-        normalized_text = ''.join(
-            c for c in unicodedata.normalize('NFD', text) 
-            if unicodedata.category(c) != 'Mn'
-        )
+        normalized_text = text if text.isascii() else text.translate(ACCENT_TABLE)
         # remove non-alphanumeric characters
         if keep_alphanum:
-            normalized_text = re.sub(r'[^a-zA-Z0-9]', '', normalized_text)
+            normalized_text = NON_ALPHANUMERIC_PATTERN.sub('', normalized_text)
         return normalized_text
     return text
+
+def normalize_values(values: pd.Series, keep_alphanum: bool = False) -> pd.Series:
+    """
+    Applies normalize_text to a Series, computing each distinct value only once.
+
+    Args:
+        values (pd.Series): The values to normalize.
+        keep_alphanum (bool, optional): Whether to keep only the alphanumeric characters. Defaults to False.
+
+    Returns:
+        pd.Series: The normalized values, with the same index.
+    """
+    codes, uniques = pd.factorize(values)
+    normalized = pd.Index([normalize_text(value, keep_alphanum) for value in uniques], dtype=object)
+    # Missing values have the code -1 and stay missing
+    return pd.Series(normalized.take(codes, allow_fill=True, fill_value=None), index=values.index, dtype=object).where(codes >= 0)
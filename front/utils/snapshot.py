@@ -0,0 +1,161 @@
+import os
+import json
+import time
+from typing import Callable, Optional, Tuple
+
+import pandas as pd
+
+
+def snapshot_metadata_path(path: str) -> str:
+    return f"{path}.json"
+
+
+def save_snapshot(df: pd.DataFrame, path: str, checksum: Optional[int] = None) -> None:
+    """
+    Saves the cleaned dashboard DataFrame as a Parquet file, with a JSON sidecar
+    holding its row count, max id and table checksum to compare it with the database.
+
+    Args:
+        df (pd.DataFrame): The cleaned DataFrame, indexed by row id.
+        path (str): The path of the Parquet snapshot.
+        checksum (int, optional): The checksum of the table rows of the DataFrame, read
+            before loading them. Defaults to None, a snapshot that is reloaded at startup.
+    """
+    metadata = {
+        "count": len(df),
+        "max_id": int(df.index.max()) if len(df) else None,
+        "checksum": checksum,
+        "saved_at": time.time(),
+    }
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Write to temporary files first, a snapshot is never left half written
+        df.to_parquet(f"{path}.tmp", engine="pyarrow")
+        with open(f"{path}.json.tmp", "w", encoding="utf-8") as file:
+            json.dump(metadata, file)
+        os.replace(f"{path}.tmp", path)
+        os.replace(f"{path}.json.tmp", snapshot_metadata_path(path))
+    except Exception as e:
+        print(f"Error saving the dashboard snapshot: {e}")
+
+
+def stamp_checksum(df: pd.DataFrame, checksum: Optional[int]) -> pd.DataFrame:
+    """Records the checksum of the rows of the DataFrame served, its version in utils.result_cache."""
+    df.attrs.pop("version_token", None)
+    df.attrs["checksum"] = checksum
+    return df
+
+
+def read_snapshot_metadata(path: str) -> Optional[dict]:
+    """The metadata of a snapshot saved by `save_snapshot`, or None if there is none."""
+    if not os.path.exists(snapshot_metadata_path(path)):
+        return None
+    try:
+        with open(snapshot_metadata_path(path), encoding="utf-8") as file:
+            return json.load(file)
+    except Exception as e:
+        print(f"Error reading the dashboard snapshot metadata: {e}")
+        return None
+
+
+def read_snapshot(path: str) -> Optional[Tuple[pd.DataFrame, dict]]:
+    """
+    Reads a snapshot saved by `save_snapshot`.
+
+    Returns:
+        tuple: The DataFrame and its metadata, or None if there is no readable snapshot.
+    """
+    metadata = read_snapshot_metadata(path)
+    if metadata is None or not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path, engine="pyarrow"), metadata
+    except Exception as e:
+        print(f"Error reading the dashboard snapshot: {e}")
+        return None
+
+
+def load_with_snapshot(
+    path: str,
+    table_state: Callable[[Optional[int]], Tuple[int, Optional[int], int, int]],
+    load: Callable[[], pd.DataFrame],
+    load_since: Callable[[int, pd.DataFrame], Optional[pd.DataFrame]],
+) -> pd.DataFrame:
+    """
+    Loads the dashboard data from the local snapshot when it is current.
+
+    The snapshot is validated with the state of the table (`table_state`, one
+    query returning the row count, the max id, the table checksum and the checksum
+    of the rows added after the snapshot). Both checksums give the one of the rows
+    of the snapshot as they are now: if it differs, rows were upserted in place or
+    removed and everything is reloaded with `load`. Otherwise the rows with a
+    greater id are fetched with `load_since` and appended. The snapshot is then updated.
+
+    Returns:
+        pd.DataFrame: The cleaned dashboard data.
+    """
+    snapshot = read_snapshot(path)
+    last_id = snapshot[1]["max_id"] if snapshot is not None else None
+    # Read before loading: rows changed meanwhile make the saved snapshot outdated, never current
+    count, max_id, checksum, new_checksum = table_state(last_id)
+    df = None
+
+    if snapshot is not None:
+        df, metadata = snapshot
+        if metadata["max_id"] is None or metadata.get("checksum") != checksum ^ new_checksum:
+            # Rows were changed or removed since the snapshot
+            print("Dashboard snapshot outdated, reloading the table.")
+            df = None
+        elif max_id == metadata["max_id"]:
+            print(f"Dashboard snapshot up to date ({count} rows).")
+            return stamp_checksum(df, checksum)
+        else:
+            new_rows = load_since(metadata["max_id"], df)
+            if new_rows is not None:
+                df = pd.concat([df, new_rows])
+            print(f"Dashboard snapshot updated with {len(df) - metadata['count']} new rows.")
+            if len(df) != count:
+                print("Dashboard snapshot outdated, reloading the table.")
+                df = None
+
+    if df is None:
+        df = load()
+    save_snapshot(df, path, checksum)
+    return stamp_checksum(df, checksum)
+
+
+class SnapshotRefresh:
+    """
+    Saves the refreshes of a DataStore to the snapshot, with its checksum.
+
+    `load_since` is the one of the store: it reads the checksum of the rows added
+    since the last load before loading them, and `save` (called from `on_update`)
+    adds it to the checksum of the snapshot being extended. The rows changed in
+    place are not refreshed: they stay out of the checksum, and the snapshot is
+    reloaded at the next startup.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table_state: Callable[[Optional[int]], Tuple[int, Optional[int], int, int]],
+        load_since: Callable[[int, pd.DataFrame], Optional[pd.DataFrame]],
+    ):
+        self.path = path
+        self.table_state = table_state
+        self._load_since = load_since
+        self.checksum = None
+
+    def load_since(self, last_id: int, current_df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        metadata = read_snapshot_metadata(self.path)
+        _, _, _, new_checksum = self.table_state(last_id)
+        # The snapshot must hold the current rows, a failed save leaves it behind
+        if metadata is not None and metadata["max_id"] == last_id and metadata.get("checksum") is not None:
+            self.checksum = metadata["checksum"] ^ new_checksum
+        else:
+            self.checksum = None
+        return self._load_since(last_id, current_df)
+
+    def save(self, df: pd.DataFrame) -> None:
+        save_snapshot(df, self.path, self.checksum)
+        stamp_checksum(df, self.checksum)
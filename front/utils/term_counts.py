@@ -0,0 +1,243 @@
+import os
+import re
+import json
+import pickle
+import hashlib
+from array import array
+from collections import defaultdict
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Words as split by WordCloud.process_text
+WORD_PATTERN = re.compile(r"\w[\w']*")
+
+# Index dtype of the row ids, the table ids stay far below 2**32
+ROW_ID_DTYPE = np.uint32
+
+
+def text_words(text, stopwords: set) -> list:
+    """
+    Words of a text counted in the word cloud, filtered as WordCloud.process_text
+    does without collocations: "'s" suffixes, numbers and stop words are removed.
+    """
+    if not isinstance(text, str):
+        return []
+    words = (word[:-2] if word.lower().endswith("'s") else word for word in WORD_PATTERN.findall(text))
+    return [word for word in words if not word.isdigit() and word.lower() not in stopwords]
+
+
+def fuse_word_counts(counts: Dict[str, int]) -> Dict[str, int]:
+    """
+    Merges the counts of the cases and plurals of each word, as
+    wordcloud.tokenization.process_tokens does for a list of words: a word is
+    shown with its most common case, and a word ending with "s" (but not "ss")
+    is counted with its singular when the singular is also present.
+    """
+    cases = defaultdict(dict)
+    for word, count in counts.items():
+        cases[word.lower()][word] = count
+
+    for key in list(cases):
+        if key.endswith('s') and not key.endswith('ss') and key[:-1] in cases:
+            singular_cases = cases[key[:-1]]
+            for word, count in cases.pop(key).items():
+                singular_cases[word[:-1]] = singular_cases.get(word[:-1], 0) + count
+
+    return {max(word_cases.items(), key=lambda item: item[1])[0]: sum(word_cases.values()) for word_cases in cases.values()}
+
+
+def frequency_fingerprint(frequencies: Dict[str, float], max_words: int) -> str:
+    """
+    Fingerprint of the word cloud drawn from frequencies: its `max_words` most
+    frequent words, with their frequency relative to the first one.
+    """
+    top_words = sorted(frequencies.items(), key=lambda item: (-item[1], item[0]))[:max_words]
+    highest = top_words[0][1] if top_words else 1
+    payload = [[word, round(count / highest, 3)] for word, count in top_words]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class TermCountsState(NamedTuple):
+    """What the word clouds read, replaced as a whole when rows are counted."""
+    words: list
+    row_ids: np.ndarray
+    matrix: sparse.csr_matrix
+
+
+class TermCounts:
+    """
+    Document-term matrix of the word cloud: the count of each word of the subject
+    and body of a row, stop words removed, held as a sparse CSR matrix with one
+    row per table row (in increasing id order) and one column per word.
+
+    The words of any filtered rows are counted by summing their matrix rows, so
+    the text of the articles is only split once. Rows whose id is greater than
+    `max_id` are not counted yet. Word clouds read an immutable state, swapped
+    when rows are counted by a single writer.
+    """
+
+    def __init__(self, stopwords: set):
+        self.stopwords = {word.lower() for word in stopwords or ()}
+        self.reset()
+
+    def reset(self) -> None:
+        """Empties the counts."""
+        self.vocabulary = {}
+        self.state = TermCountsState([], np.zeros(0, dtype=ROW_ID_DTYPE), sparse.csr_matrix((0, 0), dtype=np.int32))
+
+    def __len__(self) -> int:
+        return len(self.state.row_ids)
+
+    @property
+    def row_ids(self) -> np.ndarray:
+        return self.state.row_ids
+
+    @property
+    def max_id(self) -> Optional[int]:
+        row_ids = self.state.row_ids
+        return int(row_ids[-1]) if len(row_ids) else None
+
+    ## Counting
+
+    def add(self, rows: Iterable[Tuple[int, str]]) -> int:
+        """
+        Counts the words of rows given as (id, text), with ids greater than `max_id`.
+
+        Returns:
+            int: The number of rows counted.
+        """
+        state, max_id = self.state, self.max_id
+        # Built aside and swapped in: the state being read, or left by a failed read of the rows, never changes
+        vocabulary = dict(self.vocabulary)
+        word_ids, positions, new_row_ids = array('I'), array('I'), array('I')
+        for row_id, text in rows:
+            if max_id is not None and row_id <= max_id:
+                continue
+            row_words = text_words(text, self.stopwords)
+            word_ids.extend(vocabulary.setdefault(word, len(vocabulary)) for word in row_words)
+            positions.extend([len(new_row_ids)] * len(row_words))
+            new_row_ids.append(row_id)
+        if not new_row_ids:
+            return 0
+
+        # The vocabulary keeps the insertion order, which is the column order
+        words = state.words + list(islice(vocabulary, len(state.words), None))
+        # Duplicate (row, word) pairs are summed into counts
+        block = sparse.csr_matrix(
+            (np.ones(len(word_ids), dtype=np.int32), (np.frombuffer(positions, dtype=np.uint32), np.frombuffer(word_ids, dtype=np.uint32))),
+            shape=(len(new_row_ids), len(words)),
+        )
+        # The rows counted before have no count in the new columns
+        matrix = sparse.csr_matrix((state.matrix.data, state.matrix.indices, state.matrix.indptr), shape=(state.matrix.shape[0], len(words)))
+        new_row_ids = np.frombuffer(new_row_ids, dtype=np.uint32).astype(ROW_ID_DTYPE)
+        order = np.argsort(new_row_ids, kind='stable')
+
+        self.vocabulary = vocabulary
+        self.state = TermCountsState(
+            words,
+            np.concatenate([state.row_ids, new_row_ids[order]]),
+            sparse.vstack([matrix, block[order]], format='csr'),
+        )
+        return len(new_row_ids)
+
+    def add_chunks(self, chunks: Iterable[pd.DataFrame]) -> int:
+        """Counts chunks of rows with 'id', 'sujet' and 'article' columns, as streamed from the table."""
+        return self.add(
+            (int(row_id), ' '.join(text for text in (subject, article) if isinstance(text, str)))
+            for chunk in chunks
+            for row_id, subject, article in zip(chunk['id'], chunk['sujet'], chunk['article'])
+        )
+
+    ## Word clouds
+
+    def frequencies(self, ids, fetch_texts: Callable[[np.ndarray], Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Word frequencies of rows, as WordCloud.process_text gives for their joined text
+        (without collocations).
+
+        Args:
+            ids (array-like): Ids of the rows.
+            fetch_texts (callable, optional): Returns the texts of the given ids that are
+                not counted yet. Defaults to None, these rows being left out.
+
+        Returns:
+            dict: The frequency of each word.
+        """
+        state = self.state
+        ids = np.asarray(ids, dtype=np.int64)
+        positions = np.searchsorted(state.row_ids, ids).clip(max=max(len(state.row_ids) - 1, 0))
+        counted = (state.row_ids[positions] == ids) if len(state.row_ids) else np.zeros(len(ids), dtype=bool)
+
+        totals = np.asarray(state.matrix[positions[counted]].sum(axis=0)).ravel()
+        columns = np.flatnonzero(totals)
+        counts = dict(zip([state.words[column] for column in columns], totals[columns].tolist()))
+
+        if fetch_texts is not None and not counted.all():
+            for text in fetch_texts(ids[~counted]):
+                for word in text_words(text, self.stopwords):
+                    counts[word] = counts.get(word, 0) + 1
+
+        return fuse_word_counts(counts)
+
+    ## Persistence
+
+    def save(self, path: str) -> None:
+        """Saves the counts next to the dashboard snapshot."""
+        state = self.state
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(f"{path}.tmp", "wb") as file:
+                pickle.dump(
+                    {"words": state.words, "row_ids": state.row_ids, "matrix": state.matrix},
+                    file, protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            print(f"Error saving the word counts: {e}")
+
+    def restore(self, path: str) -> bool:
+        """
+        Replaces the counts by the ones saved by `save`.
+
+        Returns:
+            bool: Whether readable counts were found.
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as file:
+                saved = pickle.load(file)
+        except Exception as e:
+            print(f"Error reading the word counts: {e}")
+            return False
+
+        self.vocabulary = {word: column for column, word in enumerate(saved["words"])}
+        self.state = TermCountsState(saved["words"], saved["row_ids"], saved["matrix"])
+        return True
+
+
+def sync_term_counts(
+    term_counts: TermCounts,
+    df: pd.DataFrame,
+    stream_rows: Callable[[Optional[int]], Iterator[pd.DataFrame]],
+) -> int:
+    """
+    Brings the word counts up to date with the dashboard data, as sync_search_index
+    does for the search index.
+
+    Returns:
+        int: The number of rows counted.
+    """
+    if term_counts.max_id is not None and not np.isin(df.index[df.index <= term_counts.max_id], term_counts.row_ids).all():
+        print("Word counts outdated, rebuilding them.")
+        term_counts.reset()
+
+    if not len(df) or (term_counts.max_id is not None and df.index.max() <= term_counts.max_id):
+        return 0
+    added = term_counts.add_chunks(stream_rows(term_counts.max_id))
+    print(f"Word counts updated with {added} rows ({len(term_counts)} rows counted).")
+    return added
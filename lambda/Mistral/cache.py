@@ -0,0 +1,289 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import pymysql
+
+
+# Fields of the SQS message that end up in the prompt, and therefore in the key.
+ARTICLE_FIELDS = ["date", "territoire", "sujet", "media", "article"]
+
+
+def normalize_content(value):
+    """Collapse whitespace so re-uploads with a different layout share a key."""
+    if value is None:
+        return ""
+    return re.sub(r"\s+", " ", str(value)).strip()
+
+
+def cache_key(article, model_id, tools, inference_config):
+    """
+    Builds the cache key of a classification: a SHA-256 of the normalised
+    article content, the model id, the tool schema and the inference config.
+    """
+    payload = {
+        "article": {field: normalize_content(article.get(field)) for field in ARTICLE_FIELDS},
+        "model_id": model_id,
+        "tools": tools,
+        "inference_config": inference_config,
+    }
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class LRUCacheBackend:
+    """In-process cache, kept alive across warm invocations of the lambda."""
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, ttl):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            created_at, value = entry
+            if ttl and time.time() - created_at > ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.time(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+class SQLiteCacheBackend:
+    """On-disk cache. On lambda, only /tmp is writable."""
+
+    def __init__(self, path="/tmp/llm_cache.sqlite", max_size=10000):
+        self.path = path
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT, created_at REAL, accessed_at REAL)"
+        )
+        self.db.commit()
+
+    def get(self, key, ttl):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if ttl and time.time() - created_at > ttl:
+                self.db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.db.commit()
+                return None
+            self.db.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self.db.commit()
+            return json.loads(value)
+
+    def set(self, key, value):
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            # Evict the least recently used entries above the size limit
+            self.db.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+            self.db.commit()
+
+
+class RDSCacheBackend:
+    """
+    Cache stored in the RDS database next to the labelled articles, so that it is
+    shared by every concurrent lambda instance.
+
+    The connection is opened once per container and health-checked before each
+    use, as the one of the SQL writes. The entries above `max_size` are evicted at
+    most every `eviction_interval` seconds, the least recently used first, rather
+    than counting the table on every write.
+    """
+
+    def __init__(self, connect, table_name="llm_cache", max_size=100000, eviction_interval=300):
+        self.connect = connect
+        self.table_name = table_name
+        self.max_size = max_size
+        self.eviction_interval = eviction_interval
+        self.evicted_at = 0.0
+        self.db = None
+        db = self.__connection__()
+        with db.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table_name} ("
+                "cache_key CHAR(64) PRIMARY KEY, value TEXT, "
+                "created_at DOUBLE, accessed_at DOUBLE, INDEX (accessed_at))"
+            )
+        db.commit()
+
+    def __connection__(self):
+        if self.db is not None:
+            try:
+                # Checks the connection is alive and reopens it if it was dropped
+                self.db.ping(reconnect=True)
+                return self.db
+            except pymysql.MySQLError as e:
+                print("LLM cache connection lost, reconnecting: ", e)
+                try:
+                    self.db.close()
+                except Exception:
+                    pass
+                self.db = None
+        self.db = self.connect()
+        return self.db
+
+    def get(self, key, ttl):
+        db = self.__connection__()
+        with db.cursor() as cursor:
+            cursor.execute(
+                f"SELECT value, created_at FROM {self.table_name} WHERE cache_key = %s",
+                (key,),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if ttl and time.time() - created_at > ttl:
+                cursor.execute(
+                    f"DELETE FROM {self.table_name} WHERE cache_key = %s", (key,)
+                )
+                db.commit()
+                return None
+            cursor.execute(
+                f"UPDATE {self.table_name} SET accessed_at = %s WHERE cache_key = %s",
+                (time.time(), key),
+            )
+        db.commit()
+        return json.loads(value)
+
+    def set(self, key, value):
+        now = time.time()
+        db = self.__connection__()
+        with db.cursor() as cursor:
+            cursor.execute(
+                f"REPLACE INTO {self.table_name} (cache_key, value, created_at, accessed_at) "
+                "VALUES (%s, %s, %s, %s)",
+                (key, json.dumps(value), now, now),
+            )
+            if now - self.evicted_at >= self.eviction_interval:
+                self.evicted_at = now
+                self.__evict__(cursor)
+        db.commit()
+
+    def __evict__(self, cursor):
+        """Deletes the least recently used entries above the size limit."""
+        cursor.execute(f"SELECT COUNT(*) FROM {self.table_name}")
+        (size,) = cursor.fetchone()
+        if size > self.max_size:
+            cursor.execute(
+                f"DELETE FROM {self.table_name} ORDER BY accessed_at LIMIT %s",
+                (size - self.max_size,),
+            )
+
+
+class ResponseCache:
+    """
+    Caches the final classification of an article. A lookup error never breaks
+    the labelisation: it is reported and counted as a miss.
+    """
+
+    def __init__(self, backend, ttl=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key, self.ttl)
+        except Exception as e:
+            print("Error reading the LLM cache: ", e)
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        try:
+            self.backend.set(key, copy.deepcopy(value))
+        except Exception as e:
+            print("Error writing the LLM cache: ", e)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def cache_from_env():
+    """
+    Builds the cache configured by the environment:
+        LLM_CACHE_BACKEND: "lru", "sqlite", "rds" or "none" (default "lru")
+        LLM_CACHE_TTL: entry lifetime in seconds (default: no expiry)
+        LLM_CACHE_MAX_SIZE: maximum number of entries
+        LLM_CACHE_PATH: SQLite file (default "/tmp/llm_cache.sqlite")
+        LLM_CACHE_TABLE: RDS table (default "llm_cache")
+        LLM_CACHE_EVICTION_INTERVAL: seconds between two evictions of the RDS table (default 300)
+    """
+    backend_name = os.environ.get("LLM_CACHE_BACKEND", "lru").lower()
+    ttl = os.environ.get("LLM_CACHE_TTL")
+    ttl = float(ttl) if ttl else None
+    max_size = os.environ.get("LLM_CACHE_MAX_SIZE")
+
+    try:
+        if backend_name == "none":
+            return None
+        if backend_name == "sqlite":
+            backend = SQLiteCacheBackend(
+                path=os.environ.get("LLM_CACHE_PATH", "/tmp/llm_cache.sqlite"),
+                max_size=int(max_size or 10000),
+            )
+        elif backend_name == "rds":
+            backend = RDSCacheBackend(
+                connect=lambda: pymysql.connect(
+                    host=os.environ.get("RDS_ENDPOINT"),
+                    user=os.environ.get("RDS_USER"),
+                    password=os.environ.get("RDS_PASSWORD"),
+                    port=int(os.environ.get("RDS_PORT")),
+                    database=os.environ.get("RDS_DBNAME"),
+                ),
+                table_name=os.environ.get("LLM_CACHE_TABLE", "llm_cache"),
+                max_size=int(max_size or 100000),
+                eviction_interval=float(os.environ.get("LLM_CACHE_EVICTION_INTERVAL", 300)),
+            )
+        else:
+            backend = LRUCacheBackend(max_size=int(max_size or 1024))
+    except Exception as e:
+        print("Error initializing the LLM cache, running without cache: ", e)
+        return None
+
+    return ResponseCache(backend, ttl=ttl)
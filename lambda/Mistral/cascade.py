@@ -0,0 +1,73 @@
+import os
+import time
+
+
+class CascadeClassifier:
+    """
+    Local TF-IDF + logistic regression classifier trained by utils/train_cascade.py.
+
+    Its answer is only accepted when every head (sentiment, factuel, theme) is
+    above its calibrated confidence threshold; otherwise the article is
+    escalated to the LLM.
+    """
+
+    def __init__(self, model):
+        self.vectorizer = model["vectorizer"]
+        self.heads = model["heads"]
+        self.thresholds = model["thresholds"]
+        self.accepted = 0
+        self.escalated = 0
+        self.seconds = 0.0
+
+    @classmethod
+    def load(cls, path):
+        # Imported here: scikit-learn and joblib are only needed when the cascade is enabled
+        import joblib
+
+        return cls(joblib.load(path))
+
+    def predict(self, article):
+        """Returns the raw classification, or None to escalate to the LLM."""
+        start = time.perf_counter()
+        x = self.vectorizer.transform([f"{article['sujet']} {article['article']}"])
+        answers = {}
+        for head, model in self.heads.items():
+            proba = model.predict_proba(x)[0]
+            best = proba.argmax()
+            if proba[best] < self.thresholds[head]:
+                answers = None
+                break
+            answers[head] = (model.classes_[best], float(proba[best]))
+        self.seconds += time.perf_counter() - start
+
+        if answers is None:
+            self.escalated += 1
+            return None
+        self.accepted += 1
+        return {
+            "sentiment": str(answers["sentiment"][0]),
+            "confident_score": answers["sentiment"][1],
+            "factuel": bool(answers["factuel"][0]),
+            "theme": str(answers["theme"][0]),
+        }
+
+    def stats(self):
+        total = self.accepted + self.escalated
+        return {
+            "accepted": self.accepted,
+            "escalated": self.escalated,
+            "escalation_rate": self.escalated / total if total else 0.0,
+            "articles_per_second": total / self.seconds if self.seconds else 0.0,
+        }
+
+
+def cascade_from_env():
+    """Loads the cascade from CASCADE_MODEL_PATH, None when it is not configured."""
+    path = os.environ.get("CASCADE_MODEL_PATH")
+    if not path:
+        return None
+    try:
+        return CascadeClassifier.load(path)
+    except Exception as e:
+        print("Error loading the cascade classifier, every article goes to the LLM: ", e)
+        return None
@@ -0,0 +1,179 @@
+"""
+Structured records of the Bedrock calls of the labelisation lambdas.
+
+Each model call emits one JSON line (printed to CloudWatch, and appended to
+LLM_METRICS_PATH when set) with its stage, model, article id, latency, tokens,
+retries and outcome. The same file is deployed with the Mistral and the Nova
+lambdas.
+
+Aggregate exported records with:
+    python instrumentation.py report <log files...>
+"""
+import sys
+import json
+import os
+import time
+import math
+import hashlib
+from collections import defaultdict
+
+
+RECORD_TYPE = "llm_call"
+
+
+def article_id(*values):
+    """
+    Short stable id of an article. TrigerBucket2Nova derives it from the S3 path
+    and sends it as `article_id` to the next stages; the messages without it fall
+    back to their S3 path, or to the title and content of the article.
+    """
+    text = "|".join(str(value) for value in values)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def emit(record):
+    line = json.dumps(record, ensure_ascii=False)
+    print(line)
+    path = os.environ.get("LLM_METRICS_PATH")
+    if path:
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+
+def record_event(stage, model, article, outcome, latency_ms=0.0):
+    """Records an article answered without a model call (cache hit, cascade...)."""
+    emit(
+        {
+            "type": RECORD_TYPE,
+            "timestamp": time.time(),
+            "stage": stage,
+            "model": model,
+            "article_id": article,
+            "latency_ms": latency_ms,
+            "model_latency_ms": None,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "retries": 0,
+            "outcome": outcome,
+        }
+    )
+
+
+def instrumented_converse(client, stage, article, **kwargs):
+    """Calls `client.converse(**kwargs)` and emits its record, even on failure."""
+    record = {
+        "type": RECORD_TYPE,
+        "timestamp": time.time(),
+        "stage": stage,
+        "model": kwargs.get("modelId"),
+        "article_id": article,
+    }
+    start = time.perf_counter()
+    try:
+        response = client.converse(**kwargs)
+    except Exception as e:
+        error_response = getattr(e, "response", None) or {}
+        emit(
+            record
+            | {
+                "latency_ms": (time.perf_counter() - start) * 1000,
+                "model_latency_ms": None,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "retries": error_response.get("ResponseMetadata", {}).get("RetryAttempts", 0),
+                "outcome": error_response.get("Error", {}).get("Code", type(e).__name__),
+            }
+        )
+        raise
+
+    usage = response.get("usage", {})
+    emit(
+        record
+        | {
+            "latency_ms": (time.perf_counter() - start) * 1000,
+            "model_latency_ms": response.get("metrics", {}).get("latencyMs"),
+            "input_tokens": usage.get("inputTokens", 0),
+            "output_tokens": usage.get("outputTokens", 0),
+            "retries": response.get("ResponseMetadata", {}).get("RetryAttempts", 0),
+            "outcome": "ok",
+        }
+    )
+    return response
+
+
+# ----------------- Report -----------------
+
+
+def read_records(paths):
+    """Reads the records of log files, ignoring any prefix before the JSON object."""
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                start = line.find("{")
+                if start == -1 or RECORD_TYPE not in line:
+                    continue
+                try:
+                    record = json.loads(line[start:])
+                except json.JSONDecodeError:
+                    continue
+                if record.get("type") == RECORD_TYPE:
+                    yield record
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(math.ceil(q / 100 * len(values)) - 1, 0)
+    return values[rank]
+
+
+def aggregate(records):
+    """Latency percentiles and tokens per article, by model and stage."""
+    groups = defaultdict(list)
+    for record in records:
+        groups[(record["model"], record["stage"])].append(record)
+
+    rows = []
+    for (model, stage), group in sorted(groups.items(), key=lambda item: str(item[0])):
+        calls = [record for record in group if record["outcome"] == "ok"]
+        latencies = [record["latency_ms"] for record in calls]
+        tokens_per_article = defaultdict(int)
+        for record in group:
+            tokens_per_article[record["article_id"]] += record["input_tokens"] + record["output_tokens"]
+        tokens = list(tokens_per_article.values())
+        rows.append(
+            {
+                "model": model,
+                "stage": stage,
+                "records": len(group),
+                "errors": sum(record["outcome"] not in ("ok", "cache_hit", "cascade") for record in group),
+                "retries": sum(record["retries"] for record in group),
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+                "articles": len(tokens),
+                "tokens_per_article": sum(tokens) / len(tokens) if tokens else 0,
+            }
+        )
+    return rows
+
+
+def print_report(rows):
+    headers = ["model", "stage", "records", "errors", "retries", "p50_ms", "p95_ms", "p99_ms", "articles", "tokens_per_article"]
+    cells = [
+        [f"{row[h]:.0f}" if isinstance(row[h], float) else str(row[h]) for h in headers]
+        for row in rows
+    ]
+    widths = [max(len(value) for value in column) for column in zip(headers, *cells)]
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    for row in cells:
+        print("  ".join(value.ljust(w) for value, w in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "report":
+        print(__doc__)
+        sys.exit(1)
+    print_report(aggregate(read_records(sys.argv[2:])))
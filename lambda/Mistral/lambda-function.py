@@ -5,65 +5,122 @@ import os
 import pymysql
 from datetime import datetime
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from cache import cache_from_env, cache_key
+from cascade import cascade_from_env
+from instrumentation import article_id, instrumented_converse, record_event
+from prompt_builder import PromptBuilder, aggregate_outputs, estimate_tokens, strip_whitespace
+from single_stage import combined_tool, split_output
 
 
 os.environ["LIBMYSQL_ENABLE_CLEARTEXT_PLUGIN"] = "1"
 
 
+# Built once per container so that warm invocations share the cache
+LLM_CACHE = cache_from_env()
+CASCADE = cascade_from_env()
+
+
 class TextLabelisation:
-    def __init__(self, aws_access_key_id, aws_secret_access_key, model_id):
+    def __init__(
+        self,
+        aws_access_key_id,
+        aws_secret_access_key,
+        model_id,
+        cache=None,
+        prompt_builder=None,
+        cascade=None,
+    ):
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
         self.session = boto3.Session()
         self.bedrock = self.session.client(service_name="bedrock-runtime")
         self.rds = self.session.client(service_name="rds")
         self.model_id = model_id  # "mistral.mistral-large-2402-v1:0"
+        self.inference_config = {
+            "maxTokens": 512,
+            "temperature": 0,
+        }
+        self.cache = cache
+        self.prompt_builder = prompt_builder or PromptBuilder.from_env()
+        self.cascade = cascade
 
     def __model__(self):
         return self.model_id
 
     def forward(self, article):
+        # Id given at ingestion, the same in the records of Nova
+        article_key = article.get("article_id") or article_id(article["sujet"], article["article"])
+        key = None
+        if self.cache is not None:
+            key = cache_key(
+                article,
+                self.model_id,
+                self.__getTool__(),
+                self.inference_config | {"prompt": self.prompt_builder.config()},
+            )
+            output = self.cache.get(key)
+            if output is not None:
+                print("LLM cache hit: ", self.cache.stats())
+                record_event("sentiment", self.model_id, article_key, "cache_hit")
+                return output
+
+        if self.cascade is not None:
+            output = self.cascade.predict(article)
+            if output is not None:
+                print("Answered by the cascade classifier: ", self.cascade.stats())
+                record_event("sentiment", self.model_id, article_key, "cascade")
+                output = self.__factuel_treshold__(output)
+                if self.cache is not None:
+                    self.cache.set(key, output)
+                return output
+
+        prompts = self.__create_content__(article)
+        if len(prompts) == 1:
+            outputs = [self.__classify__(prompts[0][0], article_key)]
+        else:
+            # Chunks of a long article are classified concurrently
+            with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
+                outputs = list(
+                    executor.map(
+                        self.__classify__,
+                        [prompt for prompt, _ in prompts],
+                        [article_key] * len(prompts),
+                    )
+                )
+        output = aggregate_outputs(outputs, [tokens for _, tokens in prompts])
+        print("Prompt tokens: ", self.prompt_builder.last_stats)
+
+        output = self.__factuel_treshold__(output)
+        if self.cache is not None:
+            self.cache.set(key, output)
+        return output
+
+    def __classify__(self, content, article_key):
         messages = [
             {
                 "role": "user",
                 "content": [
                     {
-                        "text": f"You have to use the sentiment_checker tool to classify the sentiment on the content within the <article> tags.\n\n {self.__create_content__(article)}"
+                        "text": f"You have to use the sentiment_checker tool to classify the sentiment on the content within the <article> tags.\n\n {content}"
                     }
                 ],
             }
         ]
 
-        response = self.bedrock.converse(
+        response = instrumented_converse(
+            self.bedrock,
+            "sentiment",
+            article_key,
             modelId=self.model_id,
             messages=messages,
-            inferenceConfig={
-                "maxTokens": 512,
-                "temperature": 0,
-            },
+            inferenceConfig=self.inference_config,
             toolConfig={"tools": self.__getTool__(), "toolChoice": {"any": {}}},
         )
-
-        output = self.__parse_response__(response)
-        output = self.__factuel_treshold__(output)
-        return output
+        return self.__parse_response__(response)
 
     def __create_content__(self, article):
-        date = article["date"]
-        territory = article["territoire"]
-        title = article["sujet"]
-        media = article["media"]
-        content = article["article"]
-
-        return f"""
-        <article>
-        <date>{date}</date>
-        <territory>{territory}</territory>
-        <title>{title}</title>
-        <media>{media}</media>
-        <content>{content}</content>
-        </article>
-        """
+        return self.prompt_builder.build(article)
 
     def __getTool__(self):
         tool_list = [
@@ -150,37 +207,174 @@ class TextLabelisation:
         return output
 
 
+class SingleStageLabelisation(TextLabelisation):
+    """
+    Labels the raw article sent by TrigerBucket2Nova ({"path", "text"}) with a
+    single model call returning both the Nova metadata and the sentiment, and
+    returns the row that Helper.merge_dict builds in the two-stage pipeline.
+    """
+
+    def forward(self, message):
+        text = message["text"]
+        article_key = message.get("article_id") or article_id(message.get("path", ""))
+        key = None
+        if self.cache is not None:
+            key = cache_key(
+                {"article": text},
+                self.model_id,
+                self.__getTool__(),
+                self.inference_config | {"prompt": self.prompt_builder.config()},
+            )
+            row = self.cache.get(key)
+            if row is not None:
+                print("LLM cache hit: ", self.cache.stats())
+                record_event("single_stage", self.model_id, article_key, "cache_hit")
+                return row
+
+        # Every chunk is labelled, as in the two-stage path
+        chunks = self.prompt_builder.split_content(strip_whitespace(text))
+        if len(chunks) == 1:
+            outputs = [self.__label__(chunks[0], article_key)]
+        else:
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                outputs = list(executor.map(self.__label__, chunks, [article_key] * len(chunks)))
+
+        # The metadata are read at the top of the article, in the first chunk
+        article, first = split_output(outputs[0], text, message.get("nb_articles", 1))
+        classifications = [first] + [split_output(output, text)[1] for output in outputs[1:]]
+        weights = [estimate_tokens(chunk, self.prompt_builder.chars_per_token) for chunk in chunks]
+        classifications = self.__factuel_treshold__(aggregate_outputs(classifications, weights))
+        row = Helper(self.rds).merge_dict(article, classifications)
+        if self.cache is not None:
+            self.cache.set(key, row)
+        return row
+
+    def __label__(self, content, article_key):
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "text": f"You have to use the article_labeler tool to extract the values and classify the sentiment of the content within the <article> tags.\n\n <article><content>{content}</content></article>"
+                    }
+                ],
+            }
+        ]
+
+        response = instrumented_converse(
+            self.bedrock,
+            "single_stage",
+            article_key,
+            modelId=self.model_id,
+            messages=messages,
+            inferenceConfig=self.inference_config,
+            toolConfig={"tools": self.__getTool__(), "toolChoice": {"any": {}}},
+        )
+        return self.__parse_response__(response)
+
+    def __getTool__(self):
+        return combined_tool(super().__getTool__())
+
+
+# Reused across warm invocations of the lambda, see Helper.__connection__
+DB_CONNECTION = None
+
+# Columns identifying an article: a redelivered message updates its row instead
+# of inserting a duplicate. The table needs a UNIQUE index on these columns.
+NATURAL_KEY = ["date", "media", "sujet"]
+
+# Columns written for every row, whatever the labelisation that built it:
+# the Nova metadata then the Mistral classification
+ROW_COLUMNS = ["date", "territoire", "sujet", "nb_articles", "media", "article", "sentiment", "factuel", "theme", "nuance"]
+
+
 class Helper:
     def __init__(self, rds):
         self.rds = rds
 
     def merge_dict(self, article, classifications):
-        return article | classifications
+        # The article id only links the records of the stages, it is not a column
+        row = {key: value for key, value in article.items() if key != "article_id"}
+        return row | classifications
 
     def send_to_SQL(self, dict_output):
+        self.send_batch_to_SQL([dict_output])
+
+    def send_batch_to_SQL(self, dict_outputs):
+        """Upserts every row of an SQS batch in a single transaction."""
+        if not dict_outputs:
+            return
+        sql = self.__upsert_query__(ROW_COLUMNS)
+        values = [tuple(row.get(column) for column in ROW_COLUMNS) for row in dict_outputs]
+
+        db = self.__connection__()
+        cursor = db.cursor()
+        try:
+            # pymysql rewrites an INSERT ... VALUES executemany as one multi-row INSERT
+            cursor.executemany(sql, values)
+            db.commit()
+            print(f"Data sent to SQL successfully ({len(values)} rows).")
+        except Exception as e:
+            print("Error sending data to SQL:", e)
+            db.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def __upsert_query__(self, columns):
+        table_name = os.environ.get("RDS_TABLE_NAME")
+        placeholders = ", ".join(["%s"] * len(columns))
+        updates = ", ".join(
+            f"{column} = VALUES({column})"
+            for column in columns
+            if column not in NATURAL_KEY
+        )
+        return (
+            f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON DUPLICATE KEY UPDATE {updates}"
+        )
+
+    def __connection__(self):
+        global DB_CONNECTION
+        if DB_CONNECTION is not None:
+            try:
+                # Checks the connection is alive and reopens it if it was dropped
+                DB_CONNECTION.ping(reconnect=True)
+                return DB_CONNECTION
+            except pymysql.MySQLError as e:
+                print("SQL connection lost, reconnecting: ", e)
+                try:
+                    DB_CONNECTION.close()
+                except Exception:
+                    pass
+                DB_CONNECTION = None
+
         database = self.__database_information__()
-        db = pymysql.connect(
+        DB_CONNECTION = pymysql.connect(
             host=database["ENDPOINT"],
             user=database["USER"],
             password=database["PASSWORD"],
             port=database["PORT"],
             database=database["DBNAME"],
         )
+        self.__check_natural_key__(DB_CONNECTION)
+        return DB_CONNECTION
+
+    def __check_natural_key__(self, db):
+        """Warns when the table lacks the UNIQUE index of the upserts (see utils/add_natural_key.py)."""
         table_name = os.environ.get("RDS_TABLE_NAME")
-        columns = ", ".join(dict_output.keys())
-        placeholders = ", ".join(["%s"] * len(dict_output))
-        sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-        try:
-            cursor = db.cursor()
-            cursor.execute(sql, tuple(dict_output.values()))
-            db.commit()
-            print("Data sent to SQL successfully.")
-        except Exception as e:
-            print("Error sending data to SQL:", e)
-            db.rollback()
-        finally:
-            cursor.close()
-            db.close()
+        with db.cursor() as cursor:
+            cursor.execute(f"SHOW INDEX FROM {table_name} WHERE Non_unique = 0 AND Key_name != 'PRIMARY'")
+            columns = [description[0] for description in cursor.description]
+            unique_indexes = {}
+            for row in cursor.fetchall():
+                index = dict(zip(columns, row))
+                unique_indexes.setdefault(index["Key_name"], set()).add(index["Column_name"])
+        if set(NATURAL_KEY) not in unique_indexes.values():
+            print(
+                f"WARNING: {table_name} has no UNIQUE index on {', '.join(NATURAL_KEY)}, "
+                "redelivered messages insert duplicates. Run utils/add_natural_key.py."
+            )
 
     def __database_information__(self):
         return {
@@ -193,49 +387,66 @@ class Helper:
 
 
 def lambda_handler(event, context):
-    article = event["Records"][0]["body"]
-    article = json.loads(article)
+    """
+    Labels the articles of an SQS batch and upserts them in one transaction.
+
+    The records that fail are returned as batchItemFailures, so that SQS only
+    redelivers them (the event source mapping needs ReportBatchItemFailures):
+    a labelisation error fails its own record, an SQL error fails every record
+    of the transaction. The upsert makes the redelivery of a record idempotent.
+    """
+    records = event["Records"]
     aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID")
     aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
 
-    try:
-        labelisation = TextLabelisation(
-            aws_access_key_id, aws_secret_access_key, "mistral.mistral-large-2402-v1:0"
-        )
-        print("LLM model used: ", labelisation.__model__())
-        output = labelisation.forward(article)
-    except ClientError as e:
-        print("Error during the labelisation process: ", e)
-        return {
-            "status": 500,
-        }
+    labelisation = TextLabelisation(
+        aws_access_key_id,
+        aws_secret_access_key,
+        "mistral.mistral-large-2402-v1:0",
+        cache=LLM_CACHE,
+        cascade=CASCADE,
+    )
+    print("LLM model used: ", labelisation.__model__())
+    helper = Helper(labelisation.rds)
+    single_stage = None
 
-    try:
-        helper = Helper(labelisation.rds)
-        merged_dict = helper.merge_dict(article, output)
-    except Exception as e:
-        print("Error during merging the article data and the LLM classification: ", e)
-        return {
-            "status": 500,
-        }
+    failures = []
+    labelled = []
+    for record in records:
+        try:
+            article = json.loads(record["body"])
+            if "sujet" in article:
+                output = labelisation.forward(article)
+                labelled.append((record, helper.merge_dict(article, output)))
+            else:
+                # Raw article sent straight by TrigerBucket2Nova: single-stage mode
+                if single_stage is None:
+                    single_stage = SingleStageLabelisation(
+                        aws_access_key_id,
+                        aws_secret_access_key,
+                        "mistral.mistral-large-2402-v1:0",
+                        cache=LLM_CACHE,
+                    )
+                labelled.append((record, single_stage.forward(article)))
+        except Exception as e:
+            print(f"Error during the labelisation of message {record.get('messageId')}: ", e)
+            failures.append(record)
 
     try:
-        helper.send_to_SQL(merged_dict)
+        helper.send_batch_to_SQL([row for _, row in labelled])
     except Exception as e:
         print("Error during the data sending process to SQL: ", e)
-        return {
-            "status": 500,
-        }
+        failures.extend(record for record, _ in labelled)
+        labelled = []
 
-    try:
-        url = os.environ.get("API_URL")
-        requests.post(url)
-    except Exception as e:
-        print("Error during POST: ", e)
-        return {
-            "status": 500,
-        }
+    if labelled:
+        try:
+            url = os.environ.get("API_URL")
+            requests.post(url)
+        except Exception as e:
+            # The rows are stored, the dashboard picks them up at its next refresh
+            print("Error during POST: ", e)
 
     return {
-        "status": 200,
+        "batchItemFailures": [{"itemIdentifier": record["messageId"]} for record in failures],
     }
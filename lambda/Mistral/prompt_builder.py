@@ -0,0 +1,156 @@
+import math
+import os
+import re
+
+
+SENTIMENT_ORDER = ["NEGATIVE", "POSITIVE", "NEUTRAL"]
+
+
+def estimate_tokens(text, chars_per_token=4.0):
+    """Local estimate of the number of tokens of a text, without any tokenizer call."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / chars_per_token)
+
+
+def strip_whitespace(text):
+    """Collapse runs of spaces and newlines into a single space."""
+    if text is None:
+        return ""
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+
+class PromptBuilder:
+    """
+    Builds the <article> prompt of TextLabelisation under a token budget.
+
+    An article content above `max_tokens` is either truncated or split into
+    overlapping chunks, one prompt per chunk.
+    """
+
+    def __init__(self, max_tokens=3000, strategy="chunk", overlap_tokens=100, max_chunks=8, chars_per_token=4.0):
+        if strategy not in ("truncate", "chunk"):
+            raise ValueError(f"Unknown prompt strategy: {strategy}")
+        self.max_tokens = max_tokens
+        self.strategy = strategy
+        self.overlap_tokens = overlap_tokens
+        self.max_chunks = max_chunks
+        self.chars_per_token = chars_per_token
+        self.last_stats = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_tokens=int(os.environ.get("PROMPT_MAX_TOKENS", 3000)),
+            strategy=os.environ.get("PROMPT_STRATEGY", "chunk"),
+            overlap_tokens=int(os.environ.get("PROMPT_OVERLAP_TOKENS", 100)),
+            max_chunks=int(os.environ.get("PROMPT_MAX_CHUNKS", 8)),
+        )
+
+    def config(self):
+        return {
+            "max_tokens": self.max_tokens,
+            "strategy": self.strategy,
+            "overlap_tokens": self.overlap_tokens,
+            "max_chunks": self.max_chunks,
+        }
+
+    def create_content(self, article, content):
+        return (
+            "<article>"
+            f"<date>{strip_whitespace(article['date'])}</date>"
+            f"<territory>{strip_whitespace(article['territoire'])}</territory>"
+            f"<title>{strip_whitespace(article['sujet'])}</title>"
+            f"<media>{strip_whitespace(article['media'])}</media>"
+            f"<content>{content}</content>"
+            "</article>"
+        )
+
+    def legacy_content(self, article):
+        """The former prompt, with the indented tags and the raw content."""
+        return f"""
+        <article>
+        <date>{article['date']}</date>
+        <territory>{article['territoire']}</territory>
+        <title>{article['sujet']}</title>
+        <media>{article['media']}</media>
+        <content>{article['article']}</content>
+        </article>
+        """
+
+    def split_content(self, content):
+        """Splits a content into word-aligned pieces of at most `max_tokens`."""
+        max_chars = int(self.max_tokens * self.chars_per_token)
+        if len(content) <= max_chars:
+            return [content]
+        if self.strategy == "truncate":
+            return [content[:max_chars].rsplit(" ", 1)[0]]
+
+        overlap_chars = int(self.overlap_tokens * self.chars_per_token)
+        chunks = []
+        start = 0
+        while start < len(content) and len(chunks) < self.max_chunks:
+            end = start + max_chars
+            if end < len(content):
+                # Cut on the last space to avoid splitting a word
+                cut = content.rfind(" ", start, end)
+                end = cut if cut > start else end
+            chunks.append(content[start:end].strip())
+            if end >= len(content):
+                break
+            start = max(end - overlap_chars, start + 1)
+        return chunks
+
+    def build(self, article):
+        """
+        Returns the list of (prompt, content tokens) to classify for an article and
+        keeps the token savings in `last_stats`.
+        """
+        content = strip_whitespace(article["article"])
+        chunks = self.split_content(content)
+        prompts = [self.create_content(article, chunk) for chunk in chunks]
+
+        original_tokens = estimate_tokens(self.legacy_content(article), self.chars_per_token)
+        prompt_tokens = sum(estimate_tokens(prompt, self.chars_per_token) for prompt in prompts)
+        self.last_stats = {
+            "original_tokens": original_tokens,
+            "prompt_tokens": prompt_tokens,
+            "saved_tokens": original_tokens - prompt_tokens,
+            "chunks": len(prompts),
+        }
+        return [(prompt, estimate_tokens(chunk, self.chars_per_token)) for prompt, chunk in zip(prompts, chunks)]
+
+
+def aggregate_outputs(outputs, weights):
+    """
+    Merges the raw tool outputs of the chunks of an article (before the nuance
+    threshold) with a deterministic rule:
+        - sentiment: highest sum of chunk weight * confidence, ties broken by
+          NEGATIVE > POSITIVE > NEUTRAL;
+        - confident_score: share of that score over the total chunk weight, so
+          disagreeing chunks lower the confidence and end up nuanced;
+        - factuel: True only if every chunk is factual;
+        - theme: highest total chunk weight, ties broken alphabetically.
+    """
+    if len(outputs) == 1:
+        return outputs[0]
+
+    total_weight = sum(weights) or 1
+    sentiment_scores = {}
+    theme_scores = {}
+    for output, weight in zip(outputs, weights):
+        sentiment = output["sentiment"]
+        sentiment_scores[sentiment] = sentiment_scores.get(sentiment, 0) + weight * output["confident_score"]
+        theme_scores[output["theme"]] = theme_scores.get(output["theme"], 0) + weight
+
+    sentiment = min(
+        sentiment_scores,
+        key=lambda s: (-sentiment_scores[s], SENTIMENT_ORDER.index(s) if s in SENTIMENT_ORDER else len(SENTIMENT_ORDER)),
+    )
+    theme = min(theme_scores, key=lambda t: (-theme_scores[t], t))
+    return {
+        "sentiment": sentiment,
+        "confident_score": sentiment_scores[sentiment] / total_weight,
+        "factuel": all(output["factuel"] for output in outputs),
+        "theme": theme,
+    }
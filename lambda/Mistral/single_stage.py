@@ -0,0 +1,169 @@
+# Departments the model may answer, same list as the Nova json_format tool
+DEPARTMENTS = [
+    "Aisne",
+    "Aube",
+    "Calvados",
+    "Cantal",
+    "Eure-et-Loir",
+    "Ille-et-Vilaine",
+    "Jura",
+    "Landes",
+    "Loire",
+    "Loiret",
+    "Lot-et-Garonne",
+    "Meuse",
+    "Orne",
+    "Pas-de-Calais",
+    "Puy-de-Dôme",
+    "Bas-Rhin",
+    "Haut-Rhin",
+    "Seine-Maritime",
+    "Yonne",
+    "Seine-Saint-Denis",
+    "Alpes-de-Haute-Provence",
+    "Hautes-Alpes",
+    "Ardèche",
+    "Ardennes",
+    "Ariège",
+    "Charente-Maritime",
+    "Corrèze",
+    "Dordogne",
+    "Eure",
+    "Indre-et-Loire",
+    "Lozère",
+    "Nièvre",
+    "Oise",
+    "Pyrénées-Atlantiques",
+    "Rhône",
+    "Saône-et-Loire",
+    "Paris",
+    "Yvelines",
+    "Tarn",
+    "Tarn-et-Garonne",
+    "Var",
+    "Vendée",
+    "Haute-Vienne",
+    "Vosges",
+    "Hauts-de-Seine",
+    "Allier",
+    "Alpes-Maritimes",
+    "Aude",
+    "Corse-du-Sud",
+    "Côtes-d'Armor",
+    "Creuse",
+    "Doubs",
+    "Finistère",
+    "Gard",
+    "Gironde",
+    "Indre",
+    "Isère",
+    "Marne",
+    "Haute-Marne",
+    "Moselle",
+    "Hautes-Pyrénées",
+    "Pyrénées-Orientales",
+    "Savoie",
+    "Haute-Savoie",
+    "Seine-et-Marne",
+    "Vaucluse",
+    "Vienne",
+    "Val-de-Marne",
+    "Ain",
+    "Aveyron",
+    "Bouches-du-Rhône",
+    "Charente",
+    "Cher",
+    "Haute-Corse",
+    "Côte-d'Or",
+    "Drôme",
+    "Haute-Garonne",
+    "Gers",
+    "Hérault",
+    "Haute-Loire",
+    "Loire-Atlantique",
+    "Lot",
+    "Maine-et-Loire",
+    "Manche",
+    "Morbihan",
+    "Nord",
+    "Haute-Saône",
+    "Sarthe",
+    "Somme",
+    "Essonne",
+    "Val-d'Oise",
+    "Loir-et-Cher",
+    "Mayenne",
+    "Meurthe-et-Moselle",
+    "Deux-Sèvres",
+    "Territoire de Belfort",
+]
+
+METADATA_PROPERTIES = {
+    "date": {
+        "type": "string",
+        "description": "The article date. In the format YYYY-MM-DD.",
+        "pattern": "^(\\d{4})-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])$",
+    },
+    "media": {
+        "type": "string",
+        "description": "You are an expert about french medias. Give the name of the media that wrote this article. Only answer with the name of the media and nothing else.",
+    },
+    "title": {
+        "type": "string",
+        "description": "You are an expert journalist. Give the title of this french press article. Be concise and very pragmatic.",
+    },
+    "location": {
+        "type": "string",
+        "description": "French Department where the story of the article is located.You are an expert in french geography and know exactly in which department is located each town and village. If the location is not in the list, give the nearest department. You have to give the most precise department as possible. You can only give back a location in the given list and no additionnal verbose.",
+        "enum": DEPARTMENTS,
+    },
+}
+
+
+def combined_tool(sentiment_tools):
+    """
+    Builds the `article_labeler` tool: the Nova metadata fields (date, media,
+    title, location) added to the schema of the Mistral sentiment_checker tool.
+    """
+    sentiment_spec = sentiment_tools[0]["toolSpec"]
+    sentiment_schema = sentiment_spec["inputSchema"]["json"]
+    return [
+        {
+            "toolSpec": {
+                "name": "article_labeler",
+                "description": "Get the values and the sentiment of the article.",
+                "inputSchema": {
+                    "json": {
+                        "type": "object",
+                        "properties": METADATA_PROPERTIES | sentiment_schema["properties"],
+                        "required": list(METADATA_PROPERTIES) + sentiment_schema["required"],
+                    }
+                },
+            }
+        }
+    ]
+
+
+def format_location(location):
+    """Same normalisation as the Nova get_department for a department name."""
+    location = (location or "").strip()
+    if location in DEPARTMENTS:
+        return location.lower()
+    return "Inconnu"
+
+
+def split_output(tool_input, text, nb_articles=1):
+    """
+    Splits the article_labeler answer into the article row sent by the Nova lambda
+    and the raw sentiment classification parsed by TextLabelisation. The model does
+    not count the articles: `nb_articles` comes with the message, 1 by default as in Nova.
+    """
+    article = {
+        "date": tool_input.pop("date", ""),
+        "territoire": format_location(tool_input.pop("location", "")),
+        "sujet": tool_input.pop("title", ""),
+        "nb_articles": nb_articles,
+        "media": tool_input.pop("media", ""),
+        "article": text,
+    }
+    return article, tool_input
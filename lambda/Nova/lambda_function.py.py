@@ -2,6 +2,7 @@ import boto3  # API AWS
 from botocore.exceptions import ClientError
 import os
 from nova_llm import PDFLabelisation
+from instrumentation import article_id
 import logging
 import json
 
@@ -25,6 +26,8 @@ def lambda_handler(event, context):
         try:
             path = message_body.get("path", None)
             text = message_body.get("text", "")
+            # Id given at ingestion, passed on to Mistral for its records
+            article_key = message_body.get("article_id") or article_id(path or "")
             # Initialize the PDFLabelisation object
             if path:
                 pdf_labelisation = PDFLabelisation(
@@ -35,7 +38,7 @@ def lambda_handler(event, context):
                 )
 
                 # Call the forward method to get the labelisation
-                message_body = pdf_labelisation.forward(path)
+                message_body = pdf_labelisation.forward(path, article_key)
                 message_body = json.loads(message_body)
                 message_body = message_body["body"]
                 json.dumps(message_body)
@@ -47,6 +50,7 @@ def lambda_handler(event, context):
                         "nb_articles": message_body["nb_articles"],
                         "media": message_body["media"],
                         "article": message_body["article"],
+                        "article_id": article_key,
                     }
                 )
                 logger.info(f"Output: {message}")
@@ -1,5 +1,6 @@
 import boto3
 from location import get_department
+from instrumentation import article_id, instrumented_converse
 import io
 import json
 from PyPDF2 import PdfReader
@@ -19,7 +20,7 @@ class PDFLabelisation:
     def __model__(self):
         return self.model_id
 
-    def forward(self, path):
+    def forward(self, path, article_key=None):
         response = self.s3_client.get_object(Bucket=self.bucket, Key=path)
         pdf_content = response["Body"].read()
 
@@ -41,7 +42,10 @@ class PDFLabelisation:
             }
         ]
 
-        response = self.bedrock.converse(
+        response = instrumented_converse(
+            self.bedrock,
+            "metadata",
+            article_key or article_id(path),
             modelId=self.model_id,
             messages=message,
             inferenceConfig={
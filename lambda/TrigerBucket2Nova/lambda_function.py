@@ -1,10 +1,19 @@
 import json
+import hashlib
 import boto3
 from PyPDF2 import PdfReader
 import io
+import os
 
 s3 = boto3.client("s3")
 
+# Set TARGET_QUEUE_URL to the NOVA2Mistral queue to label each article with a
+# single Mistral call (single-stage mode) instead of going through Nova.
+TARGET_QUEUE_URL = os.environ.get(
+    "TARGET_QUEUE_URL",
+    "https://sqs.us-west-2.amazonaws.com/571600845115/QueueForNova",
+)
+
 
 def lambda_handler(event, context):
     bucket = event["Records"][0]["s3"]["bucket"]["name"]
@@ -41,10 +50,17 @@ def lambda_handler(event, context):
         print("Error during extract text from pdf : ", e)
         return {"statusCode": 500, "body": json.dumps("Internal Server Error.")}
 
-    message_body = json.dumps({"path": key, "text": articles[0]})
+    # Id of the article in the records of every stage, as instrumentation.article_id(key)
+    message_body = json.dumps(
+        {
+            "path": key,
+            "text": articles[0],
+            "article_id": hashlib.sha1(key.encode("utf-8")).hexdigest()[:12],
+        }
+    )
     sqs = boto3.client("sqs")
     response = sqs.send_message(
-        QueueUrl="https://sqs.us-west-2.amazonaws.com/571600845115/QueueForNova",
+        QueueUrl=TARGET_QUEUE_URL,
         MessageBody=message_body,
     )
 
@@ -0,0 +1,117 @@
+import os
+import argparse
+
+import pymysql
+from dotenv import load_dotenv
+
+from cleaning_dataset import connect_to_rds
+
+# Columns identifying an article, as NATURAL_KEY of lambda/Mistral/lambda-function.py
+NATURAL_KEY = ["date", "media", "sujet"]
+INDEX_NAME = "natural_key"
+
+# Prefix of the TEXT columns in the index, MySQL cannot index them whole
+TEXT_PREFIX_LENGTH = 255
+
+
+def has_natural_key(cursor, table: str) -> bool:
+    cursor.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (INDEX_NAME,))
+    return bool(cursor.fetchall())
+
+
+def prefixed_columns(cursor, table: str) -> set:
+    """The columns of NATURAL_KEY that MySQL can only index on a prefix (TEXT and BLOB)."""
+    cursor.execute(f"SHOW COLUMNS FROM {table}")
+    types = {row[0]: row[1].lower() for row in cursor.fetchall()}
+    return {column for column in NATURAL_KEY if "text" in types[column] or "blob" in types[column]}
+
+
+def index_columns(prefixed: set) -> str:
+    """The columns of the index, TEXT columns being indexed on a prefix."""
+    return ", ".join(f"{column}({TEXT_PREFIX_LENGTH})" if column in prefixed else column for column in NATURAL_KEY)
+
+
+def key_expression(column: str, prefixed: set, alias: str = "") -> str:
+    """A natural key column as the index compares it: only the prefix of a TEXT column."""
+    name = f"{alias}.{column}" if alias else column
+    return f"LEFT({name}, {TEXT_PREFIX_LENGTH})" if column in prefixed else name
+
+
+def count_duplicates(cursor, table: str, prefixed: set) -> int:
+    """Rows sharing their natural key with a more recent row."""
+    key = ", ".join(key_expression(column, prefixed) for column in NATURAL_KEY)
+    cursor.execute(
+        f"SELECT COALESCE(SUM(n - 1), 0) FROM ("
+        f"SELECT COUNT(*) AS n FROM {table} GROUP BY {key} HAVING COUNT(*) > 1) AS duplicates"
+    )
+    return int(cursor.fetchone()[0])
+
+
+def delete_duplicates(cursor, table: str, prefixed: set) -> int:
+    """Deletes the duplicates of each article, keeping its most recent row (highest id)."""
+    # NULL values never collide in a UNIQUE index, they are compared with = as the index does
+    condition = " AND ".join(
+        f"{key_expression(column, prefixed, 'older')} = {key_expression(column, prefixed, 'newer')}"
+        for column in NATURAL_KEY
+    )
+    return cursor.execute(
+        f"DELETE older FROM {table} AS older JOIN {table} AS newer ON {condition} AND older.id < newer.id"
+    )
+
+
+def add_natural_key(delete: bool = False) -> bool:
+    """
+    Adds the UNIQUE index on (date, media, sujet) that the upsert of the Mistral
+    lambda relies on, so that a redelivered SQS message updates its row instead of
+    inserting a duplicate. Running it again once the index exists does nothing.
+
+    Args:
+        delete: Deletes the existing duplicates first, keeping the most recent row of each article.
+
+    Returns:
+        Whether the table has the index.
+    """
+    connection = connect_to_rds()
+    if not connection:
+        print("Connection failed.")
+        return False
+
+    table = os.getenv("RDS_TABLE")
+    cursor = connection.cursor()
+    try:
+        if has_natural_key(cursor, table):
+            print(f"{table} already has the {INDEX_NAME} index.")
+            return True
+
+        # Rows are duplicates when the index would see them as such, on the prefix of their TEXT columns
+        prefixed = prefixed_columns(cursor, table)
+        duplicates = count_duplicates(cursor, table, prefixed)
+        if duplicates and not delete:
+            print(f"{table} has {duplicates} duplicate rows, rerun with --delete-duplicates to keep the most recent ones.")
+            return False
+        if duplicates:
+            deleted = delete_duplicates(cursor, table, prefixed)
+            print(f"{deleted} duplicate rows deleted.")
+
+        cursor.execute(f"ALTER TABLE {table} ADD UNIQUE KEY {INDEX_NAME} ({index_columns(prefixed)})")
+        connection.commit()
+        print(f"{INDEX_NAME} index added to {table}.")
+        return True
+    except pymysql.MySQLError as e:
+        connection.rollback()
+        print(f"Error adding the {INDEX_NAME} index: {e}")
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Adds the UNIQUE index of the upserts of the Mistral lambda to the RDS table.")
+    parser.add_argument(
+        "--delete-duplicates", action="store_true", help="Delete the existing duplicates, keeping the most recent row of each article."
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    add_natural_key(delete=args.delete_duplicates)
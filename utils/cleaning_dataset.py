@@ -1,9 +1,19 @@
 import os
 import re
+import argparse
 import csv
+import json
+import time
+import shutil
+import tempfile
 import unicodedata
-from typing import List, Optional, Union, Any, Dict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import List, Optional, Union, Any, Callable, Dict, Tuple
 
+import numpy as np
 import pandas as pd
 import pymysql
 from dotenv import load_dotenv
@@ -103,6 +113,32 @@ def clean_using_dict(text: str, replace_dict: Dict[str, str]) -> str:
     return text
 
 
+# ----------------- Value normalization utilities -----------------
+
+
+def values_from_codes(
+    series: pd.Series, codes: np.ndarray, values: List[Any], categorical: bool = True
+) -> pd.Series:
+    """Builds the series of values[code] for each code, as a categorical by default."""
+    if categorical:
+        value_codes, categories = pd.factorize(pd.Series(values, dtype=object))
+        result = pd.Categorical.from_codes(value_codes[codes], categories)
+    else:
+        result = pd.Series(values, dtype=object).to_numpy()[codes]
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+def map_unique_values(
+    series: pd.Series, function: Callable[[Any], Any], categorical: bool = True
+) -> pd.Series:
+    """
+    Applies `function` once per distinct value of the series (missing values
+    included) and maps the results back through the factorized codes.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return values_from_codes(series, codes, [function(value) for value in uniques], categorical)
+
+
 # ----------------- Splitting utilities -----------------
 
 
@@ -110,28 +146,80 @@ def get_delimiter_pattern(delimiters: List[str]) -> str:
     return "|".join(map(re.escape, delimiters))
 
 
+@lru_cache(maxsize=None)
+def compile_delimiter_pattern(delimiters: Tuple[str, ...]) -> re.Pattern:
+    return re.compile(get_delimiter_pattern(list(delimiters)))
+
+
 def split_value_by_delimiters(value: Any, delimiters: List[str]) -> List[Any]:
     if isinstance(value, str):
-        pattern = get_delimiter_pattern(delimiters)
-        if re.search(pattern, value):
-            return re.split(pattern, value)
+        return compile_delimiter_pattern(tuple(delimiters)).split(value)
     return [value]
 
 
 def split_series_by_delimiters(series: pd.Series, delimiters: List[str]) -> pd.Series:
-    return series.apply(lambda x: split_value_by_delimiters(x, delimiters))
+    """Splits every string of the series into a list; other values become [value]."""
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return pd.Series([[value] for value in series], index=series.index, dtype=object)
+    parts = series.str.split(compile_delimiter_pattern(tuple(delimiters)))
+    not_split = parts.isna()
+    if not_split.any():
+        parts[not_split] = pd.Series(
+            [[value] for value in series[not_split]], index=series.index[not_split], dtype=object
+        )
+    return parts
+
+
+def slice_lengths(lengths: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Length of values[:stop] for lists of the given lengths, with Python slicing semantics."""
+    return np.where(stops >= 0, np.minimum(stops, lengths), np.maximum(lengths + stops, 0))
+
+
+def explode_lists(df: pd.DataFrame, column: str, parts: pd.Series, keep: np.ndarray) -> pd.DataFrame:
+    """
+    Array-based equivalent of assigning `[p[:k] for p, k in zip(parts, keep)]` to
+    `column` and calling `df.explode(column, ignore_index=True)`: a row whose
+    list is cut to nothing explodes into a single NaN.
+    """
+    lengths = parts.str.len().to_numpy()
+    rows = np.repeat(np.arange(len(df)), lengths)
+    positions = np.arange(len(rows)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    values = parts.explode().to_numpy(dtype=object)
+
+    emptied = (keep == 0)[rows] & (positions == 0)
+    kept = (positions < keep[rows]) | emptied
+    values[emptied] = np.nan
+
+    exploded = df.iloc[rows[kept]].reset_index(drop=True)
+    exploded[column] = values[kept]
+    return exploded
 
 
 # ----------------- Database utilities -----------------
 
 
-def connect_to_rds() -> Optional[pymysql.Connection]:
+TABLE_COLUMNS = [
+    "date",
+    "territoire",
+    "sujet",
+    "theme",
+    "nb_articles",
+    "media",
+    "article",
+    "nuance",
+    "sentiment",
+    "factuel",
+]
+
+
+def connect_to_rds(local_infile: bool = False) -> Optional[pymysql.Connection]:
     try:
         return pymysql.connect(
             host=os.getenv("RDS_HOST_WRITER"),
             user=os.getenv("RDS_USER"),
             password=os.getenv("RDS_PASSWORD"),
             database=os.getenv("RDS_DB"),
+            local_infile=local_infile,
         )
     except pymysql.MySQLError as e:
         print(f"Error connecting to MySQL: {e}")
@@ -170,18 +258,178 @@ def load_csv_to_mysql(csv_file_path: Union[str, os.PathLike]) -> None:
             connection.close()
 
 
+def read_load_progress(progress_file: Union[str, os.PathLike], csv_file_path: Union[str, os.PathLike]) -> int:
+    """Number of rows of the CSV already committed by a previous bulk load."""
+    if not os.path.exists(progress_file):
+        return 0
+    with open(progress_file, encoding="utf-8") as file:
+        progress = json.load(file)
+    if progress.get("file") != os.path.abspath(csv_file_path):
+        return 0
+    return progress.get("rows_done", 0)
+
+
+def write_load_progress(progress_file: Union[str, os.PathLike], csv_file_path: Union[str, os.PathLike], rows_done: int) -> None:
+    with open(progress_file, "w", encoding="utf-8") as file:
+        json.dump({"file": os.path.abspath(csv_file_path), "rows_done": rows_done}, file)
+
+
+def drop_secondary_indexes(cursor, table: str) -> List[str]:
+    """Drops the secondary indexes of a table and returns the statements to rebuild them."""
+    cursor.execute(f"SHOW INDEX FROM {table}")
+    columns = [description[0] for description in cursor.description]
+    indexes: Dict[str, Dict[str, Any]] = {}
+    for row in cursor.fetchall():
+        index = dict(zip(columns, row))
+        if index["Key_name"] == "PRIMARY":
+            continue
+        entry = indexes.setdefault(index["Key_name"], {"unique": not index["Non_unique"], "columns": []})
+        sub_part = f"({index['Sub_part']})" if index.get("Sub_part") else ""
+        entry["columns"].append((index["Seq_in_index"], f"{index['Column_name']}{sub_part}"))
+
+    rebuild_statements = []
+    for name, index in indexes.items():
+        cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+        index_columns = ", ".join(column for _, column in sorted(index["columns"]))
+        unique = "UNIQUE " if index["unique"] else ""
+        rebuild_statements.append(f"ALTER TABLE {table} ADD {unique}INDEX {name} ({index_columns})")
+    return rebuild_statements
+
+
+def insert_chunk(cursor, table: str, rows: List[List[str]], method: str) -> None:
+    if method == "infile":
+        # LOAD DATA reads a file: the chunk is written to a temporary CSV
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8", newline="", delete=False) as file:
+            csv.writer(file).writerows(rows)
+        try:
+            cursor.execute(
+                f"""
+                LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+                CHARACTER SET utf8mb4
+                FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+                LINES TERMINATED BY '\\r\\n'
+                ({", ".join(TABLE_COLUMNS)})
+                """,
+                (file.name,),
+            )
+        finally:
+            os.remove(file.name)
+    else:
+        # pymysql rewrites an INSERT ... VALUES executemany as multi-row INSERTs
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(TABLE_COLUMNS)}) VALUES ({', '.join(['%s'] * len(TABLE_COLUMNS))})",
+            rows,
+        )
+
+
+def bulk_load_csv_to_mysql(
+    csv_file_path: Union[str, os.PathLike],
+    chunk_size: int = 5000,
+    method: str = "executemany",
+    progress_file: Optional[Union[str, os.PathLike]] = None,
+    rebuild_indexes: bool = False,
+) -> int:
+    """
+    Streams a cleaned CSV into MySQL by chunks, each chunk being committed on its own.
+
+    Args:
+        csv_file_path: The cleaned CSV, with the columns of TABLE_COLUMNS.
+        chunk_size: Number of rows per chunk and per transaction.
+        method: "executemany" (multi-row INSERT) or "infile" (LOAD DATA LOCAL INFILE).
+        progress_file: JSON file recording the committed rows; a new call resumes after them.
+        rebuild_indexes: Drops the secondary indexes before the load and rebuilds them after.
+
+    Returns:
+        The number of rows loaded by this call.
+    """
+    if method not in ("executemany", "infile"):
+        raise ValueError(f"Unknown bulk load method: {method}")
+    connection = connect_to_rds(local_infile=method == "infile")
+    if not connection:
+        print("Connection failed.")
+        return 0
+
+    table = os.getenv("RDS_TABLE")
+    rows_done = read_load_progress(progress_file, csv_file_path) if progress_file else 0
+    if rows_done:
+        print(f"Resuming after {rows_done} rows already loaded.")
+
+    cursor = connection.cursor()
+    rebuild_statements = []
+    loaded = 0
+    failed = False
+    start = time.perf_counter()
+    try:
+        if rebuild_indexes:
+            # The unique indexes are rebuilt, and checked, once the rows are loaded
+            rebuild_statements = drop_secondary_indexes(cursor, table)
+            cursor.execute("SET unique_checks = 0")
+
+        with open(csv_file_path, mode="r", encoding="utf-8", newline="") as file:
+            csv_reader = csv.reader(file)
+            next(csv_reader)  # Skip header
+            for _ in islice(csv_reader, rows_done):
+                pass
+            while True:
+                chunk = list(islice(csv_reader, chunk_size))
+                if not chunk:
+                    break
+                try:
+                    insert_chunk(cursor, table, chunk, method)
+                    connection.commit()
+                except pymysql.MySQLError as e:
+                    connection.rollback()
+                    print(f"Error loading the chunk starting at row {rows_done}: {e}")
+                    raise
+                rows_done += len(chunk)
+                loaded += len(chunk)
+                if progress_file:
+                    write_load_progress(progress_file, csv_file_path, rows_done)
+                elapsed = time.perf_counter() - start
+                print(f"{rows_done} rows loaded ({loaded / elapsed:.0f} rows/s).")
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        try:
+            if rebuild_indexes:
+                cursor.execute("SET unique_checks = 1")
+                for statement in rebuild_statements:
+                    cursor.execute(statement)
+        except pymysql.MySQLError as e:
+            # The error of the load, if any, is the one raised
+            if not failed:
+                raise
+            print(f"Error rebuilding the indexes after the failed load: {e}")
+            for statement in rebuild_statements:
+                print(f"Index to rebuild: {statement}")
+        finally:
+            try:
+                cursor.close()
+                connection.close()
+            except pymysql.MySQLError:
+                pass
+
+    elapsed = time.perf_counter() - start
+    print(f"Bulk load completed: {loaded} rows in {elapsed:.1f}s ({loaded / elapsed if elapsed else 0:.0f} rows/s).")
+    return loaded
+
+
 # ----------------- Transformation functions -----------------
 
 
 def transform_media(
     df: pd.DataFrame, delimiters: List[str] = ["/", " et ", "+"]
 ) -> pd.DataFrame:
-    df["media"] = split_series_by_delimiters(df["media"], delimiters)
-    df["media"] = df.apply(lambda row: row["media"][: row["nb_articles"]], axis=1)
+    parts = split_series_by_delimiters(df["media"], delimiters)
+    # Keep at most nb_articles medias per row
+    keep = slice_lengths(parts.str.len().to_numpy(), df["nb_articles"].to_numpy())
     # Adjust article count based on split length
-    df["nb_articles"] = df["nb_articles"] // df["media"].apply(len)
-    df = df.explode("media", ignore_index=True)
-    df["media"] = df["media"].apply(normalize).map(media_mapping)
+    df = df.assign(nb_articles=df["nb_articles"] // pd.Series(keep, index=df.index))
+    df = explode_lists(df, "media", parts, keep)
+    df["media"] = map_unique_values(
+        df["media"], lambda media: media_mapping.get(normalize(media), np.nan)
+    )
     return df
 
 
@@ -193,24 +441,29 @@ def restructure_theme_list(themes: List[str], nb_articles: int) -> List[str]:
 
 def transform_theme(df: pd.DataFrame, delimiters: List[str] = ["/"]) -> pd.DataFrame:
     # Replace whitespace in theme values and then split by delimiter.
-    df["theme"] = df["theme"].str.replace(r"\s+", "_", regex=True)
-    df["theme"] = split_series_by_delimiters(df["theme"], delimiters)
-    df["theme"] = df.apply(
-        lambda row: (
-            restructure_theme_list(row["theme"], row.nb_articles)
-            if isinstance(row["theme"], list)
-            else row["theme"]
-        ),
-        axis=1,
-    )
-    df["nb_articles"] = df["nb_articles"] // df["theme"].apply(len)
-    df = df.explode("theme", ignore_index=True)
-    return df
+    themes = df["theme"].str.replace(r"\s+", "_", regex=True)
+    parts = split_series_by_delimiters(themes, delimiters)
+    lengths = parts.str.len()
+    nb_articles = df["nb_articles"]
+    # Only rows with more themes than articles are restructured; the others are
+    # left unchanged by restructure_theme_list, except a missing theme which it rejects.
+    restructured = (lengths > nb_articles) | (nb_articles < 1) | themes.isna()
+    if restructured.any():
+        parts[restructured] = pd.Series(
+            [
+                restructure_theme_list(themes_list, nb)
+                for themes_list, nb in zip(parts[restructured], nb_articles[restructured])
+            ],
+            index=parts.index[restructured],
+            dtype=object,
+        )
+        lengths = parts.str.len()
+    df = df.assign(nb_articles=nb_articles // lengths)
+    return explode_lists(df, "theme", parts, lengths.to_numpy())
 
 
 def clean_tonalite(df: pd.DataFrame) -> pd.DataFrame:
     # Clean the nuance column and set flags for nuance and factuel.
-    df["nuance"] = df["nuance"].str.strip().str.replace(r"\s+", " ", regex=True)
     nuance_map = {
         "factuel": False,
         "factuel négatif": False,
@@ -220,11 +473,19 @@ def clean_tonalite(df: pd.DataFrame) -> pd.DataFrame:
         "positif nuancé": True,
         "négatif nuancé": True,
     }
-    df["nuance"] = df["nuance"].map(nuance_map)
+    df["nuance"] = map_unique_values(
+        df["nuance"],
+        lambda nuance: (
+            nuance_map.get(re.sub(r"\s+", " ", nuance.strip()), np.nan)
+            if isinstance(nuance, str)
+            else np.nan
+        ),
+    )
     df["factuel"] = df["factuel"].astype(int)
     df["nuance"] = df["nuance"].astype(int)
-    df["sentiment"] = df["sentiment"].map(
-        {"neutre": "NEUTRAL", "positif": "POSITIVE", "negatif": "NEGATIVE"}
+    sentiment_map = {"neutre": "NEUTRAL", "positif": "POSITIVE", "negatif": "NEGATIVE"}
+    df["sentiment"] = map_unique_values(
+        df["sentiment"], lambda sentiment: sentiment_map.get(sentiment, np.nan)
     )
     return df
 
@@ -238,11 +499,8 @@ def convert_date(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def preprocess_theme_column(df: pd.DataFrame) -> pd.DataFrame:
-    # Clean the theme column: remove accents, lowercase and trim spaces.
-    df["theme"] = df["theme"].apply(
-        lambda x: unidecode.unidecode(str(x).lower().strip())
-    )
-    # Make explicit replacements to standardize theme texts.
+    # Clean the theme column: remove accents, lowercase and trim spaces,
+    # then make explicit replacements to standardize theme texts.
     replacements = {
         "clients": "client",
         "cleints": "client",
@@ -252,8 +510,10 @@ def preprocess_theme_column(df: pd.DataFrame) -> pd.DataFrame:
         "aleas climatiquess": "aleas climatiques",
         "marque employeur / rh": "marque employeur/rh",
     }
-    for old, new in replacements.items():
-        df["theme"] = df["theme"].str.replace(old, new, regex=False)
+    df["theme"] = map_unique_values(
+        df["theme"],
+        lambda x: clean_using_dict(unidecode.unidecode(str(x).lower().strip()), replacements),
+    )
     return df
 
 
@@ -285,8 +545,8 @@ def preprocess_territoire_column(df: pd.DataFrame) -> pd.DataFrame:
         "hauts-de-france": "Hauts-de-France",
         "hauts-de-france ": "Hauts-de-France",
     }
-    df["territoire"] = (
-        df["territoire"].str.lower().apply(lambda x: clean_using_dict(x, replace_dict))
+    df["territoire"] = map_unique_values(
+        df["territoire"], lambda x: clean_using_dict(x.lower(), replace_dict)
     )
     return df
 
@@ -302,44 +562,105 @@ def preprocess_df(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def sanitize_and_label_responses(df: pd.DataFrame) -> pd.DataFrame:
-    df["Qualité du retour"] = df["Qualité du retour"].apply(
-        lambda x: unidecode.unidecode(x.lower())
-    )
-    df["Qualité du retour"] = df["Qualité du retour"].str.strip()
-
-    df["sentiment"] = df["Qualité du retour"].apply(
-        lambda x: (
+    # The labels only depend on the response, so they are derived once per distinct response.
+    codes, responses = pd.factorize(df["Qualité du retour"], use_na_sentinel=False)
+    responses = [unidecode.unidecode(x.lower()).strip() for x in responses]
+    quality = df["Qualité du retour"]
+
+    df["Qualité du retour"] = values_from_codes(quality, codes, responses)
+    df["sentiment"] = values_from_codes(
+        quality,
+        codes,
+        [
             "positif" if "positif" in x else ("negatif" if "negatif" in x else "neutre")
-        )
-    )
-
-    df["factuel"] = df["Qualité du retour"].apply(
-        lambda x: True if "factuel" in x else False
+            for x in responses
+        ],
     )
+    df["factuel"] = values_from_codes(quality, codes, ["factuel" in x for x in responses])
 
     return df
 
 
-# ----------------- Main script -----------------
+# ----------------- Parquet output -----------------
 
-if __name__ == "__main__":
-    load_dotenv()
-    # Load CSV into DataFrame and rename columns
-    df = pd.read_csv("data/Data.csv")
-
-    df.rename(
-        columns={
-            "Date": "date",
-            "Territoire": "territoire",
-            "Sujet": "sujet",
-            "Thème": "theme",
-            "Nbre d'article": "nb_articles",
-            "Média": "media",
-            "Articles": "article",
-            "Tonalité": "nuance",
-        },
-        inplace=True,
+CATEGORICAL_COLUMNS = ["territoire", "theme", "media", "sentiment"]
+BOOLEAN_COLUMNS = ["nuance", "factuel"]
+# Partition of the rows without a valid date
+UNKNOWN_MONTH = "unknown"
+
+
+def to_parquet_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Typed copy of cleaned rows, with the year_month partition column."""
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d", errors="coerce")
+    df["year_month"] = df["date"].dt.strftime("%Y-%m").fillna(UNKNOWN_MONTH)
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype("category")
+    for column in BOOLEAN_COLUMNS:
+        df[column] = df[column].astype(bool)
+    return df
+
+
+def write_cleaned_parquet(
+    df: pd.DataFrame, output_dir: Union[str, os.PathLike], append: bool = False
+) -> None:
+    """
+    Writes cleaned rows as a Parquet dataset partitioned by year-month
+    (output_dir/year_month=2024-01/...). Requires pyarrow. Without `append`,
+    the previous dataset is replaced.
+    """
+    if not append and os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    to_parquet_dtypes(df).to_parquet(
+        output_dir, engine="pyarrow", partition_cols=["year_month"], index=False
     )
+
+
+def read_cleaned_parquet(
+    path: Union[str, os.PathLike],
+    columns: Optional[List[str]] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Reads the cleaned Parquet dataset. Only the requested columns are read, and
+    only the year-month partitions overlapping [start_date, end_date] are opened.
+    """
+    filters = []
+    if start_date is not None:
+        start = pd.Timestamp(start_date)
+        filters += [("year_month", ">=", start.strftime("%Y-%m")), ("date", ">=", start)]
+    if end_date is not None:
+        end = pd.Timestamp(end_date)
+        filters += [("year_month", "<=", end.strftime("%Y-%m")), ("date", "<=", end)]
+    return pd.read_parquet(path, engine="pyarrow", columns=columns, filters=filters or None)
+
+
+# ----------------- Dataset cleaning -----------------
+
+SOURCE_COLUMNS = {
+    "Date": "date",
+    "Territoire": "territoire",
+    "Sujet": "sujet",
+    "Thème": "theme",
+    "Nbre d'article": "nb_articles",
+    "Média": "media",
+    "Articles": "article",
+    "Tonalité": "nuance",
+}
+QUALITY_COLUMNS = ["Qualité du retour2", "Qualité du retour"]
+
+# Explicit dtypes of the source columns: inferred per chunk, a chunk without any
+# value in a column would read it as float, and its fingerprints would differ
+SOURCE_DTYPES = {column: str for column in [*SOURCE_COLUMNS, *QUALITY_COLUMNS]} | {"Nbre d'article": "float64"}
+
+
+def clean_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Row-local cleaning of the source rows: each cleaned row only depends on its
+    source row, so rows can be cleaned separately. Duplicates are kept.
+    """
+    df = df.rename(columns=SOURCE_COLUMNS)
     df["nb_articles"] = df["nb_articles"].fillna(1).astype(int)
 
     # Process media and theme columns
@@ -351,13 +672,227 @@ if __name__ == "__main__":
     df = clean_tonalite(df)
     df = convert_date(df)
     df = preprocess_df(df)
+    return df
+
+
+def row_fingerprints(df: pd.DataFrame) -> np.ndarray:
+    """64-bit hash of the values of each row, whatever the column dtypes."""
+    return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+
+
+def read_clean_state(state_file: Union[str, os.PathLike]) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(state_file):
+        return None
+    with open(state_file, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def write_clean_state(
+    state_file: Union[str, os.PathLike],
+    output_path: Union[str, os.PathLike],
+    source: np.ndarray,
+    cleaned: np.ndarray,
+) -> None:
+    state = {
+        "output": os.path.abspath(output_path),
+        "source": source.tolist(),
+        "cleaned": cleaned.tolist(),
+    }
+    # Replace the state at once, a partial file would trigger a full rebuild
+    temporary_file = f"{state_file}.tmp"
+    with open(temporary_file, "w", encoding="utf-8") as file:
+        json.dump(state, file)
+    os.replace(temporary_file, state_file)
+
+
+def update_cleaned_dataset(
+    source_path: Union[str, os.PathLike],
+    output_path: Union[str, os.PathLike],
+    state_file: Union[str, os.PathLike],
+    incremental: bool = True,
+    load_to_mysql: bool = False,
+    parquet_dir: Optional[Union[str, os.PathLike]] = None,
+) -> int:
+    """
+    Cleans the source CSV into the cleaned CSV.
+
+    The state file is the watermark of the previous run: the fingerprints of the
+    source rows already cleaned, and of the cleaned rows (before dropping the
+    quality columns) used to remove duplicates. In incremental mode only the new
+    source rows are cleaned and appended to the output, as the full run would
+    have written them. A source row changed or removed since the previous run
+    makes the appended output stale, so the whole dataset is cleaned again.
+
+    Args:
+        source_path: The raw export (data/Data.csv).
+        output_path: The cleaned CSV (data/Data_cleaned.csv).
+        state_file: JSON file of the fingerprints of the previous run.
+        incremental: False always cleans the whole dataset.
+        load_to_mysql: Also appends the new cleaned rows to the MySQL table.
+        parquet_dir: Also writes the cleaned rows to this partitioned Parquet dataset.
+
+    Returns:
+        The number of cleaned rows written by this call.
+    """
+    source = pd.read_csv(source_path, dtype=SOURCE_DTYPES)
+    source_fingerprints = row_fingerprints(source)
+
+    state = read_clean_state(state_file) if incremental else None
+    if state is not None:
+        known_source = np.array(state["source"], dtype=np.uint64)
+        if state.get("output") != os.path.abspath(output_path) or not os.path.exists(output_path):
+            print("Cleaned output missing or moved, cleaning the whole dataset.")
+            state = None
+        elif not np.isin(known_source, source_fingerprints).all():
+            print("Source rows changed or removed since the last run, cleaning the whole dataset.")
+            state = None
+
+    if state is None:
+        known_source = np.array([], dtype=np.uint64)
+        known_cleaned = np.array([], dtype=np.uint64)
+    else:
+        known_cleaned = np.array(state["cleaned"], dtype=np.uint64)
+
+    new_rows = ~np.isin(source_fingerprints, known_source)
+    print(f"{new_rows.sum()} new source rows out of {len(source)}.")
+
+    cleaned = clean_rows(source[new_rows])
+    cleaned_fingerprints = row_fingerprints(cleaned)
+    # Same rows as drop_duplicates over the previous and the new cleaned rows
+    unique_rows = ~pd.Series(cleaned_fingerprints).duplicated().to_numpy()
+    unique_rows &= ~np.isin(cleaned_fingerprints, known_cleaned)
+    cleaned = cleaned[unique_rows].dropna(how="all").drop(columns=QUALITY_COLUMNS)
+
+    append = state is not None
+    cleaned.to_csv(output_path, mode="a" if append else "w", header=not append, index=False)
+    write_clean_state(
+        state_file,
+        output_path,
+        np.concatenate([known_source, source_fingerprints[new_rows]]),
+        np.concatenate([known_cleaned, cleaned_fingerprints[unique_rows]]),
+    )
+    print(f"{len(cleaned)} cleaned rows {'appended to' if append else 'written to'} {output_path}.")
+    if parquet_dir and (len(cleaned) or not append):
+        write_cleaned_parquet(cleaned, parquet_dir, append=append)
+
+    if load_to_mysql and len(cleaned):
+        if not append:
+            print(f"Full rebuild: reload the table from {output_path} with bulk_load_csv_to_mysql.")
+        else:
+            with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as file:
+                delta_path = file.name
+            try:
+                cleaned.to_csv(delta_path, index=False)
+                bulk_load_csv_to_mysql(delta_path)
+            finally:
+                os.remove(delta_path)
+    return len(cleaned)
+
+
+def clean_chunk(df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Cleans a chunk of source rows, in a worker process. Returns the cleaned rows
+    without the quality columns, their fingerprints and which rows are empty.
+    """
+    cleaned = clean_rows(df)
+    fingerprints = row_fingerprints(cleaned)
+    empty = cleaned.isna().all(axis=1).to_numpy()
+    return cleaned.drop(columns=QUALITY_COLUMNS), fingerprints, empty
+
+
+def stream_clean_dataset(
+    source_path: Union[str, os.PathLike],
+    output_path: Union[str, os.PathLike],
+    chunk_size: int = 10000,
+    workers: Optional[int] = None,
+    parquet_dir: Optional[Union[str, os.PathLike]] = None,
+) -> int:
+    """
+    Cleans the source CSV chunk by chunk on a process pool and streams the
+    cleaned rows to the output, in the source order. At most two chunks per
+    worker are in flight, and duplicates are removed with the set of the 64-bit
+    fingerprints of the rows already written, so the memory does not grow with
+    the article texts of the whole dataset. With `parquet_dir`, each chunk is
+    also appended to a partitioned Parquet dataset.
+
+    Returns:
+        The number of cleaned rows written.
+    """
+    workers = workers or os.cpu_count() or 1
+    if parquet_dir and os.path.exists(parquet_dir):
+        shutil.rmtree(parquet_dir)
+    seen = set()
+    written = 0
+
+    with open(output_path, "w", newline="", encoding="utf-8") as output, ProcessPoolExecutor(
+        max_workers=workers
+    ) as executor:
+
+        def write_chunk(result: Tuple[pd.DataFrame, np.ndarray, np.ndarray]) -> None:
+            nonlocal written
+            cleaned, fingerprints, empty = result
+            keep = np.zeros(len(cleaned), dtype=bool)
+            for i, fingerprint in enumerate(fingerprints.tolist()):
+                if fingerprint not in seen:
+                    seen.add(fingerprint)
+                    keep[i] = not empty[i]
+            cleaned[keep].to_csv(output, header=output.tell() == 0, index=False)
+            if parquet_dir and keep.any():
+                write_cleaned_parquet(cleaned[keep], parquet_dir, append=True)
+            written += int(keep.sum())
+
+        pending = deque()
+        for chunk in pd.read_csv(source_path, dtype=SOURCE_DTYPES, chunksize=chunk_size):
+            pending.append(executor.submit(clean_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                write_chunk(pending.popleft().result())
+                print(f"{written} cleaned rows written.")
+        while pending:
+            write_chunk(pending.popleft().result())
+
+    print(f"{written} cleaned rows written to {output_path}.")
+    return written
 
-    df.drop_duplicates(inplace=True)
-    df = df.dropna(how="all")
-    df = df.drop(columns=["Qualité du retour2", "Qualité du retour"])
 
-    print(df.head())
+# ----------------- Main script -----------------
 
-    df.to_csv("data/Data_cleaned.csv", index=False)
-    # load_csv_to_mysql("updated_file.csv")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cleans the raw press export into data/Data_cleaned.csv.")
+    parser.add_argument("--source", default="data/Data.csv")
+    parser.add_argument("--output", default="data/Data_cleaned.csv")
+    parser.add_argument("--state", default="data/clean_state.json")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--incremental", action="store_true", help="Only clean the source rows added since the last run."
+    )
+    mode.add_argument(
+        "--stream", action="store_true", help="Clean the source by chunks on a process pool."
+    )
+    parser.add_argument("--mysql", action="store_true", help="Also append the new cleaned rows to MySQL.")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--parquet", default=None, help="Also write a Parquet dataset partitioned by year-month to this folder."
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.stream:
+        stream_clean_dataset(
+            args.source,
+            args.output,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            parquet_dir=args.parquet,
+        )
+    else:
+        update_cleaned_dataset(
+            args.source,
+            args.output,
+            args.state,
+            incremental=args.incremental,
+            load_to_mysql=args.mysql,
+            parquet_dir=args.parquet,
+        )
+    # bulk_load_csv_to_mysql("data/Data_cleaned.csv", progress_file="data/load_progress.json")
     print("Process completed.")
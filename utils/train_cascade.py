@@ -0,0 +1,213 @@
+import time
+import argparse
+from glob import glob
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GroupShuffleSplit
+
+from cleaning_dataset import preprocess_theme_column, sanitize_and_label_responses
+
+# Themes of the sentiment_checker tool, the only ones the cascade may answer.
+THEMES = [
+    "aleas climatiques",
+    "client",
+    "divers",
+    "greves",
+    "innovation",
+    "linky",
+    "marque employeur/rh",
+    "mobilite electrique",
+    "partenariats industriels/academiques",
+    "prevention",
+    "raccordement",
+    "reseau",
+    "rh",
+    "rh/partenariat/rse",
+    "rse",
+    "transition ecologique",
+]
+
+# Leftovers of the theme splitting in the cleaned dataset.
+THEME_FIXES = {
+    "aleas climatique": "aleas climatiques",
+    "partenariats industriels / academiques": "partenariats industriels/academiques",
+    "partenariats industriels": "partenariats industriels/academiques",
+    "academiques": "partenariats industriels/academiques",
+    "marque employeur / rh": "marque employeur/rh",
+    "marque employeur": "marque employeur/rh",
+    "rh - partenariat - rse": "rh/partenariat/rse",
+}
+
+SENTIMENT_MAPPING = {"neutre": "NEUTRAL", "positif": "POSITIVE", "negatif": "NEGATIVE"}
+
+HEADS = ["sentiment", "factuel", "theme"]
+
+# ----------------- Training data -----------------
+
+
+def normalize_theme(theme: str) -> Optional[str]:
+    """Maps a cleaned theme onto the tool enum, None if it is not part of it."""
+    theme = " ".join(str(theme).replace("_", " ").split())
+    theme = THEME_FIXES.get(theme, theme)
+    return theme if theme in THEMES else None
+
+
+def load_cleaned_dataset(path: str) -> pd.DataFrame:
+    """Labelled rows produced by cleaning_dataset.py."""
+    df = pd.read_csv(path)
+    return pd.DataFrame({
+        "text": df["sujet"].fillna("") + " " + df["article"].fillna(""),
+        "sentiment": df["sentiment"],
+        "factuel": df["factuel"].astype(bool),
+        "theme": df["theme"].map(normalize_theme),
+    })
+
+
+def load_reportings(path: str) -> pd.DataFrame:
+    """Labelled rows of the dashboard reportings (front/data/reportings-*.csv)."""
+    df = pd.read_csv(path, sep=";")
+    df = df.dropna(subset=["Qualité du retour"])
+    df = sanitize_and_label_responses(df)
+    df = preprocess_theme_column(df.rename(columns={"Thème": "theme"}))
+    return pd.DataFrame({
+        "text": df["Sujet"].fillna("") + " " + df["Articles"].fillna(""),
+        "sentiment": df["sentiment"].map(SENTIMENT_MAPPING),
+        "factuel": df["factuel"].astype(bool),
+        "theme": df["theme"].map(normalize_theme),
+    })
+
+
+def text_key(text: str) -> str:
+    """Key of an article text, whatever its case and spacing."""
+    return " ".join(str(text).lower().split())
+
+
+def majority(values: pd.Series):
+    """Most frequent label, the first one on a tie (the principal theme of a split theme list)."""
+    values = values.dropna()
+    if values.empty:
+        return None
+    return values.groupby(values, sort=False).size().idxmax()
+
+
+def aggregate_articles(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per article text. The cleaning explodes an article into one row per
+    theme and media, and the same article can be in several sources: their labels
+    are merged by majority vote, as the LLM gives a single label per head.
+    """
+    keys = df["text"].map(text_key)
+    aggregated = df.groupby(keys, sort=False).agg({"text": "first", **{head: majority for head in HEADS}})
+    aggregated["factuel"] = aggregated["factuel"].astype(bool)
+    return aggregated.reset_index(drop=True)
+
+
+def load_training_data(cleaned_path: str, reportings_pattern: str) -> pd.DataFrame:
+    frames = [load_cleaned_dataset(cleaned_path)]
+    frames += [load_reportings(path) for path in sorted(glob(reportings_pattern))]
+    df = pd.concat(frames, ignore_index=True)
+    return aggregate_articles(df[df["text"].str.strip() != ""])
+
+# ----------------- Training and calibration -----------------
+
+
+def calibrate_threshold(proba: np.ndarray, correct: np.ndarray, target_accuracy: float, min_accepted: int = 10) -> float:
+    """
+    Smallest confidence threshold whose accepted predictions reach the target
+    accuracy on the calibration set. Returns 1.01 (always escalate) otherwise.
+    """
+    order = np.argsort(-proba)
+    accuracy = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+    reached = np.flatnonzero((accuracy >= target_accuracy) & (np.arange(1, len(order) + 1) >= min_accepted))
+    if len(reached) == 0:
+        return 1.01
+    return float(proba[order][reached[-1]])
+
+
+def split_by_text(df: pd.DataFrame, test_size: float, seed: int) -> tuple:
+    """Splits the articles so that a text is never on both sides."""
+    splitter = GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=seed)
+    first, second = next(splitter.split(df, groups=df["text"].map(text_key)))
+    return df.iloc[first], df.iloc[second]
+
+
+def train_cascade(df: pd.DataFrame, target_accuracy: float = 0.95, seed: int = 0, test_size: float = 0.2) -> Dict:
+    """
+    Fits one TF-IDF vectorizer and a logistic regression per head on the articles of
+    `aggregate_articles`. The thresholds are calibrated on a split of their own, and
+    the metrics measured on a held-out test split, no text being shared by two splits.
+    """
+    rest_df, test_df = split_by_text(df, test_size, seed)
+    train_df, calibration_df = split_by_text(rest_df, 0.25, seed)
+
+    vectorizer = TfidfVectorizer(
+        strip_accents="unicode", lowercase=True, ngram_range=(1, 2), min_df=2, sublinear_tf=True, max_features=50000
+    )
+    x_train = vectorizer.fit_transform(train_df["text"])
+    x_calibration = vectorizer.transform(calibration_df["text"])
+
+    heads, thresholds = {}, {}
+    for head in HEADS:
+        train_labels = train_df[head].notna()
+        model = LogisticRegression(max_iter=1000, class_weight="balanced")
+        model.fit(x_train[train_labels.to_numpy()], train_df.loc[train_labels, head])
+
+        calibration_labels = calibration_df[head].notna().to_numpy()
+        proba = model.predict_proba(x_calibration[calibration_labels])
+        predictions = model.classes_[proba.argmax(axis=1)]
+        correct = predictions == calibration_df.loc[calibration_labels, head].to_numpy()
+        heads[head] = model
+        thresholds[head] = calibrate_threshold(proba.max(axis=1), correct, target_accuracy)
+
+    cascade = {"vectorizer": vectorizer, "heads": heads, "thresholds": thresholds}
+    cascade["metrics"] = evaluate_cascade(cascade, test_df)
+    return cascade
+
+
+def evaluate_cascade(cascade: Dict, df: pd.DataFrame) -> Dict:
+    """Escalation rate, accuracy of the accepted answers and throughput."""
+    start = time.perf_counter()
+    x = cascade["vectorizer"].transform(df["text"])
+    accepted = np.ones(len(df), dtype=bool)
+    predictions = {}
+    for head, model in cascade["heads"].items():
+        proba = model.predict_proba(x)
+        predictions[head] = model.classes_[proba.argmax(axis=1)]
+        accepted &= proba.max(axis=1) >= cascade["thresholds"][head]
+    elapsed = time.perf_counter() - start
+
+    metrics = {
+        "articles": len(df),
+        "escalation_rate": float(1 - accepted.mean()),
+        "articles_per_second": len(df) / elapsed if elapsed else float("inf"),
+    }
+    for head in predictions:
+        labelled = accepted & df[head].notna().to_numpy()
+        metrics[f"{head}_accuracy"] = (
+            float((predictions[head][labelled] == df[head].to_numpy()[labelled]).mean()) if labelled.any() else None
+        )
+    return metrics
+
+# ----------------- Main script -----------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trains the local classifier placed in front of the Mistral labelisation.")
+    parser.add_argument("--cleaned", default="data/Data_cleaned.csv")
+    parser.add_argument("--reportings", default="front/data/reportings-*.csv")
+    parser.add_argument("--target-accuracy", type=float, default=0.95)
+    parser.add_argument("--output", default="lambda/Mistral/cascade_model.joblib")
+    args = parser.parse_args()
+
+    df = load_training_data(args.cleaned, args.reportings)
+    print(f"Training on {len(df)} labelled articles.")
+    cascade = train_cascade(df, target_accuracy=args.target_accuracy)
+
+    print("Thresholds:", cascade["thresholds"])
+    print("Test metrics:", cascade["metrics"])
+    joblib.dump(cascade, args.output)
+    print(f"Cascade saved to {args.output}.")